@@ -0,0 +1,29 @@
+# coding: utf-8
+"""量子アルゴリズムの実装
+
+公開する名前は最初に参照したときにそのモジュールだけを import する (PEP 562)。
+"""
+
+import importlib
+
+_EXPORTS = {
+    "optimal_iterations": "grover", "run_grover": "grover",
+    "build_maxcut_hamiltonian": "maxcut", "create_random_graph": "maxcut",
+    "expected_cut": "qaoa", "graph_to_edges": "qaoa", "maxcut_diagonal": "qaoa", "optimize_qaoa": "qaoa",
+    "Ansatz": "vqe", "hardware_efficient_ansatz": "vqe", "run_vqe": "vqe",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
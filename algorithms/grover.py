@@ -0,0 +1,122 @@
+# coding: utf-8
+"""Grover のアルゴリズム
+
+オラクルはゲート行列ではなく、全基底インデックスに対して一括で評価する
+ブール値のマスク (または述語関数) で与える。
+
+- オラクル : 印の付いた基底の振幅の符号を反転 (対角の位相)
+- 拡散 2|s><s| - I : 振幅の平均 m を使って a -> 2m - a (ランク1の反射)
+
+Grover の反復では振幅はずっと実数なので、状態は実数配列で持つ。
+拡散は配列全体を書き換えずにスカラーの更新で表す (grover_state を参照)。
+float32 なら 28 量子ビット (2^28 振幅) でも 1 GiB に収まる。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class GroverResult(NamedTuple):
+    iterations: int
+    success_probability: float
+    theoretical_probability: float
+    num_marked: int
+
+
+def marked_indices(num_qubits: int, oracle, chunk: int = 1 << 22) -> np.ndarray:
+    """オラクルから印の付いた基底インデックスを取り出す
+
+    oracle は長さ 2^n のブール配列か、インデックスの配列を受け取って
+    ブール配列を返す関数。関数はチャンクごとにまとめて評価する。
+    """
+    if not callable(oracle):
+        return np.flatnonzero(np.asarray(oracle, dtype=bool))
+    size = 2**num_qubits
+    found = []
+    for start in range(0, size, chunk):
+        indices = np.arange(start, min(start + chunk, size), dtype=np.int64)
+        found.append(indices[np.asarray(oracle(indices), dtype=bool)])
+    return np.concatenate(found)
+
+
+def rotation_angle(num_qubits: int, num_marked: int) -> float:
+    """sin θ = sqrt(M / N) となる θ"""
+    return float(np.arcsin(np.sqrt(num_marked / 2**num_qubits)))
+
+
+def optimal_iterations(num_qubits: int, num_marked: int) -> int:
+    """成功確率 sin^2((2k+1)θ) を最大にする反復回数 k"""
+    if num_marked == 0:
+        return 0
+    theta = rotation_angle(num_qubits, num_marked)
+    # (2k+1)θ = π/2 となる k の前後の整数で良い方を選ぶ
+    k = np.pi / (4 * theta) - 0.5
+    candidates = {max(0, int(np.floor(k))), max(0, int(np.ceil(k)))}
+    return max(candidates, key=lambda c: theoretical_success(num_qubits, num_marked, c))
+
+
+def theoretical_success(num_qubits: int, num_marked: int, iterations: int) -> float:
+    theta = rotation_angle(num_qubits, num_marked)
+    return float(np.sin((2 * iterations + 1) * theta) ** 2)
+
+
+def grover_state(num_qubits: int, marked: np.ndarray, iterations: int,
+                 dtype=np.float64) -> np.ndarray:
+    """|s> から Grover の反復を iterations 回行った状態 (実数振幅)
+
+    実際の振幅を sign * raw + offset の形で持つと、拡散 a -> 2m - a は
+    (sign, offset) の更新だけで済み、配列を書き換えるのはオラクルで
+    印の付いた M 個の要素だけになる。平均 m も差分で追跡するので、
+    1回の反復は O(M)、全体を書き戻すのは最後の1回 (O(2^n)) だけ。
+    """
+    size = 2**num_qubits
+    psi = np.full(size, 1 / np.sqrt(size), dtype=dtype)
+    sign, offset = 1.0, 0.0
+    total = float(np.sqrt(size))  # raw の総和
+    for _ in range(iterations):
+        # オラクル: 実際の振幅の符号反転を raw に反映する
+        old = psi[marked].astype(np.float64)
+        new = -old - 2 * offset * sign
+        psi[marked] = new
+        total += new.sum() - old.sum()
+        # 拡散: 実際の振幅 a -> 2m - a
+        mean = sign * total / size + offset
+        sign, offset = -sign, 2 * mean - offset
+    psi *= dtype(sign)
+    psi += dtype(offset)
+    return psi
+
+
+def run_grover(num_qubits: int, oracle, iterations: int | None = None,
+               dtype=np.float64) -> tuple[np.ndarray, GroverResult]:
+    """Grover 探索を行い、最終状態と成功確率を返す
+
+    iterations を省略すると最適な反復回数を使う。
+    """
+    marked = marked_indices(num_qubits, oracle)
+    if iterations is None:
+        iterations = optimal_iterations(num_qubits, marked.size)
+    psi = grover_state(num_qubits, marked, iterations, dtype)
+    success = float(np.sum(psi[marked].astype(np.float64) ** 2))
+    result = GroverResult(
+        iterations, success, theoretical_success(num_qubits, marked.size, iterations), int(marked.size)
+    )
+    return psi, result
+
+
+def sample_grover(psi: np.ndarray, shots: int, seed=None) -> dict[str, int]:
+    """Grover の最終状態を測定し {'ビット列': 回数} を返す"""
+    from simulator.statevector import sample_indices, to_counts
+
+    probs = psi.astype(np.float64) ** 2
+    return to_counts(sample_indices(probs, shots, seed), psi.size.bit_length() - 1)
+
+
+if __name__ == "__main__":
+    # 10 量子ビットで 3 の倍数かつ 7 で割って 1 余るものを探す
+    psi, result = run_grover(10, lambda k: (k % 3 == 0) & (k % 7 == 1))
+    print(f"Marked items:        {result.num_marked}")
+    print(f"Iterations:          {result.iterations}")
+    print(f"Success probability: {result.success_probability:.4f}")
+    print(f"Theory:              {result.theoretical_probability:.4f}")
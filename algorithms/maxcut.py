@@ -0,0 +1,51 @@
+# coding: utf-8
+"""Max-Cut のグラフとイジングハミルトニアンを作る (workshop_blackbox の maxcut_ising.py から移したもの)
+
+ノートブックやスクリプトから import して、量子アニーリング版 (Amplify) と
+QAOA 版 (qaoa.py) で同じグラフを使うためのモジュール。
+networkx と amplify は重いので、関数を呼んだときに初めて import する。
+"""
+
+
+def create_random_graph(n_nodes: int, seed: int = 0, p: float = 0.7):
+    """
+    NetworkXを使用してランダムグラフ(重み付き)を作成する。
+
+    Args:
+        n_nodes (int): 頂点の数
+        seed (int): 乱数シード (実験の再現性を担保するために固定する)
+        p (float): 辺を張る確率
+    Returns:
+        nx.Graph: 重み付きグラフ (辺の属性 "weight" は 1 以上 9 以下の整数)
+    """
+    import networkx as nx
+    import numpy as np
+
+    G = nx.gnp_random_graph(n_nodes, p, seed=seed)
+    # 相互作用の強さにばらつきを持たせるため、エッジにランダムな重みを付与
+    # 物理的意味: 相互作用 J_ij の強さ
+    # np.random.seed(seed) と同じ乱数列だが、グローバルな乱数の状態は変えない
+    rng = np.random.RandomState(seed)
+    for (u, v) in G.edges():
+        G.edges[u, v]["weight"] = int(rng.randint(1, 10))
+    return G
+
+
+def build_maxcut_hamiltonian(G):
+    """Amplify のイジング変数で H = -Σ w (1 - s_u s_v) / 2 (= -カット値) を作り (H, s) を返す
+
+    Max-Cut問題ではカットされる辺の重みの合計Cを最大化する。
+    AmplifyはエネルギーHを最小化するマシンなので、H = -C とすることで対応づけができる。
+    スピンが異符号なら (1 - s_u s_v)/2 = 1 で重み w が加算され、同符号なら 0 になる。
+    ゲート方式で同じ H を使うときは simulator.evolution.IsingHamiltonian.maxcut を使う。
+    """
+    from amplify import VariableGenerator
+
+    gen = VariableGenerator()
+    # "Ising"を指定することで、変数は {+1, -1} の値を取る物理スピンとして定義される
+    s = gen.array("Ising", len(G.nodes))
+    energy = 0
+    for u, v in G.edges:
+        w = G.edges[u, v]["weight"]
+        energy += -w * (1 - s[u] * s[v]) / 2
+    return energy, s
@@ -14,12 +14,14 @@
 # In[6]:
 
 
+import sys
+
 import numpy as np
 
-def is_stochastic_matrix(M):
-    """行列Mが確率行列(各列の和が1)か検証する"""
-    column_sums = np.sum(M, axis=0)
-    return np.allclose(column_sums, 1.0)
+# リポジトリのルートを import できるようにする (判定関数は simulator/checks.py にまとめてある)
+sys.path.append("../..")
+# is_stochastic_matrix: 各成分が非負で、各列の和が1か検証する
+from simulator.checks import is_stochastic_matrix
 
 # 実験用データ
 M_deterministic = np.array([[0, 1], [1, 0]])  # 決定論的 (Xゲート)
@@ -43,11 +45,8 @@ print(f"Result Vector: {v_after}")
 
 # --- Quantum State (L2 Norm) Experiment ---
 
-def is_quantum_state(v):
-    """ベクトルvが量子状態(ノルムが1)か検証する"""
-    # np.linalg.norm はベクトルの長さ(L2ノルム)を計算する
-    norm = np.linalg.norm(v)
-    return np.isclose(norm, 1.0)
+# is_quantum_state: np.linalg.norm でベクトルの長さ(L2ノルム)を計算し、1か検証する
+from simulator.checks import is_quantum_state
 
 # 1. 古典的な状態 (単なる0)
 # |0> = [1, 0]
@@ -76,14 +75,8 @@ print(f"Prob(0) of |i>:  {prob_0:.3f}")
 
 # --- Quantum Gates Experiment ---
 
-def is_unitary(M):
-    """行列Mがユニタリ(U†U = I)か検証する"""
-    # M.conj().T は共役転置 (Dagger)
-    M_dagger = M.conj().T
-    # 行列積を計算
-    product = M_dagger @ M
-    # 単位行列に近いかチェック
-    return np.allclose(product, np.eye(M.shape[0]))
+# is_unitary: 共役転置 (Dagger) M.conj().T との積 M†M が単位行列に近いか検証する
+from simulator.checks import is_unitary
 
 # 1. Hadamard Gate (H)
 H = (1/np.sqrt(2)) * np.array([
@@ -0,0 +1,51 @@
+# coding: utf-8
+"""NumPy による量子回路シミュレータ
+
+`from simulator import run_counts` のように使う名前は、最初に参照したときに
+そのモジュールだけを import する (PEP 562)。`import simulator` だけでは
+サブモジュールも qiskit / matplotlib なども読み込まない。
+"""
+
+import importlib
+
+# 公開する名前 -> 定義しているサブモジュール
+_EXPORTS = {
+    "bloch_vectors": "bloch", "reduced_bloch_vectors": "bloch",
+    "StateCache": "cache",
+    "is_cptp": "checks", "is_cptp_choi": "checks", "is_density_matrix": "checks",
+    "is_quantum_state": "checks", "is_stochastic_matrix": "checks", "is_unitary": "checks",
+    "compile_single_qubit": "decompose", "zyz_angles": "decompose",
+    "DensityMatrix": "density", "run_density_matrix": "density",
+    "run_counts": "engine",
+    "IsingHamiltonian": "evolution", "krylov_evolve": "evolution", "trotter_evolve": "evolution",
+    "MemmapStatevector": "memmap",
+    "bootstrap": "metrics", "compare": "metrics",
+    "MatrixProductState": "mps", "run_mps": "mps",
+    "NoiseModel": "noise", "run_trajectories": "noise",
+    "circuit_operators": "operators", "gate_operator": "operators",
+    "ParallelStatevector": "parallel", "run_parallel": "parallel",
+    "PauliSum": "pauli",
+    "FastSampler": "sampler",
+    "ShotRecord": "shots", "record_shots": "shots",
+    "matrix_function": "spectral", "powm": "spectral",
+    "StabilizerState": "stabilizer",
+    "run_statevector": "statevector", "sample_counts": "statevector",
+    "ParameterSweep": "sweep", "run_sweep": "sweep",
+    "reconstruct": "tomography",
+    "UnitaryBuilder": "unitary", "build_unitary": "unitary",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,135 @@
+# coding: utf-8
+"""ブロッホベクトルをまとめて計算し、Agg で (画面なしで) 描く
+
+plot_bloch_multivector は1状態ごとに図を作るので、軌跡の何千もの点には遅い。
+ここでは (B, 2) の状態や (B, 2^n) の多量子ビット状態の各量子ビットの縮約状態から、
+ブロッホベクトルを一度に求め、
+
+- render_bloch : すべての点を1枚の図に描く
+- write_frames : 球は1回だけ描き、点の位置だけ更新して PNG の連番を書き出す
+
+どちらも pyplot を使わず Figure と FigureCanvasAgg で描く。
+matplotlib は描くときにだけ import する。
+"""
+
+import os
+
+import numpy as np
+
+
+def bloch_vectors(states) -> np.ndarray:
+    """(B, 2) の状態ベクトルか (B, 2, 2) の密度行列から (B, 3) のブロッホベクトルを求める
+
+    ρ = (I + x X + y Y + z Z) / 2 なので x = 2 Re ρ10, y = 2 Im ρ10, z = ρ00 - ρ11。
+    """
+    states = np.asarray(states, dtype=complex)
+    if states.shape[-2:] == (2, 2):
+        rho10, diff = states[..., 1, 0], (states[..., 0, 0] - states[..., 1, 1]).real
+    else:
+        a, b = states[..., 0], states[..., 1]
+        rho10, diff = b * a.conj(), np.abs(a) ** 2 - np.abs(b) ** 2
+    return np.stack([2 * rho10.real, 2 * rho10.imag, diff], axis=-1)
+
+
+def reduced_bloch_vectors(states, qubits=None) -> np.ndarray:
+    """(B, 2^n) の状態の各量子ビットの縮約状態のブロッホベクトル (B, len(qubits), 3)
+
+    量子ビット q の縮約密度行列は ρ10 = Σ ψ[..1..] conj(ψ[..0..]) などの和なので、
+    2^n の配列を (B, 上位, 2, 下位) と見て和を取るだけで求まる。
+    """
+    states = np.atleast_2d(np.asarray(states, dtype=complex))
+    batch = states.shape[0]
+    num_qubits = states.shape[1].bit_length() - 1
+    qubits = range(num_qubits) if qubits is None else qubits
+    out = []
+    for q in qubits:
+        psi = states.reshape(batch, -1, 2, 2**q)
+        a, b = psi[:, :, 0, :], psi[:, :, 1, :]
+        rho10 = np.sum(b * a.conj(), axis=(1, 2))
+        diff = np.sum(np.abs(a) ** 2 - np.abs(b) ** 2, axis=(1, 2))
+        out.append(np.stack([2 * rho10.real, 2 * rho10.imag, diff], axis=-1))
+    return np.stack(out, axis=1)
+
+
+def _sphere(ax) -> None:
+    """球の枠と軸を描く"""
+    u = np.linspace(0, 2 * np.pi, 48)
+    for angle in np.linspace(0, np.pi, 7)[1:-1]:
+        ax.plot(np.sin(angle) * np.cos(u), np.sin(angle) * np.sin(u), np.full_like(u, np.cos(angle)),
+                color="lightgray", linewidth=0.5)
+    for angle in np.linspace(0, np.pi, 6, endpoint=False):
+        ax.plot(np.cos(angle) * np.sin(u), np.sin(angle) * np.sin(u), np.cos(u),
+                color="lightgray", linewidth=0.5)
+    for axis, label in zip(np.eye(3), ("x", "y", "|0>")):
+        ax.plot(*np.stack([-axis, axis], axis=1), color="gray", linewidth=0.7)
+        ax.text(*(1.15 * axis), label)
+    ax.set_xlim(-1, 1)
+    ax.set_ylim(-1, 1)
+    ax.set_zlim(-1, 1)
+    ax.set_box_aspect((1, 1, 1))
+    ax.set_axis_off()
+
+
+def _figure(num_spheres: int, size: float):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(size * num_spheres, size))
+    FigureCanvasAgg(figure)
+    axes = [figure.add_subplot(1, num_spheres, i + 1, projection="3d") for i in range(num_spheres)]
+    for ax in axes:
+        _sphere(ax)
+    return figure, axes
+
+
+def _as_spheres(vectors) -> np.ndarray:
+    """(B, 3) か (B, 球の数, 3) を (球の数, B, 3) にする"""
+    vectors = np.asarray(vectors, dtype=float)
+    if vectors.ndim == 2:
+        vectors = vectors[:, None, :]
+    return np.swapaxes(vectors, 0, 1)
+
+
+def render_bloch(vectors, path: str | None = None, colors=None, size: float = 4.0,
+                 titles=None, line: bool = False):
+    """ブロッホベクトルをすべて1枚の図に描き、path があれば保存して Figure を返す
+
+    vectors は (B, 3) か、reduced_bloch_vectors の (B, 球の数, 3)。
+    colors を省略すると点の順 (時刻) で色を変え、line=True なら点を線でつなぐ。
+    """
+    spheres = _as_spheres(vectors)
+    figure, axes = _figure(len(spheres), size)
+    if colors is None:
+        colors = np.linspace(0, 1, spheres.shape[1])
+    for i, (ax, points) in enumerate(zip(axes, spheres)):
+        if line:
+            ax.plot(*points.T, color="tab:blue", linewidth=0.8)
+        ax.scatter(*points.T, c=colors, cmap="viridis", s=6, depthshade=False)
+        if titles is not None:
+            ax.set_title(titles[i])
+    if path is not None:
+        figure.savefig(path)
+    return figure
+
+
+def write_frames(vectors, directory: str, prefix: str = "frame", trail: int = 0,
+                 size: float = 4.0, dpi: int = 80) -> list[str]:
+    """時刻ごとのブロッホベクトル (T, 3) か (T, 球の数, 3) を PNG の連番に書き出す
+
+    図と球は1回だけ作り、各フレームでは点 (と直前 trail 点の軌跡) の位置だけを更新する。
+    書き出したファイルのパスのリストを返す。
+    """
+    os.makedirs(directory, exist_ok=True)
+    spheres = _as_spheres(vectors)
+    figure, axes = _figure(len(spheres), size)
+    markers = [ax.plot([], [], [], "o", color="tab:red")[0] for ax in axes]
+    trails = [ax.plot([], [], [], color="tab:blue", linewidth=0.8)[0] for ax in axes]
+    paths = []
+    for t in range(spheres.shape[1]):
+        for points, marker, tail in zip(spheres, markers, trails):
+            marker.set_data_3d(*points[t:t + 1].T)
+            tail.set_data_3d(*points[max(0, t - trail):t + 1].T)
+        path = os.path.join(directory, f"{prefix}_{t:05d}.png")
+        figure.savefig(path, dpi=dpi)
+        paths.append(path)
+    return paths
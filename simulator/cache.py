@@ -0,0 +1,160 @@
+# coding: utf-8
+"""回路の構造をキーにした状態ベクトル / 確率ベクトルのキャッシュ
+
+同じ回路を何度もサンプリングするときに、状態の計算をやり直さず
+サンプリングだけで済ませるためのもの。
+
+- キー : ゲート列 (名前, 量子ビット, パラメータ) の SHA-256 (内容アドレス)。
+  確率ベクトルはキーそのもの、状態ベクトルは末尾に "-state" を付けたキーで持つ
+- メモリ : 配列のバイト数の合計が max_bytes を超えたら、最も長く使われて
+  いないものから捨てる (LRU)
+- ディスク : directory を指定すると、登録した配列を <キー>.npy として書き出し、
+  メモリにないときはそこから読み込む (プロセスをまたいで再利用できる)
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from .circuit import split_measurements, to_operations
+from .statevector import evolve, probabilities, sample_indices, to_counts, zero_state
+
+
+def operations_key(num_qubits: int, gates, values=None) -> str:
+    """ゲート列 (と束縛するパラメータ値) の内容から決まるキー"""
+    digest = hashlib.sha256(str(num_qubits).encode())
+    for op in gates:
+        digest.update(repr((op.name, op.qubits)).encode())
+        for p in op.params:
+            if isinstance(p, np.ndarray):
+                digest.update(repr((p.shape, p.dtype.str)).encode() + p.tobytes())
+            else:
+                digest.update(repr(p).encode())
+    if values is not None:
+        values = np.asarray(values, dtype=float)
+        digest.update(repr(values.shape).encode() + values.tobytes())
+    return digest.hexdigest()
+
+
+def circuit_key(circuit) -> str:
+    """回路の (末尾の測定を除いた) ゲート列のキー"""
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    return operations_key(num_qubits, gates)
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+
+class StateCache:
+    """キー -> 配列 のメモリ上限付き LRU キャッシュ (ディスクの層は任意)"""
+
+    def __init__(self, max_bytes: int = 1 << 30, directory: str | None = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = self._disk_hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (self._path(key) is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key: str) -> str | None:
+        return None if self.directory is None else os.path.join(self.directory, key + ".npy")
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self._hits, self._disk_hits, self._misses, self._evictions,
+                          len(self._entries), self._nbytes)
+
+    def _insert(self, key: str, array: np.ndarray) -> None:
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key).nbytes
+        self._entries[key] = array
+        self._nbytes += array.nbytes
+        # 入れたばかりのものは (上限より大きくても) 残す
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._nbytes -= old.nbytes
+            self._evictions += 1
+
+    def get(self, key: str) -> np.ndarray | None:
+        """キャッシュにあれば配列を、なければ None を返す"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return self._entries[key]
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            array = np.load(path)
+            self._insert(key, array)
+            self._disk_hits += 1
+            return array
+        self._misses += 1
+        return None
+
+    def put(self, key: str, array: np.ndarray) -> np.ndarray:
+        """配列を登録する (ディスクの層があればそこにも書き出す)"""
+        array.flags.writeable = False
+        self._insert(key, array)
+        path = self._path(key)
+        if path is not None and not os.path.exists(path):
+            # 書きかけのファイルを他のプロセスが読まないように、別名で書いてから置き換える
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+        return array
+
+    def clear(self) -> None:
+        """メモリ上の配列をすべて捨てる (ディスクのファイルは残す)"""
+        self._entries.clear()
+        self._nbytes = 0
+
+    # --- 回路を受け取る窓口 ---
+
+    def statevector(self, circuit) -> np.ndarray:
+        """回路の最終状態 (読み取り専用)。キャッシュになければ計算して登録する"""
+        key = circuit_key(circuit) + "-state"
+        state = self.get(key)
+        if state is None:
+            num_qubits, ops = to_operations(circuit)
+            gates, _ = split_measurements(ops)
+            state = self.put(key, evolve(zero_state(num_qubits), gates))
+        return state
+
+    def probabilities(self, circuit) -> np.ndarray:
+        """回路の測定確率 (読み取り専用)。状態ベクトルがキャッシュにあればそこから作る"""
+        key = circuit_key(circuit)
+        probs = self.get(key)
+        if probs is None:
+            state = self._entries.get(key + "-state")
+            if state is None:
+                num_qubits, ops = to_operations(circuit)
+                gates, _ = split_measurements(ops)
+                state = evolve(zero_state(num_qubits), gates)
+            probs = self.put(key, probabilities(state))
+        return probs
+
+    def sample_counts(self, circuit, shots: int, seed=None) -> dict[str, int]:
+        """全量子ビットを測定した {'ビット列': 回数}。2回目以降はサンプリングだけ"""
+        probs = self.probabilities(circuit)
+        return to_counts(sample_indices(probs, shots, seed), probs.size.bit_length() - 1)
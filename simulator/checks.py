@@ -0,0 +1,79 @@
+# coding: utf-8
+"""行列・ベクトルが確率や量子の対象として正しいかの判定
+
+lab_single_systems.py で定義していた is_stochastic_matrix, is_quantum_state, is_unitary を
+ノートブックを実行せずに import できるようにまとめたもの (ノートブックもここから import する)。
+混合状態と量子チャネルの対応する判定 (is_density_matrix, is_cptp, is_cptp_choi) もここに置く。
+"""
+
+import numpy as np
+
+
+def is_stochastic_matrix(M, atol: float = 1e-8) -> bool:
+    """行列Mが確率行列(各成分が非負で、各列の和が1)か検証する"""
+    M = np.asarray(M)
+    return bool(np.all(M >= -atol) and np.allclose(np.sum(M, axis=0), 1.0, atol=atol))
+
+
+def is_quantum_state(v, atol: float = 1e-8) -> bool:
+    """ベクトルvが量子状態(ノルムが1)か検証する"""
+    return bool(np.isclose(np.linalg.norm(v), 1.0, atol=atol))
+
+
+def is_unitary(M, atol: float = 1e-8) -> bool:
+    """行列Mがユニタリ(U†U = I)か検証する"""
+    M = np.asarray(M)
+    return bool(np.allclose(M.conj().T @ M, np.eye(M.shape[0]), atol=atol))
+
+
+def is_density_matrix(rho, atol: float = 1e-8) -> bool:
+    """行列 ρ が密度行列 (エルミート、半正定値、トレース 1) か検証する"""
+    rho = np.asarray(rho)
+    if rho.ndim != 2 or rho.shape[0] != rho.shape[1]:
+        return False
+    if not np.allclose(rho, rho.conj().T, atol=atol) or not np.isclose(np.trace(rho), 1.0, atol=atol):
+        return False
+    return bool(np.linalg.eigvalsh(rho).min() >= -atol)
+
+
+def choi_matrix(kraus) -> np.ndarray:
+    """クラウス演算子から Choi 行列 Σ_ij |i><j| ⊗ Φ(|i><j|) を作る"""
+    d = kraus[0].shape[1]
+    choi = np.zeros((d * kraus[0].shape[0],) * 2, dtype=complex)
+    for K in kraus:
+        # vec(K) = Σ_i |i> ⊗ K|i> なので Choi = Σ_K vec(K) vec(K)†
+        v = K.T.reshape(-1)
+        choi += np.outer(v, v.conj())
+    return choi
+
+
+def is_cptp(kraus, atol: float = 1e-8) -> bool:
+    """クラウス演算子の組がトレースを保つ (Σ K†K = I) か検証する
+
+    クラウス表示なら完全正値性は自動的に満たされる (Choi = Σ vec(K) vec(K)† は
+    半正定値) ので、確かめるのはトレース保存だけでよい。
+    """
+    kraus = [np.asarray(K, dtype=complex) for K in kraus]
+    d = kraus[0].shape[1]
+    total = sum(K.conj().T @ K for K in kraus)
+    return bool(np.allclose(total, np.eye(d), atol=atol))
+
+
+def is_cptp_choi(choi, input_dim: int | None = None, atol: float = 1e-8) -> bool:
+    """Choi 行列 Σ_ij |i><j| ⊗ Φ(|i><j|) のチャネルが CPTP か検証する
+
+    完全正値 ⇔ Choi がエルミートかつ半正定値、トレース保存 ⇔ 出力側の部分トレースが I。
+    input_dim を省略すると入力と出力の次元が等しいとみなす。
+    """
+    choi = np.asarray(choi, dtype=complex)
+    if input_dim is None:
+        input_dim = int(round(np.sqrt(choi.shape[0])))
+    output_dim = choi.shape[0] // input_dim
+    if choi.shape != (input_dim * output_dim,) * 2:
+        raise ValueError(f"Choi 行列の形が入力の次元 {input_dim} と合いません: {choi.shape}")
+    if not np.allclose(choi, choi.conj().T, atol=atol):
+        return False
+    reduced = np.trace(choi.reshape(input_dim, output_dim, input_dim, output_dim), axis1=1, axis2=3)
+    if not np.allclose(reduced, np.eye(input_dim), atol=atol):
+        return False
+    return bool(np.linalg.eigvalsh(choi).min() >= -atol)
@@ -0,0 +1,139 @@
+# coding: utf-8
+"""回路の内部表現
+
+Qiskit の QuantumCircuit を (name, qubits, params) のタプル列に変換する。
+qiskit 自体は import せず、`circuit.data` の属性だけを見る。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .gates import NAMED_GATES
+
+
+class Operation(NamedTuple):
+    name: str
+    qubits: tuple
+    params: tuple = ()
+    clbits: tuple = ()
+
+
+class ParameterRef(NamedTuple):
+    """回路パラメータ θ[index] を使う角度 scale * θ[index] + offset"""
+    index: int
+    scale: float = 1.0
+    offset: float = 0.0
+
+
+def _parameter_ref(value, parameters: dict):
+    """Qiskit の Parameter / 1次の ParameterExpression を ParameterRef にする"""
+    if not hasattr(value, "parameters"):
+        return value
+    if not value.parameters:
+        return float(value)
+    if len(value.parameters) != 1:
+        raise ValueError(f"1変数の1次式以外のパラメータには対応していません: {value}")
+    p, = value.parameters
+    scale = float(value.gradient(p))
+    offset = float(value.bind({p: 0}))
+    return ParameterRef(parameters[p], scale, offset)
+
+
+def bind_parameters(ops: list[Operation], values) -> list[Operation]:
+    """ParameterRef を含む Operation 列に値を代入する"""
+    bound = []
+    for op in ops:
+        if any(isinstance(p, ParameterRef) for p in op.params):
+            params = tuple(
+                p.scale * values[p.index] + p.offset if isinstance(p, ParameterRef) else p
+                for p in op.params
+            )
+            op = op._replace(params=params)
+        bound.append(op)
+    return bound
+
+
+# 状態には作用しない命令
+IGNORED = frozenset({"barrier", "delay"})
+
+
+def to_operations(circuit) -> tuple[int, list[Operation]]:
+    """回路を (量子ビット数, Operation のリスト) に変換する
+
+    QuantumCircuit のほか、(num_qubits, [(name, qubits, params), ...]) の
+    タプルもそのまま受け付ける。未束縛の Qiskit Parameter は、
+    circuit.parameters の順番を添字とする ParameterRef に置き換える。
+    名前で扱えない命令 (to_gate() した層など) は definition を再帰的に展開する。
+    回路と definition の global_phase は、量子ビット 1 つに掛ける "global_phase" の
+    Operation (行列は e^{iφ} I) として残す。
+    """
+    if isinstance(circuit, tuple) and len(circuit) == 2:
+        num_qubits, ops = circuit
+        return num_qubits, [Operation(*op) if not isinstance(op, Operation) else op for op in ops]
+
+    parameters = {p: i for i, p in enumerate(getattr(circuit, "parameters", ()))}
+    ops = []
+    if circuit.num_qubits:
+        _append_phase(getattr(circuit, "global_phase", 0.0), 0, parameters, ops)
+    _append_operations(circuit, tuple(range(circuit.num_qubits)), parameters, ops)
+    return circuit.num_qubits, ops
+
+
+def _append_phase(phase, qubit: int, parameters: dict, ops: list[Operation]) -> None:
+    """0 (mod 2π) でない global_phase を qubit に掛ける Operation にして追加する"""
+    phase = _parameter_ref(phase, parameters)
+    if isinstance(phase, ParameterRef) or phase % (2 * np.pi):
+        ops.append(Operation("global_phase", (qubit,), (phase,)))
+
+
+def _append_operations(circuit, qubit_map: tuple, parameters: dict, ops: list[Operation],
+                       clbit_map: tuple | None = None) -> None:
+    """circuit の命令を、量子ビットを qubit_map で外側の番号に直して ops に追加する"""
+    for inst in circuit.data:
+        op = inst.operation
+        if op.name in IGNORED:
+            continue
+        qubits = tuple(qubit_map[circuit.find_bit(q).index] for q in inst.qubits)
+        clbits = tuple(circuit.find_bit(c).index for c in inst.clbits)
+        if clbit_map is not None:
+            clbits = tuple(clbit_map[c] for c in clbits)
+        if op.name == "global_phase" and not qubits:
+            # Qiskit の GlobalPhaseGate (0 量子ビット)
+            if qubit_map:
+                _append_phase(op.params[0], qubit_map[0], parameters, ops)
+            continue
+        if op.name not in NAMED_GATES and op.name != "measure":
+            definition = getattr(op, "definition", None)
+            if definition is not None:
+                _append_operations(definition, qubits, parameters, ops, clbits)
+                if qubits:
+                    _append_phase(definition.global_phase, qubits[0], parameters, ops)
+                continue
+            if hasattr(op, "to_matrix"):
+                # definition のないゲートは行列にしておく
+                ops.append(Operation("unitary", qubits, (op.to_matrix(),)))
+                continue
+        params = tuple(_parameter_ref(p, parameters) for p in op.params)
+        ops.append(Operation(op.name, qubits, params, clbits))
+
+
+def split_measurements(ops: list[Operation]) -> tuple[list[Operation], dict[int, int]]:
+    """末尾の測定を取り除き、{clbit: qubit} の対応を返す"""
+    gates, measured = [], {}
+    for op in ops:
+        if op.name == "measure":
+            measured[op.clbits[0]] = op.qubits[0]
+        elif measured and op.qubits and any(q in measured.values() for q in op.qubits):
+            raise ValueError("回路途中の測定には対応していません")
+        else:
+            gates.append(op)
+    return gates, measured
+
+
+def num_clbits(circuit, measured: dict[int, int]) -> int:
+    """古典ビット数 (回路にレジスタがなければ測定された最大インデックス+1)"""
+    n = getattr(circuit, "num_clbits", 0)
+    if measured:
+        n = max(n, max(measured) + 1)
+    return n
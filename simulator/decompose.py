@@ -0,0 +1,169 @@
+# coding: utf-8
+"""1量子ビットのユニタリをネイティブな回転に分解する (バッチ処理)
+
+複数のゲートを融合した 2x2 のユニタリを (B, 2, 2) に積み、閉じた式で
+ZYZ のオイラー角と全体位相を一度に求める。
+
+    U = e^{iγ} Rz(φ) Ry(θ) Rz(λ) = e^{i(γ - (φ+λ)/2)} u(θ, φ, λ)
+
+Clifford+T で正確に書ける行列 (T を高々1つ含むもの) は、大域位相を除いて
+正規化した行列をキーにした表から、ゲート名の列を直接引く。
+"""
+
+from collections import deque
+from functools import cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .gates import FIXED_1Q
+
+# 表を作るときに使う Clifford+T のゲート
+WORD_GATES = ("h", "s", "sdg", "x", "y", "z", "sx", "sxdg", "t", "tdg")
+
+# 数値誤差でキーが変わらないように丸める桁
+_KEY_DECIMALS = 7
+
+
+class Decomposition(NamedTuple):
+    """ZYZ 分解の結果 (各要素は長さ B の配列)"""
+    theta: np.ndarray
+    phi: np.ndarray
+    lam: np.ndarray
+    phase: np.ndarray
+
+
+def zyz_angles(unitaries, atol: float = 1e-12) -> Decomposition:
+    """(B, 2, 2) のユニタリを U = e^{iγ} Rz(φ) Ry(θ) Rz(λ) の (θ, φ, λ, γ) に分解する
+
+    det U で割って SU(2) にしてから、(1,0) と (1,1) 成分の偏角で φ±λ を求める。
+    θ が 0 や π で φ±λ の片方が決まらないときは、それを 0 にする。
+    """
+    U = np.asarray(unitaries, dtype=complex).reshape(-1, 2, 2)
+    det = U[:, 0, 0] * U[:, 1, 1] - U[:, 0, 1] * U[:, 1, 0]
+    coeff = 1 / np.sqrt(det)
+    phase = -np.angle(coeff)
+    su = coeff[:, None, None] * U
+    theta = 2 * np.arctan2(np.abs(su[:, 1, 0]), np.abs(su[:, 0, 0]))
+    plus = np.where(np.abs(su[:, 1, 1]) > atol, np.angle(su[:, 1, 1]), 0.0)
+    minus = np.where(np.abs(su[:, 1, 0]) > atol, np.angle(su[:, 1, 0]), 0.0)
+    return Decomposition(theta, plus + minus, plus - minus, phase)
+
+
+def u_parameters(decomposition: Decomposition) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ZYZ 分解を Qiskit の u(θ, φ, λ) のパラメータと全体位相にする"""
+    theta, phi, lam, phase = decomposition
+    return theta, phi, lam, phase - (phi + lam) / 2
+
+
+def _word_matrix(word) -> np.ndarray:
+    """ゲート名の列 (先頭から順に掛ける) の行列"""
+    matrix = np.eye(2, dtype=complex)
+    for name in word:
+        matrix = FIXED_1Q[name] @ matrix
+    return matrix
+
+
+def canonical_keys(unitaries) -> np.ndarray:
+    """大域位相を除いて正規化した行列のキー (B 個の bytes 型の値)
+
+    行優先で最初に絶対値が 0.1 を超える成分が正の実数になるように位相を合わせ、
+    実部と虚部を丸めて整数にする。
+    """
+    U = np.asarray(unitaries, dtype=complex).reshape(-1, 4)
+    pivot = np.argmax(np.abs(U) > 0.1, axis=1)
+    ref = U[np.arange(U.shape[0]), pivot]
+    normalized = U * (np.abs(ref) / ref)[:, None]
+    ints = np.round(np.concatenate([normalized.real, normalized.imag], axis=1) * 10**_KEY_DECIMALS)
+    ints = np.ascontiguousarray(ints.astype(np.int64) + 0)  # -0 を 0 にそろえる
+    return ints.view(np.dtype((np.void, ints.shape[1] * 8))).ravel()
+
+
+@cache
+def _build_table() -> tuple[list[tuple], np.ndarray, np.ndarray]:
+    """T を高々1つ含む Clifford+T の語を幅優先で列挙し、各クラスの最短の語を集める
+
+    import のたびに作らないように、最初に使うときに1回だけ作る。
+    """
+    words, matrices, seen = [], [], set()
+    queue = deque([()])
+    while queue:
+        word = queue.popleft()
+        matrix = _word_matrix(word)
+        key = canonical_keys(matrix[None])[0].tobytes()
+        if key in seen:
+            continue
+        seen.add(key)
+        words.append(word)
+        matrices.append(matrix)
+        t_count = sum(name in ("t", "tdg") for name in word)
+        for name in WORD_GATES:
+            if name in ("t", "tdg") and t_count >= 1:
+                continue
+            queue.append(word + (name,))
+    matrices = np.array(matrices)
+    keys = canonical_keys(matrices)
+    order = np.argsort(keys)
+    return [words[i] for i in order], matrices[order], keys[order]
+
+
+def __getattr__(name: str):
+    # CLIFFORD_T_WORDS, CLIFFORD_T_MATRICES は参照されたときに表を作る (PEP 562)
+    if name == "CLIFFORD_T_WORDS":
+        return _build_table()[0]
+    if name == "CLIFFORD_T_MATRICES":
+        return _build_table()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def recognize_clifford_t(unitaries, atol: float = 1e-9) -> tuple[np.ndarray, np.ndarray]:
+    """Clifford+T (T は高々1つ) で正確に書けるユニタリを見つける
+
+    (表の添字, 全体位相) を返す。U = e^{iγ} CLIFFORD_T_MATRICES[添字] で、
+    表にないものの添字は -1。キーで引いたあと行列を比べて確かめる。
+    """
+    _, matrices, table_keys = _build_table()
+    U = np.asarray(unitaries, dtype=complex).reshape(-1, 2, 2)
+    keys = canonical_keys(U)
+    position = np.clip(np.searchsorted(table_keys, keys), 0, len(table_keys) - 1)
+    candidate = matrices[position]
+    # W^† U = e^{iγ} I なら trace は 2 e^{iγ}
+    overlap = np.einsum("bji,bji->b", candidate.conj(), U) / 2
+    phase = np.angle(overlap)
+    match = (table_keys[position] == keys) & np.all(
+        np.abs(U - np.exp(1j * phase)[:, None, None] * candidate) < atol, axis=(1, 2)
+    )
+    return np.where(match, position, -1), np.where(match, phase, 0.0)
+
+
+class CompiledGates(NamedTuple):
+    """compile_single_qubit の結果 (各要素は長さ B の配列)
+
+    index >= 0 なら CLIFFORD_T_WORDS[index] のゲート列、-1 なら u(θ, φ, λ)。
+    どちらも全体位相は phase。
+    """
+    index: np.ndarray
+    theta: np.ndarray
+    phi: np.ndarray
+    lam: np.ndarray
+    phase: np.ndarray
+
+
+def compile_single_qubit(unitaries, atol: float = 1e-9) -> CompiledGates:
+    """(B, 2, 2) のユニタリを Clifford+T の語か u ゲートにまとめて変換する"""
+    U = np.asarray(unitaries, dtype=complex).reshape(-1, 2, 2)
+    index, word_phase = recognize_clifford_t(U, atol)
+    theta, phi, lam, u_phase = u_parameters(zyz_angles(U))
+    exact = index >= 0
+    return CompiledGates(
+        index,
+        np.where(exact, 0.0, theta), np.where(exact, 0.0, phi), np.where(exact, 0.0, lam),
+        np.where(exact, word_phase, u_phase),
+    )
+
+
+def gate_sequence(compiled: CompiledGates, i: int) -> list[tuple[str, tuple]]:
+    """compile_single_qubit の i 番目を [(ゲート名, パラメータ), ...] にする (全体位相は除く)"""
+    if compiled.index[i] >= 0:
+        return [(name, ()) for name in _build_table()[0][compiled.index[i]]]
+    return [("u", (float(compiled.theta[i]), float(compiled.phi[i]), float(compiled.lam[i])))]
@@ -0,0 +1,148 @@
+# coding: utf-8
+"""密度行列によるシミュレーション (小さい系のノイズ付き厳密計算用)
+
+ρ を形 (2,)*2n のテンソルとして持つ。軸 0..n-1 が行 (ket) のビット、
+n..2n-1 が列 (bra) のビットで、量子ビット q はそれぞれ軸 n-1-q, 2n-1-q。
+
+- ユニタリ U ρ U† : 行の軸に U、列の軸に U* をそれぞれテンソル縮約する
+- クラウス演算子 Σ K ρ K† : 同じことを各 K について行って足す
+
+4^n x 4^n の超演算子行列は作らないので、1ゲートのコストは O(4^n 2^k)。
+混合状態とチャネルの判定 is_density_matrix, is_cptp は checks.py にある。
+"""
+
+import numpy as np
+
+from .checks import is_density_matrix
+from .circuit import ParameterRef, split_measurements, to_operations
+from .gates import I, X, Z, gate_matrix
+from .noise import NoiseModel, apply_readout_error
+from .statevector import measured_values, sample_indices, to_counts
+from .unitary import _contract
+
+
+def depolarizing_kraus(p: float, num_qubits: int = 1) -> list[np.ndarray]:
+    """確率 p で恒等以外のパウリ演算子 (一様) を掛けるチャネル (noise.py と同じ定義)"""
+    paulis = {0: I, 1: X, 2: Z, 3: X @ Z}
+    kraus = []
+    for index in range(4**num_qubits):
+        K = np.eye(1, dtype=complex)
+        for b in range(num_qubits):
+            K = np.kron(paulis[(index >> (2 * b)) & 3], K)
+        weight = 1 - p if index == 0 else p / (4**num_qubits - 1)
+        kraus.append(np.sqrt(weight) * K)
+    return kraus
+
+
+def amplitude_damping_kraus(gamma: float) -> list[np.ndarray]:
+    return [
+        np.array([[1, 0], [0, np.sqrt(1 - gamma)]], dtype=complex),
+        np.array([[0, np.sqrt(gamma)], [0, 0]], dtype=complex),
+    ]
+
+
+class DensityMatrix:
+    """(2,)*2n のテンソルとして持つ密度行列"""
+
+    def __init__(self, num_qubits: int, data=None):
+        self.num_qubits = num_qubits
+        if data is None:
+            data = np.zeros((2**num_qubits,) * 2, dtype=complex)
+            data[0, 0] = 1.0
+        elif np.ndim(data) == 1:
+            # 状態ベクトルから純粋状態を作る
+            data = np.outer(data, np.conj(data))
+        self.tensor = np.asarray(data, dtype=complex).reshape((2,) * (2 * num_qubits))
+
+    def _axes(self, qubits) -> tuple[list[int], list[int]]:
+        n = self.num_qubits
+        return [n - 1 - q for q in qubits], [2 * n - 1 - q for q in qubits]
+
+    def apply_unitary(self, matrix: np.ndarray, qubits) -> "DensityMatrix":
+        rows, cols = self._axes(qubits)
+        self.tensor = _contract(_contract(self.tensor, matrix, rows), matrix.conj(), cols)
+        return self
+
+    def apply_kraus(self, kraus, qubits) -> "DensityMatrix":
+        rows, cols = self._axes(qubits)
+        out = np.zeros_like(self.tensor)
+        for K in kraus:
+            out += _contract(_contract(self.tensor, K, rows), K.conj(), cols)
+        self.tensor = out
+        return self
+
+    def evolve(self, gates, noise: NoiseModel | None = None) -> "DensityMatrix":
+        """ゲート列を順に掛ける (noise があれば trajectories と同じ位置にチャネルを入れる)"""
+        for op in gates:
+            if any(isinstance(p, ParameterRef) for p in op.params):
+                raise ValueError(f"未束縛のパラメータがあります: {op.name}")
+            self.apply_unitary(gate_matrix(op.name, op.params), op.qubits)
+            if noise is None:
+                continue
+            p = noise.depolarizing if len(op.qubits) == 1 else noise.depolarizing_2q
+            if p > 0:
+                self.apply_kraus(depolarizing_kraus(p, len(op.qubits)), op.qubits)
+            if noise.amplitude_damping > 0:
+                for q in op.qubits:
+                    self.apply_kraus(amplitude_damping_kraus(noise.amplitude_damping), (q,))
+        return self
+
+    def to_matrix(self) -> np.ndarray:
+        return self.tensor.reshape((2**self.num_qubits,) * 2)
+
+    def probabilities(self) -> np.ndarray:
+        return np.diagonal(self.to_matrix()).real.copy()
+
+    def trace(self) -> float:
+        return float(np.trace(self.to_matrix()).real)
+
+    def purity(self) -> float:
+        """Tr ρ^2 (ρ はエルミートなので Σ |ρ_ij|^2)"""
+        return float(np.vdot(self.tensor, self.tensor).real)
+
+    def partial_trace(self, keep) -> "DensityMatrix":
+        """keep 以外の量子ビットをトレースアウトした密度行列 (keep の順に量子ビット 0, 1, ...)"""
+        n = self.num_qubits
+        keep = list(keep)
+        traced = [q for q in range(n) if q not in keep]
+        # einsum の添字: 行の軸 n-1-q と列の軸 2n-1-q に、トレースする量子ビットは同じ文字を使う
+        letters = iter("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        row = {q: next(letters) for q in range(n)}
+        col = {q: row[q] if q in traced else next(letters) for q in range(n)}
+        subscripts = "".join(row[q] for q in reversed(range(n))) + "".join(col[q] for q in reversed(range(n)))
+        out = "".join(row[q] for q in reversed(keep)) + "".join(col[q] for q in reversed(keep))
+        reduced = np.einsum(f"{subscripts}->{out}", self.tensor)
+        return DensityMatrix(len(keep), reduced.reshape((2 ** len(keep),) * 2))
+
+    def fidelity(self, other) -> float:
+        """状態ベクトル ψ なら <ψ|ρ|ψ>、密度行列 σ なら (Tr √(√ρ σ √ρ))^2"""
+        rho = self.to_matrix()
+        if isinstance(other, DensityMatrix):
+            sigma = other.to_matrix()
+        elif np.ndim(other) == 1:
+            return float(np.vdot(other, rho @ other).real)
+        else:
+            sigma = np.asarray(other)
+        w, v = np.linalg.eigh(rho)
+        sqrt_rho = (v * np.sqrt(np.clip(w, 0, None))) @ v.conj().T
+        eig = np.linalg.eigvalsh(sqrt_rho @ sigma @ sqrt_rho)
+        return float(np.sum(np.sqrt(np.clip(eig, 0, None))) ** 2)
+
+    def is_valid(self, atol: float = 1e-8) -> bool:
+        return is_density_matrix(self.to_matrix(), atol)
+
+
+def run_density_matrix(circuit, noise: NoiseModel | None = None) -> DensityMatrix:
+    """回路を |0...0><0...0| から実行した密度行列を返す (末尾の測定は無視)"""
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    return DensityMatrix(num_qubits).evolve(gates, noise)
+
+
+def _counts_density_matrix(num_qubits, gates, measured, num_bits, shots, seed, noise=None):
+    rng = np.random.default_rng(seed)
+    probs = DensityMatrix(num_qubits).evolve(gates, noise).probabilities()
+    values = measured_values(sample_indices(np.clip(probs, 0, None), shots, rng), measured)
+    if noise is not None:
+        values = apply_readout_error(values, num_bits, noise.readout_error, rng)
+    return to_counts(values, num_bits)
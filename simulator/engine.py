@@ -0,0 +1,109 @@
+# coding: utf-8
+"""回路を実行して測定回数を返す窓口
+
+method="automatic" では、Clifford ゲートだけの回路はスタビライザー形式で、
+T などの非 Clifford ゲートを含む回路は密な状態ベクトルで実行する。
+エンタングルメントの小さい大規模回路には method="matrix_product_state" を、
+メモリに載らない状態ベクトルには method="memmap" (ディスク上の振幅) を、
+大きな状態ベクトルを全コアで更新するには method="parallel" を、
+ノイズ付きの実行には method="trajectories" (noise=NoiseModel(...)) を、
+小さい系のノイズ付きの厳密な分布には method="density_matrix" を使う。
+"""
+
+from .cache import operations_key
+from .circuit import num_clbits, split_measurements, to_operations
+from .density import _counts_density_matrix
+from .gates import gate_matrix
+from .memmap import MemmapStatevector
+from .mps import MatrixProductState
+from .noise import _counts_trajectories
+from .parallel import ParallelStatevector
+from .stabilizer import StabilizerState, is_clifford_circuit, packed_counts, remap_packed
+from .statevector import (
+    evolve, measured_values, probabilities, sample_indices, to_counts, zero_state,
+)
+
+
+def _packed_to_counts(packed, num_qubits, measured, num_bits):
+    # measure_all のように恒等的な対応なら並べ替えは不要
+    identity = len(measured) == num_bits == num_qubits and all(c == q for c, q in measured.items())
+    if measured and not identity:
+        packed = remap_packed(packed, measured, num_bits)
+    return packed_counts(packed, num_bits)
+
+
+def _counts_statevector(num_qubits, gates, measured, num_bits, shots, seed, cache=None):
+    if cache is None:
+        probs = probabilities(evolve(zero_state(num_qubits), gates))
+    else:
+        # 同じゲート列の確率ベクトルが StateCache にあればサンプリングだけで済む
+        key = operations_key(num_qubits, gates)
+        probs = cache.get(key)
+        if probs is None:
+            probs = cache.put(key, probabilities(evolve(zero_state(num_qubits), gates)))
+    values = measured_values(sample_indices(probs, shots, seed), measured)
+    return to_counts(values, num_bits)
+
+
+def _counts_stabilizer(num_qubits, gates, measured, num_bits, shots, seed):
+    state = StabilizerState(num_qubits)
+    for op in gates:
+        state.apply(op.name, op.qubits)
+    return _packed_to_counts(state.sample_packed(shots, seed), num_qubits, measured, num_bits)
+
+
+def _counts_mps(num_qubits, gates, measured, num_bits, shots, seed, max_bond=64, threshold=1e-12):
+    state = MatrixProductState(num_qubits, max_bond, threshold)
+    for op in gates:
+        state.apply(gate_matrix(op.name, op.params), op.qubits)
+    return _packed_to_counts(state.sample_packed(shots, seed), num_qubits, measured, num_bits)
+
+
+def _counts_memmap(num_qubits, gates, measured, num_bits, shots, seed, path=None, chunk_qubits=24,
+                   directory=None):
+    with MemmapStatevector(num_qubits, path, chunk_qubits, directory) as state:
+        for op in gates:
+            state.apply(gate_matrix(op.name, op.params), op.qubits)
+        values = measured_values(state.sample_indices(shots, seed), measured)
+    return to_counts(values, num_bits)
+
+
+def _counts_parallel(num_qubits, gates, measured, num_bits, shots, seed, processes=None):
+    with ParallelStatevector(num_qubits, processes) as state:
+        for op in gates:
+            state.apply(op)
+        values = measured_values(state.sample_indices(shots, seed), measured)
+    return to_counts(values, num_bits)
+
+
+METHODS = {
+    "statevector": _counts_statevector,
+    "stabilizer": _counts_stabilizer,
+    "matrix_product_state": _counts_mps,
+    "memmap": _counts_memmap,
+    "parallel": _counts_parallel,
+    "trajectories": _counts_trajectories,
+    "density_matrix": _counts_density_matrix,
+}
+
+
+def select_method(ops) -> str:
+    return "stabilizer" if is_clifford_circuit(ops) else "statevector"
+
+
+def run_counts(circuit, shots: int = 1024, method: str = "automatic", seed=None,
+               **options) -> dict[str, int]:
+    """回路を実行し {'ビット列': 回数} を返す
+
+    測定のない回路は全量子ビットを測定したものとして扱う。
+    options は各方式に渡す (MPS の max_bond, threshold、状態ベクトルの
+    cache (StateCache)、memmap の path, directory など)。
+    """
+    num_qubits, ops = to_operations(circuit)
+    if method == "automatic":
+        method = select_method(ops)
+    if method not in METHODS:
+        raise ValueError(f"未知のシミュレーション方式です: {method}")
+    gates, measured = split_measurements(ops)
+    num_bits = num_clbits(circuit, measured) if measured else num_qubits
+    return METHODS[method](num_qubits, gates, measured, num_bits, shots, seed, **options)
@@ -0,0 +1,215 @@
+# coding: utf-8
+"""e^{-iHt}|ψ> の時間発展をクリロフ部分空間 (ランチョス法) で計算する
+
+2^n x 2^n の expm は 14 量子ビットあたりが限界なので、H は行列を作らずに
+H|v> だけを使う (PauliSum、IsingHamiltonian、scipy の疎行列、密行列、関数のどれでもよい)。
+
+1ステップでは m 次元のクリロフ基底 V と三重対角行列 T を作り、
+
+    e^{-iHΔt}|v> ≈ ‖v‖ V e^{-iTΔt} e_1
+
+とする。誤差の目安 ‖v‖ β_m |[e^{-iTΔt} e_1]_m| は同じ基底のまま Δt を変えて
+計算できるので、許容誤差に収まる最大の Δt を基底1つから選ぶ (適応刻み)。
+出力したい時刻の列を渡すと、状態か観測量の時系列を一度に返す。
+
+比較用に、マックスカットのイジング模型 + 横磁場の時間発展を
+rzz と rx の回路に分解するトロッター分解 (1次, 2次) も用意する。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .circuit import Operation
+from .statevector import evolve
+
+
+class IsingHamiltonian:
+    """H = diag(E(z)) + field Σ_q X_q を行列なしで扱う
+
+    edges (u, v, w) を持つものは maxcut から作ったもので、トロッター回路にできる。
+    """
+
+    def __init__(self, num_qubits: int, diagonal: np.ndarray, field: float = 0.0, edges=None,
+                 offset: float = 0.0):
+        self.num_qubits = num_qubits
+        self.diagonal = np.asarray(diagonal, dtype=float)
+        self.field = field
+        self.edges = edges
+        self.offset = offset   # diagonal = offset + Σ (w/2) Z_u Z_v の定数部分
+
+    @classmethod
+    def maxcut(cls, num_nodes: int, u, v, w, field: float = 0.0) -> "IsingHamiltonian":
+        """algorithms/maxcut.py の build_maxcut_hamiltonian と同じ H = -Σ w (1 - s_u s_v) / 2 (= -カット値)"""
+        u, v, w = np.asarray(u), np.asarray(v), np.asarray(w, dtype=float)
+        index = np.arange(2**num_nodes, dtype=np.int64)
+        diagonal = np.zeros(index.size)
+        for a, b, weight in zip(u, v, w):
+            diagonal -= weight * (((index >> a) ^ (index >> b)) & 1)
+        return cls(num_nodes, diagonal, field, (u, v, w), -w.sum() / 2)
+
+    def apply(self, state: np.ndarray) -> np.ndarray:
+        out = self.diagonal * state
+        if self.field:
+            for q in range(self.num_qubits):
+                # X_q はビット q の 0 と 1 の振幅の入れ替え
+                out += self.field * state.reshape(-1, 2, 2**q)[:, ::-1, :].reshape(-1)
+        return out
+
+    def expectation(self, state: np.ndarray) -> float:
+        return float(np.vdot(state, self.apply(state)).real)
+
+
+def _matvec(hamiltonian):
+    if hasattr(hamiltonian, "apply"):
+        return hamiltonian.apply
+    if callable(hamiltonian):
+        return hamiltonian
+    return lambda v: hamiltonian @ v
+
+
+def _observable(observable):
+    """観測量を 状態 -> 期待値 の関数にする"""
+    if hasattr(observable, "expectation"):
+        return observable.expectation
+    if callable(observable):
+        return observable
+    matrix = np.asarray(observable)
+    if matrix.ndim == 1:
+        # 計算基底で対角な観測量
+        return lambda psi: float(np.dot(np.abs(psi) ** 2, matrix.real))
+    return lambda psi: float(np.vdot(psi, matrix @ psi).real)
+
+
+def _lanczos(matvec, v: np.ndarray, m: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """m 次元のクリロフ基底 (k, N)、三重対角の対角 α (k)・副対角 β (k) を作る
+
+    β[k-1] は次の基底ベクトルへの係数で、0 なら部分空間が閉じている (誤差 0)。
+    基底は数十本なので、丸め誤差に強いように毎回すべての基底に対して直交化する。
+    """
+    norm = np.linalg.norm(v)
+    basis = np.empty((m, v.size), dtype=complex)
+    basis[0] = v / norm
+    alpha, beta = np.zeros(m), np.zeros(m)
+    for j in range(m):
+        w = matvec(basis[j])
+        alpha[j] = np.vdot(basis[j], w).real
+        w = w - basis[:j + 1].T @ (basis[:j + 1].conj() @ w)
+        beta[j] = np.linalg.norm(w)
+        if beta[j] < 1e-12 * max(abs(alpha[j]), 1.0):
+            beta[j] = 0.0
+            return basis[:j + 1], alpha[:j + 1], beta[:j + 1], norm
+        if j + 1 < m:
+            basis[j + 1] = w / beta[j]
+    return basis, alpha, beta, norm
+
+
+def _small_propagator(alpha: np.ndarray, beta: np.ndarray):
+    """Δt -> e^{-iTΔt} e_1 (T は三重対角) を返す"""
+    T = np.diag(alpha) + np.diag(beta[:-1], 1) + np.diag(beta[:-1], -1)
+    values, vectors = np.linalg.eigh(T)
+    first = vectors[0]
+    return lambda dt: vectors @ (np.exp(-1j * values * dt) * first)
+
+
+class Evolution(NamedTuple):
+    """時間発展の結果"""
+    times: np.ndarray
+    states: np.ndarray | None        # (len(times), 2^n)。store_states=False なら None
+    observables: np.ndarray | None   # (len(times), 観測量の数)
+    steps: int                       # クリロフ基底を作った回数
+
+
+def krylov_evolve(hamiltonian, state, times, observables=(), tol: float = 1e-8,
+                  krylov_dim: int = 20, store_states: bool = True) -> Evolution:
+    """e^{-iHt}|ψ> を times (昇順, 0 以上) の各時刻で求める
+
+    1ステップの誤差の目安を tol Δt / t_max 以下にするので、最後の時刻までの誤差は
+    おおよそ tol 以下になる。基底1つで進める Δt は、誤差が収まるまで半分にして選ぶ。
+    """
+    matvec = _matvec(hamiltonian)
+    funcs = [_observable(o) for o in observables]
+    times = np.asarray(times, dtype=float)
+    psi = np.array(state, dtype=complex)
+    states = np.empty((len(times), psi.size), dtype=complex) if store_states else None
+    values = np.empty((len(times), len(funcs))) if funcs else None
+    t, dt, steps = 0.0, None, 0
+    total = max(times[-1], 1e-300)
+    for i, target in enumerate(times):
+        while target - t > 1e-14 * max(total, 1.0):
+            basis, alpha, beta, norm = _lanczos(matvec, psi, krylov_dim)
+            steps += 1
+            propagator = _small_propagator(alpha, beta)
+            remaining = target - t
+            if beta[-1] == 0:
+                # 部分空間が閉じていれば1ステップで正確に進める
+                dt = remaining
+                coeffs = propagator(dt)
+            else:
+                # 前回の刻みの2倍から始め、誤差が収まるまで半分にする
+                dt = remaining if dt is None else min(remaining, 2 * dt)
+                while True:
+                    coeffs = propagator(dt)
+                    error = norm * beta[-1] * abs(coeffs[-1])
+                    if error <= tol * dt / total or dt < 1e-12 * total:
+                        break
+                    dt /= 2
+            psi = norm * (coeffs @ basis)
+            t += dt
+        if store_states:
+            states[i] = psi
+        if funcs:
+            values[i] = [f(psi) for f in funcs]
+    return Evolution(times, states, values, steps)
+
+
+def trotter_circuit(hamiltonian: IsingHamiltonian, time: float, steps: int,
+                    order: int = 2) -> tuple[int, list[Operation]]:
+    """e^{-iHt} (定数の位相は除く) を rzz と rx の (量子ビット数, Operation のリスト) にする
+
+    H = offset + Σ (w/2) Z_u Z_v + field Σ X なので、1ステップ Δt = t/steps は
+    rzz(w Δt) と rx(2 field Δt)。order=2 では rx を半分ずつ前後に置く (対称分解)。
+    """
+    if hamiltonian.edges is None:
+        raise ValueError("トロッター回路は IsingHamiltonian.maxcut で作ったハミルトニアンだけに対応しています")
+    u, v, w = hamiltonian.edges
+    n = hamiltonian.num_qubits
+    dt = time / steps
+    zz = [Operation("rzz", (int(a), int(b)), (float(weight * dt),)) for a, b, weight in zip(u, v, w)]
+
+    def mixer(fraction):
+        if not hamiltonian.field:
+            return []
+        return [Operation("rx", (q,), (2 * hamiltonian.field * dt * fraction,)) for q in range(n)]
+
+    ops = []
+    for _ in range(steps):
+        ops += mixer(0.5) + zz + mixer(0.5) if order == 2 else zz + mixer(1.0)
+    return n, ops
+
+
+def trotter_evolve(hamiltonian: IsingHamiltonian, state, times, steps_per_unit: float = 10,
+                   order: int = 2, observables=(), store_states: bool = True) -> Evolution:
+    """トロッター回路で times の各時刻の状態を求める (krylov_evolve と比べる用)
+
+    時刻の区間ごとに ceil(区間の長さ × steps_per_unit) ステップの回路を実行し、
+    回路で落とした定数 offset の位相 e^{-i offset t} を掛けて戻す。
+    """
+    funcs = [_observable(o) for o in observables]
+    times = np.asarray(times, dtype=float)
+    psi = np.array(state, dtype=complex)
+    states = np.empty((len(times), psi.size), dtype=complex) if store_states else None
+    values = np.empty((len(times), len(funcs))) if funcs else None
+    t, total_steps = 0.0, 0
+    for i, target in enumerate(times):
+        if target > t:
+            steps = int(np.ceil((target - t) * steps_per_unit))
+            _, ops = trotter_circuit(hamiltonian, target - t, steps, order)
+            psi = evolve(psi, ops) * np.exp(-1j * hamiltonian.offset * (target - t))
+            total_steps += steps
+            t = target
+        if store_states:
+            states[i] = psi
+        if funcs:
+            values[i] = [f(psi) for f in funcs]
+    return Evolution(times, states, values, total_steps)
@@ -0,0 +1,120 @@
+# coding: utf-8
+"""ゲート行列の定義
+
+行列のインデックスは Qiskit と同じリトルエンディアン
+(qubits[0] が最下位ビット) で並べる。
+"""
+
+import numpy as np
+
+SQRT2_INV = 1 / np.sqrt(2)
+
+I = np.eye(2, dtype=complex)
+X = np.array([[0, 1], [1, 0]], dtype=complex)
+Y = np.array([[0, -1j], [1j, 0]], dtype=complex)
+Z = np.array([[1, 0], [0, -1]], dtype=complex)
+H = SQRT2_INV * np.array([[1, 1], [1, -1]], dtype=complex)
+S = np.array([[1, 0], [0, 1j]], dtype=complex)
+SDG = S.conj().T
+T = np.array([[1, 0], [0, (1 + 1j) * SQRT2_INV]], dtype=complex)
+TDG = T.conj().T
+SX = 0.5 * np.array([[1 + 1j, 1 - 1j], [1 - 1j, 1 + 1j]], dtype=complex)
+SXDG = SX.conj().T
+
+FIXED_1Q = {
+    "id": I, "x": X, "y": Y, "z": Z, "h": H,
+    "s": S, "sdg": SDG, "t": T, "tdg": TDG, "sx": SX, "sxdg": SXDG,
+}
+
+# Clifford ゲート (スタビライザー形式で扱えるもの)
+CLIFFORD_GATES = frozenset({
+    "id", "x", "y", "z", "h", "s", "sdg", "sx", "sxdg",
+    "cx", "cy", "cz", "swap", "global_phase",
+})
+
+
+def rx(theta: float) -> np.ndarray:
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array([[c, -1j * s], [-1j * s, c]], dtype=complex)
+
+
+def ry(theta: float) -> np.ndarray:
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array([[c, -s], [s, c]], dtype=complex)
+
+
+def rz(theta: float) -> np.ndarray:
+    return np.array([[np.exp(-0.5j * theta), 0], [0, np.exp(0.5j * theta)]])
+
+
+def phase(lam: float) -> np.ndarray:
+    return np.array([[1, 0], [0, np.exp(1j * lam)]])
+
+
+def global_phase(phi: float) -> np.ndarray:
+    """回路全体の位相 e^{iφ} (1 つの量子ビットに掛ける)"""
+    return np.exp(1j * phi) * I
+
+
+def u(theta: float, phi: float, lam: float) -> np.ndarray:
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array([
+        [c, -np.exp(1j * lam) * s],
+        [np.exp(1j * phi) * s, np.exp(1j * (phi + lam)) * c],
+    ])
+
+
+def controlled(U: np.ndarray) -> np.ndarray:
+    """制御ゲート行列を作る (qubits[0] が制御ビット)"""
+    k = U.shape[0]
+    M = np.eye(2 * k, dtype=complex)
+    # 制御ビット(最下位ビット)が1のインデックス: 1, 3, 5, ...
+    M[1::2, 1::2] = U
+    return M
+
+
+SWAP = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]], dtype=complex)
+
+PARAMETRIC_1Q = {
+    "rx": rx, "ry": ry, "rz": rz, "p": phase, "u1": phase, "u": u, "u3": u, "global_phase": global_phase,
+}
+
+
+def rzz(theta: float) -> np.ndarray:
+    d = np.exp(-0.5j * theta * np.array([1, -1, -1, 1]))
+    return np.diag(d)
+
+
+# gate_matrix が名前だけで扱えるゲート
+NAMED_GATES = frozenset(FIXED_1Q) | frozenset(PARAMETRIC_1Q) | frozenset({
+    "cx", "cy", "cz", "ch", "cp", "cu1", "crx", "cry", "crz", "swap", "rzz", "ccx", "unitary",
+})
+
+
+def gate_matrix(name: str, params=()) -> np.ndarray:
+    """ゲート名とパラメータから行列を返す"""
+    if name in FIXED_1Q:
+        return FIXED_1Q[name]
+    if name in PARAMETRIC_1Q:
+        return PARAMETRIC_1Q[name](*[float(p) for p in params])
+    if name == "cx":
+        return controlled(X)
+    if name == "cy":
+        return controlled(Y)
+    if name == "cz":
+        return controlled(Z)
+    if name == "ch":
+        return controlled(H)
+    if name in ("cp", "cu1"):
+        return controlled(phase(float(params[0])))
+    if name in ("crx", "cry", "crz"):
+        return controlled(PARAMETRIC_1Q[name[1:]](float(params[0])))
+    if name == "swap":
+        return SWAP
+    if name == "rzz":
+        return rzz(float(params[0]))
+    if name == "ccx":
+        return controlled(controlled(X))
+    if name == "unitary":
+        return np.asarray(params[0], dtype=complex)
+    raise ValueError(f"未対応のゲートです: {name}")
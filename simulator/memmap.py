@@ -0,0 +1,143 @@
+# coding: utf-8
+"""ディスク上の状態ベクトル (np.memmap) によるシミュレーション
+
+2^34 個の complex128 振幅 (256 GiB) はメモリに載らないので、
+振幅をファイルに置き、2^chunk_qubits 個ずつのチャンクに分けて処理する。
+
+- チャンク内に収まる下位ビットへのゲートは、チャンクごとに読み書きする。
+- 上位ビット (チャンクをまたぐビット) に掛かるゲートは、先にその量子ビットを
+  下位ビットと入れ替える並べ替えパスを行ってから適用する。
+  入れ替えは論理量子ビット→物理ビットの対応 (layout) に記録し、元には戻さない。
+- ファイルの置き場所 : path か directory で指定する。省略時はカレントディレクトリで、
+  /tmp (tmpfs のことがある) には置かない。
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from .circuit import split_measurements, to_operations
+from .gates import gate_matrix
+from .statevector import apply_matrix, permute_index_bits, to_counts
+
+
+class MemmapStatevector:
+    """ファイルに置いた状態ベクトル
+
+    path を指定すればそのファイルを使う (close では消さない)。
+    省略すると directory (省略時はカレントディレクトリ) に一時ファイルを作り、close で消す。
+    tempfile の既定の置き場所 (/tmp) は tmpfs (メモリ) のことがあり、
+    メモリに載らない振幅を置くという目的に合わないので使わない。
+    """
+
+    def __init__(self, num_qubits: int, path: str | None = None, chunk_qubits: int = 24,
+                 directory: str | None = None):
+        self.num_qubits = num_qubits
+        self.chunk_qubits = min(chunk_qubits, num_qubits)
+        self.chunk_size = 2**self.chunk_qubits
+        self.num_chunks = 2 ** (num_qubits - self.chunk_qubits)
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".amp", dir=os.getcwd() if directory is None else directory)
+            os.close(fd)
+        self.path = path
+        # w+ で作ったファイルは 0 で埋まっている (疎ファイルになる)
+        self.amplitudes = np.memmap(path, dtype=np.complex128, mode="w+", shape=(2**num_qubits,))
+        self.amplitudes[0] = 1.0
+        # layout[論理量子ビット] = 物理ビット位置
+        self.layout = list(range(num_qubits))
+
+    def close(self) -> None:
+        """振幅をファイルに書き出して閉じる (2回目以降は何もしない)"""
+        if self.amplitudes is None:
+            return
+        self.amplitudes.flush()
+        self.amplitudes = None
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _chunk(self, index: int) -> slice:
+        return slice(index * self.chunk_size, (index + 1) * self.chunk_size)
+
+    def _swap_physical(self, high: int, low: int) -> None:
+        """物理ビット high (チャンク番号側) と low (チャンク内) を入れ替える"""
+        step = 1 << (high - self.chunk_qubits)
+        for a in range(self.num_chunks):
+            if a & step:
+                continue
+            b = a | step
+            A = np.array(self.amplitudes[self._chunk(a)]).reshape(-1, 2, 2**low)
+            B = np.array(self.amplitudes[self._chunk(b)]).reshape(-1, 2, 2**low)
+            # A のうち low=1 の振幅と、B のうち low=0 の振幅を交換する
+            A[:, 1, :], B[:, 0, :] = B[:, 0, :].copy(), A[:, 1, :].copy()
+            self.amplitudes[self._chunk(a)] = A.reshape(-1)
+            self.amplitudes[self._chunk(b)] = B.reshape(-1)
+        la, lb = self.layout.index(high), self.layout.index(low)
+        self.layout[la], self.layout[lb] = low, high
+
+    def apply(self, matrix: np.ndarray, qubits) -> None:
+        """論理量子ビット qubits にゲートを作用させる"""
+        if len(qubits) > self.chunk_qubits:
+            raise ValueError(f"{len(qubits)} 量子ビットのゲートには chunk_qubits={self.chunk_qubits} では足りません")
+        physical = [self.layout[q] for q in qubits]
+        for i, p in enumerate(physical):
+            if p < self.chunk_qubits:
+                continue
+            # ゲートが使っていない下位ビットのうち、最も上のものと入れ替える
+            low = max(b for b in range(self.chunk_qubits) if b not in physical)
+            self._swap_physical(p, low)
+            physical[i] = low
+        for c in range(self.num_chunks):
+            block = np.array(self.amplitudes[self._chunk(c)])
+            self.amplitudes[self._chunk(c)] = apply_matrix(block, matrix, physical)
+
+    def evolve(self, circuit) -> "MemmapStatevector":
+        num_qubits, ops = to_operations(circuit)
+        gates, _ = split_measurements(ops)
+        for op in gates:
+            self.apply(gate_matrix(op.name, op.params), op.qubits)
+        return self
+
+    def to_logical(self, physical_indices: np.ndarray) -> np.ndarray:
+        """物理インデックスを論理量子ビット順のインデックスに直す"""
+        return permute_index_bits(physical_indices, self.layout)
+
+    def iter_probabilities(self):
+        """(チャンク番号, 確率) をチャンクごとに返す (物理インデックス順)"""
+        for c in range(self.num_chunks):
+            yield c, np.abs(np.asarray(self.amplitudes[self._chunk(c)])) ** 2
+
+    def sample_indices(self, shots: int, seed=None) -> np.ndarray:
+        """全体を読み込まずに、2パスで基底インデックスをサンプリングする"""
+        if shots == 0:
+            return np.zeros(0, dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        totals = np.array([p.sum() for _, p in self.iter_probabilities()])
+        per_chunk = rng.multinomial(shots, totals / totals.sum())
+        samples = []
+        for c, probs in self.iter_probabilities():
+            if per_chunk[c] == 0:
+                continue
+            counts = rng.multinomial(per_chunk[c], probs / probs.sum())
+            local = np.repeat(np.arange(self.chunk_size, dtype=np.int64), counts)
+            samples.append(self.to_logical(local + c * self.chunk_size))
+        indices = np.concatenate(samples)
+        rng.shuffle(indices)
+        return indices
+
+    def sample_counts(self, shots: int, seed=None) -> dict[str, int]:
+        return to_counts(self.sample_indices(shots, seed), self.num_qubits)
+
+    def to_array(self) -> np.ndarray:
+        """論理順の状態ベクトルをメモリ上に作る (小さい系の確認用)"""
+        state = np.empty(2**self.num_qubits, dtype=complex)
+        physical = np.arange(state.size, dtype=np.int64)
+        state[self.to_logical(physical)] = self.amplitudes
+        return state
@@ -0,0 +1,170 @@
+# coding: utf-8
+"""測定結果の分布どうしを比べる指標 (多数の実験をまとめて計算する)
+
+カウントの辞書 ({'11': 492, '00': 532} や {整数: 回数})、PackedBits / ShotRecord、
+確率ベクトル (Statevector.probabilities() など) を、すべての実験に現れた
+測定値の和集合をそろえた (実験数 E, 測定値の数 K) の行列にする。
+2^n の長さの密なベクトルは作らないので、多量子ビットでも出現した値の数で済む。
+
+指標は (E, K) の行列の行ごとに一度に計算する。
+
+- total_variation : (1/2) Σ |p - q|
+- classical_fidelity : (Σ √(p q))^2 (qiskit の hellinger_fidelity と同じ)
+- hellinger_distance : √(1 - Σ √(p q))
+- kl_divergence : Σ p log(p / q)
+- heavy_output_probability : 理想分布の中央値より確率の高い測定値が出た割合
+
+bootstrap は各実験のカウントを多項分布で一度に (R, E, K) 個ずつ引き直して信頼区間を作る。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .stabilizer import WORD
+
+
+def _as_experiments(source) -> list[dict[int, float]]:
+    """1つの入力を [{整数の測定値: 回数 (または確率)}, ...] にする"""
+    if hasattr(source, "words") and hasattr(source, "shape") and source.shape:
+        # パラメータ値の配列を持つ PackedBits は、値ごとに別の実験として扱う
+        return [source.get_int_counts(loc) for loc in np.ndindex(source.shape)]
+    if hasattr(source, "get_int_counts"):
+        return [source.get_int_counts()]
+    if isinstance(source, dict):
+        return [{
+            (int(k.replace(" ", ""), 2) if isinstance(k, str) else int(k)): v
+            for k, v in source.items()
+        }]
+    array = np.asarray(source, dtype=float)
+    if array.ndim == 1:
+        array = array[None]
+    experiments = []
+    for row in array.reshape(-1, array.shape[-1]):
+        support = np.flatnonzero(row)
+        experiments.append(dict(zip(support.tolist(), row[support].tolist())))
+    return experiments
+
+
+def _flatten(group) -> list[dict[int, float]]:
+    if isinstance(group, (list, tuple)):
+        return [e for source in group for e in _as_experiments(source)]
+    return _as_experiments(group)
+
+
+def align(*groups) -> tuple[np.ndarray, list[np.ndarray]]:
+    """入力のグループを、共通の測定値の並び keys にそろえた (E, K) の行列にする
+
+    各グループは1つの結果か結果のリスト。keys は昇順の整数 (64 ビットを超える
+    レジスタでは Python の int の object 配列) で、行列は正規化せずに返す。
+    """
+    experiments = [_flatten(group) for group in groups]
+    keys = sorted(set().union(*(e.keys() for group in experiments for e in group)))
+    position = {k: i for i, k in enumerate(keys)}
+    matrices = []
+    for group in experiments:
+        matrix = np.zeros((len(group), len(keys)))
+        for row, e in enumerate(group):
+            matrix[row, [position[k] for k in e]] = list(e.values())
+        matrices.append(matrix)
+    wide = keys and keys[-1] >= 1 << (WORD - 1)
+    return np.array(keys, dtype=object if wide else np.int64), matrices
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    totals = matrix.sum(axis=-1, keepdims=True)
+    return matrix / np.where(totals == 0, 1, totals)
+
+
+def total_variation(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    return 0.5 * np.abs(p - q).sum(axis=-1)
+
+
+def classical_fidelity(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    return np.sqrt(p * q).sum(axis=-1) ** 2
+
+
+def hellinger_distance(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.clip(1 - np.sqrt(p * q).sum(axis=-1), 0, None))
+
+
+def kl_divergence(p: np.ndarray, q: np.ndarray, eps: float = 1e-12) -> np.ndarray:
+    """D(p || q)。q が 0 の測定値は eps に置き換える (p = 0 の項は 0)"""
+    ratio = np.where(p > 0, p / np.maximum(q, eps), 1.0)
+    return np.sum(p * np.log(ratio), axis=-1)
+
+
+def _median_with_zeros(ideal: np.ndarray, num_outcomes: int) -> np.ndarray:
+    """(E, K) の確率に、出てこなかった num_outcomes - K 個の 0 を加えた中央値"""
+    values = np.sort(ideal, axis=-1)
+    zeros = num_outcomes - ideal.shape[-1]
+    middle = [(num_outcomes - 1) // 2, num_outcomes // 2]
+    picked = [values[:, i - zeros] if i >= zeros else np.zeros(len(values)) for i in middle]
+    return (picked[0] + picked[1]) / 2
+
+
+def heavy_output_probability(p: np.ndarray, ideal: np.ndarray, num_outcomes: int) -> np.ndarray:
+    """理想分布 ideal の中央値より確率の高い測定値が p で出た割合
+
+    num_outcomes は測定値の総数 (2^ビット数)。そろえた行列にない測定値の理想確率は 0。
+    """
+    median = _median_with_zeros(ideal, num_outcomes)
+    return np.sum(np.where(ideal > median[:, None], p, 0.0), axis=-1)
+
+
+METRICS = {
+    "total_variation": total_variation,
+    "classical_fidelity": classical_fidelity,
+    "hellinger_distance": hellinger_distance,
+    "kl_divergence": kl_divergence,
+}
+
+
+class DistributionMetrics(NamedTuple):
+    """compare の結果 (各要素は長さ E の配列)"""
+    total_variation: np.ndarray
+    classical_fidelity: np.ndarray
+    hellinger_distance: np.ndarray
+    kl_divergence: np.ndarray
+    heavy_output_probability: np.ndarray | None
+
+
+def compare(results, ideal, num_bits: int | None = None) -> DistributionMetrics:
+    """実験結果のリストと理想分布 (1つなら全実験で共通) を比べる
+
+    num_bits を渡すと heavy_output_probability も計算する。
+    """
+    _, (counts, reference) = align(results, ideal)
+    p = normalize(counts)
+    q = np.broadcast_to(normalize(reference), p.shape)
+    heavy = None if num_bits is None else heavy_output_probability(p, q, 2**num_bits)
+    return DistributionMetrics(
+        total_variation(p, q), classical_fidelity(p, q), hellinger_distance(p, q),
+        kl_divergence(p, q), heavy,
+    )
+
+
+def bootstrap(counts: np.ndarray, ideal: np.ndarray, metric="total_variation",
+              resamples: int = 1000, confidence: float = 0.95, seed=None,
+              max_bytes: int = 1 << 26) -> tuple[np.ndarray, np.ndarray]:
+    """(E, K) のカウントを引き直して、metric(p, ideal) の信頼区間 (下限, 上限) を返す
+
+    実験 e のショット数 N_e と経験分布 p_e から多項分布で (R, E, K) をまとめて引く。
+    メモリが max_bytes を超えないように R をバッチに分ける。
+    metric は METRICS の名前か、(p, q) -> (..., E) の関数。
+    """
+    rng = np.random.default_rng(seed)
+    metric = METRICS[metric] if isinstance(metric, str) else metric
+    counts = np.asarray(counts)
+    shots = counts.sum(axis=-1).astype(np.int64)
+    p = normalize(counts)
+    q = np.broadcast_to(normalize(np.asarray(ideal, dtype=float)), p.shape)
+    per_batch = max(1, max_bytes // (8 * p.size))
+    values = []
+    for start in range(0, resamples, per_batch):
+        size = min(per_batch, resamples - start)
+        draws = rng.multinomial(shots, p, size=(size,) + shots.shape)
+        values.append(metric(draws / np.maximum(shots, 1)[:, None], q))
+    values = np.concatenate(values)
+    tail = (1 - confidence) / 2
+    return np.quantile(values, tail, axis=0), np.quantile(values, 1 - tail, axis=0)
@@ -0,0 +1,160 @@
+# coding: utf-8
+"""行列積状態 (MPS) によるシミュレーション
+
+量子ビット q をサイト q のテンソル A[q] (形 (χ_左, 2, χ_右)) で表す。
+エンタングルメントが小さい回路なら、ボンド次元 χ を抑えたまま
+30 量子ビットを超える系も扱える。
+
+2量子ビットゲートの後は SVD で分解し、
+- ボンド次元が max_bond を超える分
+- 捨てる特異値の二乗和が threshold 以下になる分
+を切り捨てる。捨てた重みの合計は truncation_error に、
+(1 - 捨てた重み) の積は厳密な状態との忠実度の目安として fidelity_estimate に記録する。
+"""
+
+import numpy as np
+
+from .circuit import split_measurements, to_operations
+from .gates import SWAP, gate_matrix
+from .stabilizer import WORD
+
+
+class MatrixProductState:
+    """サイトごとのテンソル列で表した純粋状態"""
+
+    def __init__(self, num_qubits: int, max_bond: int = 64, threshold: float = 1e-12):
+        self.num_qubits = num_qubits
+        self.max_bond = max_bond
+        self.threshold = threshold
+        zero = np.array([1, 0], dtype=complex).reshape(1, 2, 1)
+        self.tensors = [zero.copy() for _ in range(num_qubits)]
+        # 直交中心 (これより左は左正準、右は右正準)
+        self.center = 0
+        self.truncation_error = 0.0
+        self.fidelity_estimate = 1.0
+
+    @property
+    def bond_dimensions(self) -> list[int]:
+        return [A.shape[2] for A in self.tensors[:-1]]
+
+    def _move_center(self, site: int) -> None:
+        """QR 分解で直交中心を site まで動かす"""
+        A = self.tensors
+        while self.center < site:
+            c = self.center
+            left, _, right = A[c].shape
+            Q, R = np.linalg.qr(A[c].reshape(left * 2, right))
+            A[c] = Q.reshape(left, 2, -1)
+            A[c + 1] = np.einsum("ab,bsc->asc", R, A[c + 1])
+            self.center += 1
+        while self.center > site:
+            c = self.center
+            left, _, right = A[c].shape
+            Q, R = np.linalg.qr(A[c].reshape(left, 2 * right).T)
+            A[c] = Q.T.reshape(-1, 2, right)
+            A[c - 1] = np.einsum("asb,bc->asc", A[c - 1], R.T)
+            self.center -= 1
+
+    def apply_1q(self, U: np.ndarray, q: int) -> None:
+        # ユニタリを1サイトに掛けても正準形は崩れない
+        self.tensors[q] = np.einsum("ts,asb->atb", U, self.tensors[q])
+
+    def _apply_adjacent(self, U: np.ndarray, q0: int, q1: int) -> None:
+        """隣り合うサイトに2量子ビットゲートを掛けて SVD で分け直す"""
+        i = min(q0, q1)
+        self._move_center(i)
+        A = self.tensors
+        theta = np.einsum("asb,btc->astc", A[i], A[i + 1])
+        # 行列のインデックスは (出力 q1, 出力 q0, 入力 q1, 入力 q0)
+        G = U.reshape(2, 2, 2, 2)
+        if q0 == i:
+            theta = np.einsum("TSts,astc->aSTc", G, theta)
+        else:
+            theta = np.einsum("STst,astc->aSTc", G, theta)
+
+        left, _, _, right = theta.shape
+        W, s, Vh = np.linalg.svd(theta.reshape(left * 2, 2 * right), full_matrices=False)
+        weights = s**2 / np.sum(s**2)
+        # 小さい特異値から順に、捨てた重みの累積が threshold を超えない範囲で切る
+        tail = np.cumsum(weights[::-1])[::-1]
+        keep = max(1, int(np.count_nonzero(tail > self.threshold)))
+        keep = min(keep, self.max_bond)
+        discarded = float(np.sum(weights[keep:]))
+        self.truncation_error += discarded
+        self.fidelity_estimate *= 1.0 - discarded
+        s = s[:keep] / np.linalg.norm(s[:keep])
+        A[i] = W[:, :keep].reshape(left, 2, keep)
+        A[i + 1] = (s[:, None] * Vh[:keep]).reshape(keep, 2, right)
+        self.center = i + 1
+
+    def apply_2q(self, U: np.ndarray, q0: int, q1: int) -> None:
+        """2量子ビットゲート (離れたサイトは SWAP で隣まで運ぶ)"""
+        step = 1 if q1 > q0 else -1
+        path = list(range(q1, q0 + step, -step))
+        # q1 を q0 の隣まで移動させる
+        for site in path:
+            self._apply_adjacent(SWAP, site, site - step)
+        self._apply_adjacent(U, q0, q0 + step)
+        for site in reversed(path):
+            self._apply_adjacent(SWAP, site, site - step)
+
+    def apply(self, matrix: np.ndarray, qubits) -> None:
+        if len(qubits) == 1:
+            self.apply_1q(matrix, qubits[0])
+        elif len(qubits) == 2:
+            self.apply_2q(matrix, *qubits)
+        else:
+            raise ValueError("MPS では 3 量子ビット以上のゲートに対応していません")
+
+    def to_statevector(self) -> np.ndarray:
+        """密な状態ベクトルに戻す (小さい系の確認用)"""
+        psi = np.ones((1, 1), dtype=complex)
+        for A in self.tensors:
+            # psi の行: これまでのサイトのインデックス (サイト0が最上位)
+            psi = np.einsum("pa,asb->psb", psi, A).reshape(-1, A.shape[2])
+        # リトルエンディアンに合わせてビット順を反転する
+        n = self.num_qubits
+        return psi.reshape((2,) * n).transpose(range(n - 1, -1, -1)).reshape(-1)
+
+    def sample_bits(self, shots: int, seed=None) -> np.ndarray:
+        """(shots, n) の 0/1 配列を MPS から直接サンプリングする
+
+        直交中心をサイト0に置くと、右側はすべて右正準なので
+        左から順に条件付き確率を求めて1ビットずつ決められる。
+        """
+        rng = np.random.default_rng(seed)
+        self._move_center(0)
+        bits = np.empty((shots, self.num_qubits), dtype=np.uint8)
+        env = np.ones((shots, 1), dtype=complex)
+        rows = np.arange(shots)
+        for k, A in enumerate(self.tensors):
+            v = np.einsum("na,asb->nsb", env, A)
+            p = np.sum(np.abs(v) ** 2, axis=2)
+            total = p.sum(axis=1)
+            outcome = (rng.random(shots) * total < p[:, 1]).astype(np.uint8)
+            bits[:, k] = outcome
+            env = v[rows, outcome] / np.sqrt(p[rows, outcome])[:, None]
+        return bits
+
+    def sample_packed(self, shots: int, seed=None) -> np.ndarray:
+        """スタビライザー形式と同じ (shots, num_words) の uint64 形式で返す"""
+        bits = self.sample_bits(shots, seed)
+        num_words = (self.num_qubits + WORD - 1) // WORD
+        packed = np.zeros((shots, num_words), dtype=np.uint64)
+        for q in range(self.num_qubits):
+            packed[:, q // WORD] |= bits[:, q].astype(np.uint64) << np.uint64(q % WORD)
+        return packed
+
+    def sample_counts(self, shots: int, seed=None) -> dict[str, int]:
+        from .stabilizer import packed_counts
+        return packed_counts(self.sample_packed(shots, seed), self.num_qubits)
+
+
+def run_mps(circuit, max_bond: int = 64, threshold: float = 1e-12) -> MatrixProductState:
+    """回路を |0...0> から MPS で実行する (末尾の測定は無視)"""
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    state = MatrixProductState(num_qubits, max_bond, threshold)
+    for op in gates:
+        state.apply(gate_matrix(op.name, op.params), op.qubits)
+    return state
@@ -0,0 +1,149 @@
+# coding: utf-8
+"""量子軌跡 (モンテカルロ波動関数) 法によるノイズのシミュレーション
+
+密度行列 (4^n) の代わりに、T 本の状態ベクトルの軌跡 (T, 2^n) をまとめて時間発展させ、
+ノイズのクラウス演算子の枝を軌跡ごとに確率的に選ぶ。
+軌跡について平均すると密度行列による計算と同じ分布になる。
+
+- 脱分極 : 確率 p でゲートの量子ビットにランダムな (恒等以外の) パウリ演算子を掛ける。
+  枝の確率が状態によらないので、乱数だけで決まる
+- 振幅減衰 : K1 = √γ |0><1| (緩和) の確率は γ P(1) で軌跡ごとに違う。
+  選んだ枝のクラウス演算子を掛けてから正規化する
+- 読み出し誤り : 測定値のビットを確率 p(1|0), p(0|1) で反転する
+
+ノイズはゲートの後に、そのゲートの量子ビットにだけ掛ける。
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .circuit import ParameterRef, num_clbits, split_measurements, to_operations
+from .gates import gate_matrix
+from .statevector import measured_values, to_counts
+from .sweep import apply_batched
+
+
+class NoiseModel(NamedTuple):
+    depolarizing: float = 0.0        # 1量子ビットゲートの後の脱分極の確率
+    depolarizing_2q: float = 0.0     # 2量子ビット以上のゲートの後の脱分極の確率
+    amplitude_damping: float = 0.0   # ゲートの後の各量子ビットの減衰率 γ
+    readout_error: tuple = (0.0, 0.0)  # (p(1|0), p(0|1))
+
+
+def _apply_pauli(states: np.ndarray, qubit: int, x: np.ndarray, z: np.ndarray) -> None:
+    """x, z が真の軌跡にだけ X, Z を掛ける (Y は全体位相を除いて XZ)"""
+    batch = states.shape[0]
+    psi = states.reshape(batch, -1, 2, 2**qubit)
+    if z.any():
+        psi[z, :, 1, :] *= -1
+    if x.any():
+        psi[x] = psi[x][:, :, ::-1, :]
+
+
+def _depolarize(states: np.ndarray, qubits, p: float, rng) -> None:
+    batch = states.shape[0]
+    k = len(qubits)
+    hit = rng.random(batch) < p
+    if not hit.any():
+        return
+    # 4^k - 1 個の恒等以外のパウリ演算子から一様に選ぶ (2ビットずつ X, Z の有無)
+    pauli = np.where(hit, rng.integers(1, 4**k, size=batch), 0)
+    for b, q in enumerate(qubits):
+        digit = (pauli >> (2 * b)) & 3
+        _apply_pauli(states, q, (digit & 1).astype(bool), (digit & 2).astype(bool))
+
+
+def _amplitude_damp(states: np.ndarray, qubit: int, gamma: float, rng) -> None:
+    batch = states.shape[0]
+    psi = states.reshape(batch, -1, 2, 2**qubit)
+    excited = np.sum(np.abs(psi[:, :, 1, :]) ** 2, axis=(1, 2))
+    jump = rng.random(batch) < gamma * excited
+    # 緩和した (少数の) 軌跡: |1> の振幅を |0> に移す。
+    # ほかの軌跡: |1> を √(1-γ) 倍する (緩和した軌跡の |1> は 0 なので全体に掛けてよい)
+    rows = np.flatnonzero(jump)
+    psi[rows, :, 0, :] = psi[rows, :, 1, :]
+    psi[rows, :, 1, :] = 0
+    psi[:, :, 1, :] *= np.sqrt(1 - gamma)
+    # 選んだ枝の確率 (γ P(1) または 1 - γ P(1)) で正規化する (緩和の枝の √γ は約分される)
+    norm = np.where(jump, excited, 1 - gamma * excited)
+    states /= np.sqrt(norm)[:, None]
+
+
+def trajectory_states(num_qubits: int, gates, noise: NoiseModel, trajectories: int,
+                      seed=None) -> np.ndarray:
+    """|0...0> からノイズ付きで時間発展させた (T, 2^n) の軌跡"""
+    rng = np.random.default_rng(seed)
+    states = np.zeros((trajectories, 2**num_qubits), dtype=complex)
+    states[:, 0] = 1.0
+    for op in gates:
+        if any(isinstance(p, ParameterRef) for p in op.params):
+            raise ValueError(f"未束縛のパラメータがあります: {op.name}")
+        apply_batched(states, gate_matrix(op.name, op.params), op.qubits)
+        p = noise.depolarizing if len(op.qubits) == 1 else noise.depolarizing_2q
+        if p > 0:
+            _depolarize(states, op.qubits, p, rng)
+        if noise.amplitude_damping > 0:
+            for q in op.qubits:
+                _amplitude_damp(states, q, noise.amplitude_damping, rng)
+    return states
+
+
+def sample_trajectories(states: np.ndarray, shots: int, seed=None) -> np.ndarray:
+    """軌跡を等しい重みで混ぜた分布から shots 回分の基底インデックスを引く
+
+    各ショットの軌跡を一様に選び、その軌跡の累積確率を逆関数法で引く。
+    全軌跡の累積確率を1本につなげて (行 r に r を足して) まとめて searchsorted する。
+    """
+    rng = np.random.default_rng(seed)
+    batch, size = states.shape
+    probs = np.abs(states) ** 2
+    cumulative = np.cumsum(probs, axis=1)
+    cumulative /= cumulative[:, -1:]
+    cumulative += np.arange(batch)[:, None]
+    rows = rng.integers(0, batch, size=shots)
+    flat = np.searchsorted(cumulative.ravel(), rows + rng.random(shots), side="right")
+    return np.minimum(flat - rows * size, size - 1)
+
+
+def apply_readout_error(values: np.ndarray, num_bits: int, error, seed=None) -> np.ndarray:
+    """測定値の各ビットを確率 p(1|0), p(0|1) で反転する"""
+    p01, p10 = error
+    if p01 == 0 and p10 == 0:
+        return values
+    rng = np.random.default_rng(seed)
+    out = values.copy()
+    for b in range(num_bits):
+        bit = (values >> b) & 1
+        flip = rng.random(values.size) < np.where(bit == 1, p10, p01)
+        out ^= flip.astype(values.dtype) << b
+    return out
+
+
+def run_trajectories(circuit, noise: NoiseModel, shots: int = 1024, trajectories: int = 256,
+                     seed=None, max_bytes: int = 1 << 22) -> dict[str, int]:
+    """ノイズ付きで回路を実行し {'ビット列': 回数} を返す
+
+    軌跡は互いに独立なので、max_bytes (既定はキャッシュに載る程度) ごとの
+    バッチに分けて計算し、ショットは軌跡の数に比例して各バッチに割り振る。
+    """
+    num_qubits, ops = to_operations(circuit)
+    gates, measured = split_measurements(ops)
+    num_bits = num_clbits(circuit, measured) if measured else num_qubits
+    return _counts_trajectories(num_qubits, gates, measured, num_bits, shots, seed,
+                                noise, trajectories, max_bytes)
+
+
+def _counts_trajectories(num_qubits, gates, measured, num_bits, shots, seed, noise=None,
+                         trajectories=256, max_bytes=1 << 22):
+    noise = noise or NoiseModel()
+    rng = np.random.default_rng(seed)
+    per_batch = max(1, max_bytes // (16 * 2**num_qubits))
+    sizes = [min(per_batch, trajectories - start) for start in range(0, trajectories, per_batch)]
+    batch_shots = rng.multinomial(shots, np.array(sizes) / trajectories)
+    values = []
+    for size, count in zip(sizes, batch_shots):
+        states = trajectory_states(num_qubits, gates, noise, size, rng)
+        values.append(measured_values(sample_trajectories(states, count, rng), measured))
+    values = apply_readout_error(np.concatenate(values), num_bits, noise.readout_error, rng)
+    return to_counts(values, num_bits)
@@ -0,0 +1,410 @@
+# coding: utf-8
+"""構造を持つ演算子 (対角・置換・制御・テンソル積) を密行列にせずに扱う
+
+S, T, 位相ゲートは対角行列、X や CX, CCX は置換行列なので、2^n x 2^n の
+密行列として掛ける必要はない。
+
+- Diagonal    : 対角成分だけを持ち、要素ごとの積 O(2^n)
+- Permutation : 基底 j -> phases[j] |perm[j]> (Y のような位相付きの置換も含む)、O(2^n)
+- Controlled  : 制御ビットが全部 1 の部分空間にだけ base を掛ける
+- Kronecker   : いくつかの量子ビットの組にそれぞれ小さな演算子を掛ける
+- Dense       : 上のどれにも当てはまらないときの密行列
+
+compose (A @ B は B を先に掛ける) は、可能なら構造を保った演算子を返す
+(対角どうしは対角、置換と対角は位相付きの置換、同じ制御の制御ゲートは
+base どうしの積)。保てないときだけ Dense になる。
+
+ゲートは作用する k 量子ビットだけの小さな演算子を Kronecker の因子として持ち、
+テンソルの軸に沿って掛ける (2^n の添字の配列は作らない)。合成では、作用する
+量子ビットが重なる因子どうしだけを、その和集合の量子ビットの上で合成する。
+"""
+
+import numpy as np
+
+from .circuit import split_measurements, to_operations
+from .gates import gate_matrix
+
+
+def _sub_index(index: np.ndarray, qubits) -> np.ndarray:
+    """index の qubits のビットを取り出して詰めた値 (qubits[0] が最下位)"""
+    sub = np.zeros_like(index)
+    for b, q in enumerate(qubits):
+        sub |= ((index >> q) & 1) << b
+    return sub
+
+
+def _replace_bits(index: np.ndarray, qubits, values: np.ndarray) -> np.ndarray:
+    """index の qubits のビットを values のビットで置き換える"""
+    out = index.copy()
+    for b, q in enumerate(qubits):
+        out &= ~(1 << q)
+        out |= ((values >> b) & 1) << q
+    return out
+
+
+def _apply_on(op, tensor: np.ndarray, axes: list[int]) -> None:
+    """形 (2, ..., 2, m) のテンソルの axes (op の量子ビット 0, 1, ... の軸) に op を掛ける (in-place)"""
+    k = len(axes)
+    moved = np.moveaxis(tensor, axes[::-1], list(range(k)))
+    result = op.apply(moved.reshape(2**k, -1))
+    moved[...] = result.reshape(moved.shape)
+
+
+class StructuredOperator:
+    """n 量子ビットの演算子の共通部分
+
+    apply は長さ 2^n のベクトルか (2^n, m) の行列を受け取り、新しい配列を返す。
+    """
+
+    num_qubits: int
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def adjoint(self) -> "StructuredOperator":
+        raise NotImplementedError
+
+    def as_permutation(self) -> "Permutation | None":
+        """位相付きの置換として書けるならその Permutation、書けなければ None"""
+        return None
+
+    def _compose(self, other) -> "StructuredOperator | None":
+        """構造を保ったまま self · other を作れるときだけ返す"""
+        return None
+
+    def compose(self, other: "StructuredOperator") -> "StructuredOperator":
+        """self · other (other を先に掛ける)"""
+        if self.num_qubits != other.num_qubits:
+            raise ValueError("量子ビット数が違う演算子は合成できません")
+        result = compose_structured(self, other)
+        if result is not None:
+            return result
+        return Dense(self.apply(other.to_matrix()))
+
+    def __matmul__(self, other: "StructuredOperator") -> "StructuredOperator":
+        return self.compose(other)
+
+    def to_matrix(self) -> np.ndarray:
+        return self.apply(np.eye(2**self.num_qubits, dtype=complex))
+
+
+def compose_structured(a: StructuredOperator, b: StructuredOperator,
+                       max_local: int | None = None) -> StructuredOperator | None:
+    """a · b を構造を保って作れれば返し、作れなければ None
+
+    作用する量子ビットが分かっている演算子どうしは、重なる因子だけを和集合の上で合成する。
+    max_local を渡すと、和集合がそれより大きくなる合成と、n 量子ビット全体の置換を
+    作る合成はしない (None を返す)。
+    """
+    result = a._compose(b)
+    if result is not None:
+        return result
+    fa, fb = _local_factors(a), _local_factors(b)
+    if fa is not None and fb is not None:
+        return _compose_local(fa, fb, a.num_qubits, max_local)
+    if max_local is not None and a.num_qubits > max_local:
+        return None
+    pa, pb = a.as_permutation(), b.as_permutation()
+    if pa is not None and pb is not None:
+        return pa._compose(pb)
+    return None
+
+
+class Dense(StructuredOperator):
+    def __init__(self, matrix):
+        self.matrix = np.asarray(matrix, dtype=complex)
+        self.num_qubits = self.matrix.shape[0].bit_length() - 1
+
+    def __repr__(self) -> str:
+        return f"Dense(num_qubits={self.num_qubits})"
+
+    def apply(self, vectors):
+        return self.matrix @ vectors
+
+    def adjoint(self):
+        return Dense(self.matrix.conj().T)
+
+    def _compose(self, other):
+        if isinstance(other, Dense):
+            return Dense(self.matrix @ other.matrix)
+        return None
+
+
+class Diagonal(StructuredOperator):
+    def __init__(self, diagonal):
+        self.diagonal = np.asarray(diagonal, dtype=complex)
+        self.num_qubits = self.diagonal.size.bit_length() - 1
+
+    def __repr__(self) -> str:
+        return f"Diagonal(num_qubits={self.num_qubits})"
+
+    def apply(self, vectors):
+        d = self.diagonal if vectors.ndim == 1 else self.diagonal[:, None]
+        return d * vectors
+
+    def adjoint(self):
+        return Diagonal(self.diagonal.conj())
+
+    def as_permutation(self):
+        return Permutation(np.arange(self.diagonal.size), self.diagonal)
+
+    def _compose(self, other):
+        if isinstance(other, Diagonal):
+            return Diagonal(self.diagonal * other.diagonal)
+        return None
+
+
+class Permutation(StructuredOperator):
+    """基底 |j> を phases[j] |perm[j]> に移す演算子"""
+
+    def __init__(self, perm, phases=None):
+        self.perm = np.asarray(perm, dtype=np.int64)
+        self.phases = np.ones(self.perm.size, dtype=complex) if phases is None else np.asarray(phases, dtype=complex)
+        self.num_qubits = self.perm.size.bit_length() - 1
+
+    def __repr__(self) -> str:
+        return f"Permutation(num_qubits={self.num_qubits})"
+
+    @classmethod
+    def from_matrix(cls, matrix) -> "Permutation | None":
+        """各行・各列に非零要素が1つだけの行列なら Permutation、そうでなければ None"""
+        nonzero = np.asarray(matrix) != 0
+        if not (np.all(nonzero.sum(axis=0) == 1) and np.all(nonzero.sum(axis=1) == 1)):
+            return None
+        perm = np.argmax(nonzero, axis=0)
+        return cls(perm, matrix[perm, np.arange(perm.size)])
+
+    def apply(self, vectors):
+        out = np.empty_like(vectors, dtype=complex)
+        out[self.perm] = (self.phases if vectors.ndim == 1 else self.phases[:, None]) * vectors
+        return out
+
+    def adjoint(self):
+        inverse = np.empty_like(self.perm)
+        inverse[self.perm] = np.arange(self.perm.size)
+        return Permutation(inverse, self.phases.conj()[inverse])
+
+    def as_permutation(self):
+        return self
+
+    def _compose(self, other):
+        if isinstance(other, Permutation):
+            return Permutation(self.perm[other.perm], self.phases[other.perm] * other.phases)
+        return None
+
+    def simplify(self) -> StructuredOperator:
+        """置換が恒等なら Diagonal にする"""
+        if np.array_equal(self.perm, np.arange(self.perm.size)):
+            return Diagonal(self.phases)
+        return self
+
+
+def _embed_permutation(base: Permutation, targets, num_qubits: int, controls=()) -> Permutation:
+    """小さな Permutation を n 量子ビットの targets に埋め込む (controls が全部 1 のときだけ作用)"""
+    index = np.arange(2**num_qubits, dtype=np.int64)
+    sub = _sub_index(index, targets)
+    perm = _replace_bits(index, targets, base.perm[sub])
+    phases = base.phases[sub]
+    if controls:
+        active = _sub_index(index, controls) == 2**len(controls) - 1
+        perm = np.where(active, perm, index)
+        phases = np.where(active, phases, 1)
+    return Permutation(perm, phases)
+
+
+class Controlled(StructuredOperator):
+    """controls がすべて 1 の部分空間で、targets に base を掛ける"""
+
+    def __init__(self, base: StructuredOperator, controls, targets, num_qubits: int):
+        if base.num_qubits != len(targets):
+            raise ValueError("base の量子ビット数と targets の数が違います")
+        self.base = base
+        self.controls = tuple(controls)
+        self.targets = tuple(targets)
+        self.num_qubits = num_qubits
+
+    def __repr__(self) -> str:
+        return f"Controlled({self.base!r}, controls={self.controls}, targets={self.targets})"
+
+    def apply(self, vectors):
+        n = self.num_qubits
+        out = np.array(vectors, dtype=complex).reshape(2**n, -1)
+        psi = out.reshape((2,) * n + (-1,))
+        index = [slice(None)] * (n + 1)
+        for c in self.controls:
+            index[n - 1 - c] = 1
+        # 制御ビットの軸を固定した残りの軸は、量子ビットの大きい順に並ぶ
+        remaining = [q for q in reversed(range(n)) if q not in self.controls]
+        _apply_on(self.base, psi[tuple(index)], [remaining.index(t) for t in self.targets])
+        return out.reshape(np.shape(vectors))
+
+    def adjoint(self):
+        return Controlled(self.base.adjoint(), self.controls, self.targets, self.num_qubits)
+
+    def as_permutation(self):
+        base = self.base.as_permutation()
+        if base is None:
+            return None
+        return _embed_permutation(base, self.targets, self.num_qubits, self.controls)
+
+    def _compose(self, other):
+        if (isinstance(other, Controlled) and other.controls == self.controls
+                and other.targets == self.targets):
+            return Controlled(self.base @ other.base, self.controls, self.targets, self.num_qubits)
+        return None
+
+
+class Kronecker(StructuredOperator):
+    """互いに重ならない量子ビットの組 qubits_i に、それぞれ演算子 op_i を掛ける
+
+    factors は [(op, qubits), ...] で、op の量子ビット b が qubits[b] に対応する。
+    """
+
+    def __init__(self, factors, num_qubits: int):
+        self.factors = [(op, tuple(qubits)) for op, qubits in factors]
+        used = [q for _, qubits in self.factors for q in qubits]
+        if len(used) != len(set(used)):
+            raise ValueError("Kronecker の因子の量子ビットが重なっています")
+        self.num_qubits = num_qubits
+
+    def __repr__(self) -> str:
+        return f"Kronecker({', '.join(f'{op!r} on {q}' for op, q in self.factors)})"
+
+    def apply(self, vectors):
+        n = self.num_qubits
+        out = np.array(vectors, dtype=complex).reshape(2**n, -1)
+        psi = out.reshape((2,) * n + (-1,))
+        for op, qubits in self.factors:
+            _apply_on(op, psi, [n - 1 - q for q in qubits])
+        return out.reshape(np.shape(vectors))
+
+    def adjoint(self):
+        return Kronecker([(op.adjoint(), qubits) for op, qubits in self.factors], self.num_qubits)
+
+    def as_permutation(self):
+        result = None
+        for op, qubits in self.factors:
+            base = op.as_permutation()
+            if base is None:
+                return None
+            embedded = _embed_permutation(base, qubits, self.num_qubits)
+            result = embedded if result is None else result._compose(embedded)
+        return result
+
+    def _compose(self, other):
+        if not isinstance(other, Kronecker):
+            return None
+        # 量子ビットの組がそれぞれ一致するか、まったく重ならなければ因子ごとに合成できる
+        mine = {qubits: op for op, qubits in self.factors}
+        theirs = {qubits: op for op, qubits in other.factors}
+        for a in mine:
+            for b in theirs:
+                if a != b and set(a) & set(b):
+                    return None
+        factors = [(mine[q] @ theirs[q] if q in theirs else mine[q], q) for q in mine]
+        factors += [(theirs[q], q) for q in theirs if q not in mine]
+        return Kronecker(factors, self.num_qubits)
+
+
+def _local_factors(op: StructuredOperator) -> list[tuple[StructuredOperator, tuple]] | None:
+    """作用する量子ビットが一部だけの演算子を [(小さな演算子, 量子ビット), ...] にする
+
+    Kronecker はその因子、Controlled は制御と標的を合わせた量子ビットの上の1因子。
+    n 量子ビット全体に作用する演算子は None。
+    """
+    if isinstance(op, Kronecker):
+        return op.factors
+    if isinstance(op, Controlled):
+        c, t = len(op.controls), len(op.targets)
+        local = Controlled(op.base, range(c), range(c, c + t), c + t)
+        return [(local, op.controls + op.targets)]
+    return None
+
+
+def _embed_local(op: StructuredOperator, positions: list[int], size: int) -> StructuredOperator:
+    """k 量子ビットの op を size 量子ビットの positions に置いた演算子 (size は小さい)"""
+    perm = op.as_permutation()
+    if perm is not None:
+        return _embed_permutation(perm, positions, size)
+    return Dense(Kronecker([(op, positions)], size).to_matrix())
+
+
+def _compose_local(a, b, num_qubits: int, max_local: int | None) -> StructuredOperator | None:
+    """因子のリスト a · b (b が先) を、量子ビットが重なる因子の組ごとに合成した Kronecker
+
+    同じ Kronecker の因子どうしは重ならないので、組の中では b の因子を先に掛ければよい。
+    """
+    # 重なる因子を辿って組 (連結成分) を作る
+    factors = [(op, qubits, 1) for op, qubits in b] + [(op, qubits, 0) for op, qubits in a]
+    groups = []
+    for factor in factors:
+        touching = [g for g in groups if set(g[0]) & set(factor[1])]
+        qubits = set(factor[1]).union(*[g[0] for g in touching])
+        members = [f for g in touching for f in g[1]] + [factor]
+        groups = [g for g in groups if g not in touching] + [(qubits, members)]
+    out = []
+    for qubits, members in groups:
+        if len(members) == 1:
+            out.append(members[0][:2])
+            continue
+        if max_local is not None and len(qubits) > max_local:
+            return None
+        union = sorted(qubits)
+        # b の因子 (フラグ 1) を先に掛ける。members は追加順なので安定に並べ替える
+        members = sorted(members, key=lambda f: -f[2])
+        result = None
+        for op, factor_qubits, _ in members:
+            embedded = _embed_local(op, [union.index(q) for q in factor_qubits], len(union))
+            result = embedded if result is None else embedded.compose(result)
+        if isinstance(result, Permutation):
+            result = result.simplify()
+        out.append((result, tuple(union)))
+    return Kronecker(out, num_qubits)
+
+
+def gate_operator(matrix: np.ndarray, qubits, num_qubits: int) -> StructuredOperator:
+    """k 量子ビットのゲート行列を、構造に応じた n 量子ビットの演算子にする
+
+    行列の形から判定する: 位相付きの置換 (対角を含む) -> Permutation / Diagonal、
+    qubits[0] で制御された形 -> Controlled、それ以外 -> Dense。
+    置換と Dense は k 量子ビットの演算子のまま Kronecker の因子にする。
+    """
+    matrix = np.asarray(matrix, dtype=complex)
+    k = len(qubits)
+    perm = Permutation.from_matrix(matrix)
+    if perm is not None:
+        # k 量子ビットの置換のまま持ち、n 量子ビットには広げない
+        return Kronecker([(perm.simplify(), qubits)], num_qubits)
+    if k >= 2:
+        # controlled(U) は制御ビット (最下位ビット) が 0 の部分が恒等
+        off = matrix.copy()
+        off[1::2, 1::2] = 0
+        if np.array_equal(off, np.diag((np.arange(2**k) % 2 == 0).astype(complex))):
+            base = gate_operator(matrix[1::2, 1::2], range(k - 1), k - 1)
+            return Controlled(base, qubits[:1], qubits[1:], num_qubits)
+    return Kronecker([(Dense(matrix), qubits)], num_qubits)
+
+
+def circuit_operators(circuit, max_local: int = 8) -> list[StructuredOperator]:
+    """回路を構造付きの演算子の列にする (構造を保てる隣どうしはまとめる)
+
+    まとめた因子が max_local 量子ビットを超えるときは、新しい演算子を始める。
+    """
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    out = []
+    for op in gates:
+        current = gate_operator(gate_matrix(op.name, op.params), op.qubits, num_qubits)
+        merged = compose_structured(current, out[-1], max_local) if out else None
+        if merged is not None:
+            out[-1] = merged
+        else:
+            out.append(current)
+    return out
+
+
+def apply_operators(operators: list[StructuredOperator], state: np.ndarray) -> np.ndarray:
+    """演算子の列を順に掛けた新しい状態を返す"""
+    for op in operators:
+        state = op.apply(state)
+    return state
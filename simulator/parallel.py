@@ -0,0 +1,148 @@
+# coding: utf-8
+"""共有メモリ上の状態ベクトルを複数プロセスで更新するシミュレーション
+
+状態ベクトルを multiprocessing.shared_memory に置き、2^w 個のスライスに分ける
+(w = log2(ワーカー数))。各ワーカーは自分のスライスにだけゲートを掛ける。
+
+- 下位 n-w ビット (スライス内) へのゲートは、スライスごとに独立に適用できる。
+- 上位 w ビット (スライス番号) に掛かるゲートは、先にその量子ビットを
+  スライス内のビットと入れ替えてから適用する (入れ替えはスライスの組ごとに並列)。
+
+ゲートの計算には statevector.evolve をそのまま使うので、
+結果は逐次版と1ビットも違わない。
+"""
+
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .circuit import Operation, split_measurements, to_operations
+from .statevector import evolve, permute_index_bits, probabilities, sample_indices
+
+# ワーカープロセス側で共有メモリを指す配列
+_worker = {}
+
+
+def _attach(name: str, size: int) -> None:
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 以前は track 引数がない (親と同じ resource_tracker に登録される)
+        shm = shared_memory.SharedMemory(name=name)
+    _worker["shm"] = shm
+    _worker["state"] = np.ndarray((size,), dtype=np.complex128, buffer=shm.buf)
+
+
+def _apply_gates(task) -> None:
+    """1つのスライスに、スライス内で閉じたゲート列を順に掛ける"""
+    start, stop, gates = task
+    evolve(_worker["state"][start:stop], gates)
+
+
+def _swap_slices(task) -> None:
+    """スライス a の low=1 の振幅と、スライス b の low=0 の振幅を交換する"""
+    a, b, size, low = task
+    state = _worker["state"]
+    A = state[a * size:(a + 1) * size].reshape(-1, 2, 2**low)
+    B = state[b * size:(b + 1) * size].reshape(-1, 2, 2**low)
+    tmp = A[:, 1, :].copy()
+    A[:, 1, :] = B[:, 0, :]
+    B[:, 0, :] = tmp
+
+
+class ParallelStatevector:
+    """共有メモリ上の状態ベクトルとワーカープール"""
+
+    def __init__(self, num_qubits: int, processes: int | None = None):
+        processes = processes or os.cpu_count() or 1
+        # スライス数は 2 のべき (ワーカー数以下で最大のもの)。
+        # 3 量子ビットゲートが必ずスライス内に収まるよう、下位に 3 ビットは残す
+        self.global_qubits = max(0, min(processes.bit_length() - 1, num_qubits - 3))
+        self.num_qubits = num_qubits
+        self.local_qubits = num_qubits - self.global_qubits
+        self.num_slices = 2**self.global_qubits
+        self.slice_size = 2**self.local_qubits
+
+        size = 2**num_qubits
+        self._shm = shared_memory.SharedMemory(create=True, size=size * 16)
+        self.state = np.ndarray((size,), dtype=np.complex128, buffer=self._shm.buf)
+        self.state[:] = 0
+        self.state[0] = 1.0
+        self.layout = list(range(num_qubits))
+        self._pool = mp.get_context().Pool(
+            processes, initializer=_attach, initargs=(self._shm.name, size)
+        )
+        self._pending = []
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+        del self.state
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush(self) -> None:
+        """溜めたスライス内ゲートを全スライスに並列で適用する"""
+        if not self._pending:
+            return
+        size = self.slice_size
+        tasks = [(s * size, (s + 1) * size, self._pending) for s in range(self.num_slices)]
+        self._pool.map(_apply_gates, tasks)
+        self._pending = []
+
+    def _swap_physical(self, high: int, low: int) -> None:
+        self._flush()
+        step = 1 << (high - self.local_qubits)
+        tasks = [
+            (a, a | step, self.slice_size, low)
+            for a in range(self.num_slices) if not a & step
+        ]
+        self._pool.map(_swap_slices, tasks)
+        la, lb = self.layout.index(high), self.layout.index(low)
+        self.layout[la], self.layout[lb] = low, high
+
+    def apply(self, op: Operation) -> None:
+        physical = [self.layout[q] for q in op.qubits]
+        for i, p in enumerate(physical):
+            if p < self.local_qubits:
+                continue
+            low = max(b for b in range(self.local_qubits) if b not in physical)
+            self._swap_physical(p, low)
+            physical[i] = low
+        self._pending.append(op._replace(qubits=tuple(physical)))
+
+    def evolve(self, circuit) -> "ParallelStatevector":
+        _, ops = to_operations(circuit)
+        gates, _ = split_measurements(ops)
+        for op in gates:
+            self.apply(op)
+        self._flush()
+        return self
+
+    def to_array(self) -> np.ndarray:
+        """論理量子ビット順の状態ベクトルのコピーを返す"""
+        self._flush()
+        out = np.empty_like(self.state)
+        out[permute_index_bits(np.arange(self.state.size, dtype=np.int64), self.layout)] = self.state
+        return out
+
+    def sample_indices(self, shots: int, seed=None) -> np.ndarray:
+        """物理配置のままサンプリングしてから論理インデックスに直す"""
+        self._flush()
+        return permute_index_bits(sample_indices(probabilities(self.state), shots, seed), self.layout)
+
+
+def run_parallel(circuit, processes: int | None = None) -> np.ndarray:
+    """回路を並列に実行し、最終状態 (論理順) を返す"""
+    num_qubits, _ = to_operations(circuit)
+    with ParallelStatevector(num_qubits, processes) as sim:
+        return sim.evolve(circuit).to_array()
+
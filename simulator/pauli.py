@@ -0,0 +1,208 @@
+# coding: utf-8
+"""パウリ演算子の和 (ハミルトニアン) を行列なしで扱う
+
+パウリ文字列 P を X 部分と Z 部分のビットマスク (x, z) で表す。
+Y = iXZ なので P = i^{n_Y} X^x Z^z となり、状態への作用は
+
+    (P ψ)[k ^ x] = i^{n_Y} (-1)^{popcount(k & z)} ψ[k]
+
+とインデックスの XOR と符号だけで計算できる。
+ラベルは Qiskit と同じく、右端が量子ビット 0。
+
+多数の項の期待値は、同じ x マスクを持つ項をまとめ、
+s[j] = conj(ψ[j ^ x]) ψ[j] のウォルシュ・アダマール変換から
+すべての z について一度に求める (Z だけの項なら s = |ψ|^2)。
+"""
+
+import numpy as np
+
+from .gates import H, SDG
+from .statevector import apply_matrix, hadamard_layer, sample_indices
+
+
+def label_to_masks(label: str) -> tuple[int, int]:
+    """'XZIY' のようなラベルを (x マスク, z マスク) にする"""
+    x = z = 0
+    for q, char in enumerate(reversed(label.upper())):
+        if char in "XY":
+            x |= 1 << q
+        if char in "ZY":
+            z |= 1 << q
+        if char not in "IXYZ":
+            raise ValueError(f"パウリ文字列ではありません: {label}")
+    return x, z
+
+
+def masks_to_label(x: int, z: int, num_qubits: int) -> str:
+    chars = "IXZY"
+    return "".join(chars[((x >> q) & 1) | (((z >> q) & 1) << 1)] for q in reversed(range(num_qubits)))
+
+
+def _parity(values: np.ndarray) -> np.ndarray:
+    return (np.bitwise_count(values) & 1).astype(np.int8)
+
+
+class PauliSum:
+    """Σ_k c_k P_k を、x/z マスクの uint64 配列と複素係数で持つ"""
+
+    def __init__(self, num_qubits: int, x, z, coeffs):
+        if num_qubits > 63:
+            raise ValueError("64 量子ビット以上には対応していません")
+        self.num_qubits = num_qubits
+        self.x = np.asarray(x, dtype=np.uint64)
+        self.z = np.asarray(z, dtype=np.uint64)
+        self.coeffs = np.asarray(coeffs, dtype=complex)
+        # 各項の i^{n_Y} (マスクは作った後に変えないので一度だけ計算する)
+        self.phases = 1j ** np.bitwise_count(self.x & self.z).astype(int)
+
+    @classmethod
+    def from_list(cls, terms) -> "PauliSum":
+        """[('ZZ', 1.0), ('XI', 0.5), ...] から作る"""
+        labels = [label for label, _ in terms]
+        num_qubits = len(labels[0])
+        masks = [label_to_masks(label) for label in labels]
+        return cls(num_qubits, [x for x, _ in masks], [z for _, z in masks], [c for _, c in terms])
+
+    def __len__(self) -> int:
+        return self.coeffs.size
+
+    def __repr__(self) -> str:
+        terms = ", ".join(
+            f"('{masks_to_label(int(x), int(z), self.num_qubits)}', {c})"
+            for x, z, c in zip(self.x, self.z, self.coeffs)
+        )
+        return f"PauliSum([{terms}])"
+
+    def apply_term(self, k: int, state: np.ndarray) -> np.ndarray:
+        """k 番目のパウリ文字列を状態に作用させた新しいベクトル (係数は掛けない)"""
+        x, z = self.x[k], self.z[k]
+        index = np.arange(state.size, dtype=np.uint64)
+        out = np.empty_like(state)
+        sign = 1 - 2 * _parity(index & z)
+        out[index ^ x] = self.phases[k] * sign * state
+        return out
+
+    def apply(self, state: np.ndarray) -> np.ndarray:
+        """H|ψ> を行列を作らずに計算する"""
+        out = np.zeros_like(state, dtype=complex)
+        for k in range(len(self)):
+            out += self.coeffs[k] * self.apply_term(k, state)
+        return out
+
+    def term_expectations(self, state: np.ndarray) -> np.ndarray:
+        """すべての項の <ψ|P_k|ψ> (係数は掛けない)
+
+        x マスクごとに s[j] = conj(ψ[j ^ x]) ψ[j] を作り、その x を持つ項が多ければ
+        ウォルシュ・アダマール変換で全 z の和 Σ_j s[j] (-1)^{popcount(j & z)} を
+        一度に求め、少なければ項ごとに符号付きの和をとる。
+        state が (B, 2^n) のバッチなら (B, 項数) を返す。
+        """
+        size = state.shape[-1]
+        index = np.arange(size, dtype=np.uint64)
+        out = np.empty(state.shape[:-1] + (len(self),), dtype=complex)
+        for x in np.unique(self.x):
+            terms = np.flatnonzero(self.x == x)
+            s = np.conj(state[..., index ^ x]) * state
+            if terms.size > self.num_qubits:
+                # バッチの添字は上位ビットとみなせる。
+                # hadamard_layer は 1/√2 ずつ正規化しているので元に戻す
+                hadamard_layer(s.reshape(-1), range(self.num_qubits))
+                out[..., terms] = s[..., self.z[terms].astype(np.int64)] * np.sqrt(size)
+            else:
+                for k in terms:
+                    out[..., k] = np.sum(s * (1 - 2 * _parity(index & self.z[k])), axis=-1)
+        return out * self.phases
+
+    def expectation(self, state: np.ndarray):
+        """<ψ|H|ψ> (エルミートなら実数)。(B, 2^n) のバッチなら長さ B の配列"""
+        values = (self.term_expectations(state) @ self.coeffs).real
+        return float(values) if state.ndim == 1 else values
+
+    # --- 可換なグループ分けとサンプリングによる推定 ---
+
+    def commutation_matrix(self) -> np.ndarray:
+        """項どうしが (通常の意味で) 可換かどうかの (T, T) ブール行列"""
+        x, z = self.x[:, None], self.z[None, :]
+        anti = _parity(x & z) ^ _parity(self.z[:, None] & self.x[None, :])
+        return anti == 0
+
+    def group_qubitwise(self) -> list[np.ndarray]:
+        """量子ビットごとに可換な項のグループに分ける (貪欲法)
+
+        同じグループの項は、各量子ビットで I か同じパウリ演算子しか使わないので、
+        1つの測定基底をグループ全体で共有できる。
+        """
+        support = self.x | self.z
+        order = np.argsort(-np.bitwise_count(support).astype(int), kind="stable")
+        group_x, group_z, members = [], [], []
+        for k in order:
+            if group_x:
+                gx, gz = np.array(group_x, dtype=np.uint64), np.array(group_z, dtype=np.uint64)
+                conflict = ((gx | gz) & support[k]) & ((gx ^ self.x[k]) | (gz ^ self.z[k]))
+                fits = np.flatnonzero(conflict == 0)
+            else:
+                fits = []
+            if len(fits):
+                g = fits[0]
+                group_x[g] |= int(self.x[k])
+                group_z[g] |= int(self.z[k])
+                members[g].append(k)
+            else:
+                group_x.append(int(self.x[k]))
+                group_z.append(int(self.z[k]))
+                members.append([k])
+        return [np.array(sorted(m)) for m in members]
+
+    def measurement_basis(self, group) -> str:
+        """グループで共有する測定基底のラベル (測らない量子ビットは 'Z')"""
+        x = int(np.bitwise_or.reduce(self.x[group]))
+        z = int(np.bitwise_or.reduce(self.z[group]))
+        return masks_to_label(x, z, self.num_qubits).replace("I", "Z")
+
+    def estimate_from_counts(self, groups, counts_per_group) -> tuple[float, float]:
+        """グループごとの測定結果から <H> とその標準誤差を推定する
+
+        counts_per_group[g] は、グループ g の基底に回転してから計算基底で測った
+        {'ビット列': 回数}。各項の値は測定結果と項の台のパリティ (-1)^{popcount} で、
+        ショットごとのグループ内の和から分散も求める。
+        """
+        energy, variance = 0.0, 0.0
+        for group, counts in zip(groups, counts_per_group):
+            outcomes = np.array([int(key.replace(" ", ""), 2) for key in counts], dtype=np.uint64)
+            weights = np.array(list(counts.values()), dtype=float)
+            shots = weights.sum()
+            support = (self.x | self.z)[group]
+            signs = 1 - 2 * _parity(outcomes[:, None] & support[None, :])
+            # 基底を回転した後のパウリ文字列の値は、台の上のビットのパリティ
+            values = signs @ self.coeffs[group].real
+            mean = weights @ values / shots
+            energy += mean
+            variance += (weights @ (values - mean) ** 2) / (shots - 1) / shots if shots > 1 else 0.0
+        return float(energy), float(np.sqrt(variance))
+
+    def sample_groups(self, state: np.ndarray, shots: int, seed=None):
+        """各グループの基底に回転した状態からサンプリングする
+
+        (groups, counts_per_group) を返すので、そのまま estimate_from_counts に渡せる。
+        """
+        from .statevector import to_counts
+
+        rng = np.random.default_rng(seed)
+        groups = self.group_qubitwise()
+        counts = []
+        for group in groups:
+            rotated = state.astype(complex, copy=True)
+            basis = self.measurement_basis(group)
+            for q, char in enumerate(reversed(basis)):
+                if char == "Y":
+                    apply_matrix(rotated, SDG, [q])
+                if char in "XY":
+                    apply_matrix(rotated, H, [q])
+            indices = sample_indices(np.abs(rotated) ** 2, shots, rng)
+            counts.append(to_counts(indices, self.num_qubits))
+        return groups, counts
+
+    def to_matrix(self) -> np.ndarray:
+        """密行列 (小さい系の確認用)"""
+        size = 2**self.num_qubits
+        return np.column_stack([self.apply(np.eye(size, dtype=complex)[:, j]) for j in range(size)])
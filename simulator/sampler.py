@@ -0,0 +1,254 @@
+# coding: utf-8
+"""StatevectorSampler と同じ呼び出し方で使えるサンプラー
+
+    from simulator.sampler import FastSampler as StatevectorSampler
+    counts = StatevectorSampler().run([qc]).result()[0].data.meas.get_counts()
+
+の1行の差し替えで、ノートブックのコードをそのまま速くすることを狙う。
+
+- 複数の回路の確率ベクトルは、計算量が多いときだけプロセスプールで並列に計算する
+  (プールの起動に 10 ms ほどかかるので、小さい回路は順に計算したほうが速い)
+- 同じ回路 (とパラメータ値) の確率ベクトルは StateCache に覚えておき、
+  ショットを追加で要求されたときは計算し直さずにサンプリングだけ行う
+- 測定結果は古典レジスタごとに uint64 のワードへビットパックして持つ
+  (ショット数が多くても1ショット1文字列にはしない)
+- 大きな Clifford 回路は確率ベクトルを作らずスタビライザー形式でサンプリングする
+"""
+
+import multiprocessing as mp
+
+import numpy as np
+
+from .cache import StateCache, operations_key
+from .circuit import num_clbits, split_measurements, to_operations
+from .stabilizer import WORD, StabilizerState, is_clifford_circuit, packed_to_strings, remap_packed
+from .statevector import evolve, probabilities, sample_indices, zero_state
+from .sweep import ParameterSweep
+
+
+class PackedBits:
+    """1つの古典レジスタの測定結果 (qiskit の BitArray に相当)
+
+    words は形 (*shape, shots, num_words) の uint64 配列で、ワード w の
+    ビット b が古典ビット 64w + b を表す (スタビライザー形式と同じ並び)。
+    shape はパラメータ値の配列の形 (パラメータがなければ ())。
+    """
+
+    def __init__(self, words: np.ndarray, num_bits: int):
+        self.words = words
+        self.num_bits = num_bits
+
+    @property
+    def shape(self) -> tuple:
+        return self.words.shape[:-2]
+
+    @property
+    def num_shots(self) -> int:
+        return self.words.shape[-2]
+
+    @property
+    def array(self) -> np.ndarray:
+        """qiskit の BitArray.array と同じ、ビッグエンディアンの uint8 配列"""
+        num_bytes = (self.num_bits + 7) // 8
+        big = self.words[..., ::-1].astype(">u8")
+        return big.view(np.uint8).reshape(self.words.shape[:-1] + (-1,))[..., -num_bytes:]
+
+    def __repr__(self) -> str:
+        return f"PackedBits(<shape={self.shape}, num_shots={self.num_shots}, num_bits={self.num_bits}>)"
+
+    def _rows(self, loc) -> np.ndarray:
+        words = self.words if loc is None else self.words[loc]
+        return words.reshape(-1, words.shape[-1])
+
+    def get_int_counts(self, loc=None) -> dict[int, int]:
+        """{整数の測定値: 回数}。loc を省略するとすべてのパラメータ値の合計"""
+        rows, counts = np.unique(self._rows(loc), axis=0, return_counts=True)
+        keys = [sum(int(w) << (WORD * i) for i, w in enumerate(row)) for row in rows]
+        return dict(zip(keys, counts.tolist()))
+
+    def get_counts(self, loc=None) -> dict[str, int]:
+        """{'ビット列': 回数} (最上位ビットが左)"""
+        rows, counts = np.unique(self._rows(loc), axis=0, return_counts=True)
+        return dict(zip(packed_to_strings(rows, self.num_bits), counts.tolist()))
+
+    def get_bitstrings(self, loc=None) -> list[str]:
+        """ショットごとのビット列"""
+        return packed_to_strings(self._rows(loc), self.num_bits)
+
+
+class DataBin:
+    """古典レジスタ名を属性に持つ入れ物 (result[0].data.meas のように使う)"""
+
+    def __init__(self, **registers):
+        self.__dict__.update(registers)
+
+    def __getitem__(self, name: str):
+        return self.__dict__[name]
+
+    def __iter__(self):
+        return iter(self.__dict__)
+
+    def keys(self):
+        return self.__dict__.keys()
+
+    def __repr__(self) -> str:
+        return f"DataBin({', '.join(f'{k}={v!r}' for k, v in self.__dict__.items())})"
+
+
+class PubResult:
+    def __init__(self, data: DataBin, metadata: dict):
+        self.data = data
+        self.metadata = metadata
+
+    def __repr__(self) -> str:
+        return f"PubResult(data={self.data!r}, metadata={self.metadata})"
+
+
+class SamplerResult:
+    """PubResult のリスト (PrimitiveResult と同じく添字でアクセスする)"""
+
+    def __init__(self, results: list[PubResult], metadata: dict):
+        self._results = results
+        self.metadata = metadata
+
+    def __getitem__(self, index: int) -> PubResult:
+        return self._results[index]
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __iter__(self):
+        return iter(self._results)
+
+
+class SamplerJob:
+    """計算は run の時点で済んでいるので、result() は結果を返すだけ"""
+
+    def __init__(self, result: SamplerResult):
+        self._result = result
+
+    def result(self) -> SamplerResult:
+        return self._result
+
+    def status(self) -> str:
+        return "DONE"
+
+
+def _registers(circuit, num_bits: int) -> list[tuple[str, list[int]]]:
+    """[(レジスタ名, 古典ビットのインデックス), ...]"""
+    cregs = getattr(circuit, "cregs", None)
+    if not cregs:
+        return [("meas", list(range(num_bits)))] if num_bits else []
+    return [(reg.name, [circuit.find_bit(bit).index for bit in reg]) for reg in cregs]
+
+
+def _work(task) -> int:
+    """確率ベクトルの計算量の目安 (振幅の数 × ゲート数 × パラメータ値の数)"""
+    num_qubits, gates, values = task
+    batch = 1 if values is None else values.size // values.shape[-1]
+    return 2**num_qubits * max(len(gates), 1) * batch
+
+
+def _probabilities(task) -> np.ndarray:
+    """(形 (*shape, 2^n) の) 確率ベクトルを計算する (プールのワーカーでも動く)"""
+    num_qubits, gates, values = task
+    if values is None:
+        return probabilities(evolve(zero_state(num_qubits), gates))
+    sweep = ParameterSweep((num_qubits, gates))
+    flat = sweep.probabilities(values.reshape(-1, values.shape[-1]))
+    return flat.reshape(values.shape[:-1] + (-1,))
+
+
+class FastSampler:
+    """StatevectorSampler と同じ run(pubs).result() の形で使えるサンプラー
+
+    pub は回路、(回路,)、(回路, パラメータ値)、(回路, パラメータ値, ショット数) のどれか。
+    パラメータ値は (P,) か (..., P) の配列で、結果の shape は (...) になる。
+    """
+
+    def __init__(self, default_shots: int = 1024, seed=None, processes: int | None = None,
+                 cache: StateCache | None = None, stabilizer_qubits: int = 24,
+                 parallel_work: int = 1 << 24):
+        self.default_shots = default_shots
+        self.processes = processes
+        # 計算量 (_work の合計) がこれ未満ならプールを使わない
+        self.parallel_work = parallel_work
+        self.cache = cache if cache is not None else StateCache()
+        # これより大きい Clifford 回路は確率ベクトルを作らない
+        self.stabilizer_qubits = stabilizer_qubits
+        self._rng = np.random.default_rng(seed)
+
+    def _prepare(self, pub, shots):
+        if not isinstance(pub, tuple):
+            pub = (pub,)
+        circuit = pub[0]
+        values = pub[1] if len(pub) > 1 else None
+        pub_shots = pub[2] if len(pub) > 2 and pub[2] is not None else shots
+        num_qubits, ops = to_operations(circuit)
+        gates, measured = split_measurements(ops)
+        if values is not None:
+            values = np.asarray(values, dtype=float)
+            if values.size == 0:
+                values = None
+        return {
+            "circuit": circuit, "num_qubits": num_qubits, "gates": gates, "measured": measured,
+            "values": values, "shots": self.default_shots if pub_shots is None else pub_shots,
+            "registers": _registers(circuit, num_clbits(circuit, measured)),
+        }
+
+    def _use_stabilizer(self, item) -> bool:
+        return (item["values"] is None and item["num_qubits"] > self.stabilizer_qubits
+                and is_clifford_circuit(item["gates"]))
+
+    def _compute(self, items: list[dict]) -> None:
+        """キャッシュにない確率ベクトルをまとめて (必要ならプールで) 計算する"""
+        todo = {}
+        for item in items:
+            if self._use_stabilizer(item):
+                continue
+            item["key"] = operations_key(item["num_qubits"], item["gates"], item["values"])
+            # 参照を持っておけば、この実行中に LRU から追い出されても使える
+            item["probs"] = self.cache.get(item["key"])
+            if item["probs"] is None:
+                todo[item["key"]] = (item["num_qubits"], item["gates"], item["values"])
+        tasks = list(todo.values())
+        processes = min(len(tasks), self.processes or mp.cpu_count())
+        if processes > 1 and sum(map(_work, tasks)) >= self.parallel_work:
+            with mp.get_context().Pool(processes) as pool:
+                results = pool.map(_probabilities, tasks)
+        else:
+            results = [_probabilities(task) for task in tasks]
+        computed = {key: self.cache.put(key, probs) for key, probs in zip(todo, results)}
+        for item in items:
+            if item.get("key") in computed:
+                item["probs"] = computed[item["key"]]
+
+    def _sample(self, item) -> np.ndarray:
+        """量子ビット順にビットパックしたショット (*shape, shots, num_words)"""
+        shots = item["shots"]
+        if self._use_stabilizer(item):
+            state = StabilizerState(item["num_qubits"])
+            for op in item["gates"]:
+                state.apply(op.name, op.qubits)
+            return state.sample_packed(shots, self._rng)
+        probs = item["probs"]
+        flat = probs.reshape(-1, probs.shape[-1])
+        indices = np.stack([sample_indices(p, shots, self._rng) for p in flat])
+        return indices.astype(np.uint64).reshape(probs.shape[:-1] + (shots, 1))
+
+    def run(self, pubs, shots: int | None = None) -> SamplerJob:
+        items = [self._prepare(pub, shots) for pub in pubs]
+        self._compute(items)
+        results = []
+        for item in items:
+            packed = self._sample(item)
+            rows = packed.reshape(-1, packed.shape[-1])
+            qubit_of = item["measured"]
+            registers = {}
+            for name, clbits in item["registers"]:
+                mapping = {i: qubit_of[c] for i, c in enumerate(clbits) if c in qubit_of}
+                words = remap_packed(rows, mapping, len(clbits))
+                registers[name] = PackedBits(words.reshape(packed.shape[:-1] + words.shape[-1:]), len(clbits))
+            metadata = {"shots": item["shots"], "circuit_metadata": getattr(item["circuit"], "metadata", {}) or {}}
+            results.append(PubResult(DataBin(**registers), metadata))
+        return SamplerJob(SamplerResult(results, {"version": 2}))
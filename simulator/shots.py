@@ -0,0 +1,198 @@
+# coding: utf-8
+"""ショットを uint64 のワードにビットパックしてファイルへ書き出しながら集計する
+
+10^8 ショット x 30 量子ビット以上の測定結果を {'ビット列': 回数} の辞書にすると、
+Python の文字列キーだけで数 GB になる。ここではショットを
+スタビライザー形式と同じ並び (ワード w のビット b が古典ビット 64w + b) の
+(shots, num_words) の uint64 としてファイルに追記し、チャンクが届くたびに
+
+- 出現した測定値ごとの回数 (キーはパックしたワードの行のまま)
+- 各ビットが 1 だった回数 (1ビットの周辺分布)
+- 指定したビットの組の周辺分布 (track で指定、2^k 個のビンの配列)
+
+を更新する。ほかのビットの組の周辺分布は、ファイルを np.memmap で
+チャンクごとに読み、文字列にせずに整数へビットを集めて数える。
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from .circuit import num_clbits, split_measurements, to_operations
+from .stabilizer import WORD, StabilizerState, is_clifford_circuit, packed_to_strings, remap_packed
+from .statevector import evolve, measured_values, probabilities, zero_state
+
+# 1バイトの値 v のビット k (v, k) の表。バイトごとの bincount からビットごとの回数を作る
+_BYTE_BITS = ((np.arange(256)[:, None] >> np.arange(8)) & 1).astype(np.int64)
+
+
+def gather_bits(words: np.ndarray, bits) -> np.ndarray:
+    """(shots, num_words) のワードから bits のビットを集めた整数 (bits[0] が最下位ビット)"""
+    values = np.zeros(words.shape[0], dtype=np.uint64)
+    for i, b in enumerate(bits):
+        bit = (words[:, b // WORD] >> np.uint64(b % WORD)) & np.uint64(1)
+        values |= bit << np.uint64(i)
+    return values
+
+
+def _unique_rows(words: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    if words.shape[1] == 1:
+        keys, counts = np.unique(words[:, 0], return_counts=True)
+        return keys[:, None], counts
+    return np.unique(words, axis=0, return_counts=True)
+
+
+class ShotRecord:
+    """ビットパックしたショットのファイルと、その集計
+
+    path を省略すると一時ファイルを作り、close で消す。
+    histogram=False にすると測定値ごとの回数は持たない (すべて異なる値が出る
+    ような大きな回路では、その表がショットと同じ大きさになるため)。
+    """
+
+    def __init__(self, num_bits: int, path: str | None = None, histogram: bool = True,
+                 track=()):
+        self.num_bits = num_bits
+        self.num_words = (num_bits + WORD - 1) // WORD
+        self.num_shots = 0
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".shots")
+            os.close(fd)
+        self.path = path
+        self._file = open(path, "wb")
+        self.histogram = histogram
+        self._keys = np.zeros((0, self.num_words), dtype=np.uint64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self.ones = np.zeros(num_bits, dtype=np.int64)
+        self._tracked = {tuple(bits): np.zeros(2 ** len(bits), dtype=np.int64) for bits in track}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, words: np.ndarray) -> None:
+        """(shots, num_words) の uint64 のチャンクを追記し、集計を更新する"""
+        words = np.ascontiguousarray(words, dtype=np.uint64).reshape(-1, self.num_words)
+        words.tofile(self._file)
+        self.num_shots += words.shape[0]
+        self._update_ones(words)
+        for bits, counts in self._tracked.items():
+            counts += np.bincount(gather_bits(words, bits).astype(np.intp), minlength=counts.size)
+        if self.histogram:
+            keys, counts = _unique_rows(words)
+            self._merge(keys, counts)
+
+    def append_values(self, values: np.ndarray) -> None:
+        """整数の測定値 (num_bits <= 64) のチャンクを追記する"""
+        self.append(np.asarray(values).astype(np.uint64)[:, None])
+
+    def _update_ones(self, words: np.ndarray) -> None:
+        # バイトの列ごとに 256 個のビンで数えてから、各バイト値のビットに振り分ける
+        octets = words.view(np.uint8)
+        for j in range((self.num_bits + 7) // 8):
+            per_value = np.bincount(octets[:, j], minlength=256)
+            bits = per_value @ _BYTE_BITS
+            stop = min(8, self.num_bits - 8 * j)
+            self.ones[8 * j:8 * j + stop] += bits[:stop]
+
+    def _merge(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        merged, inverse = np.unique(np.concatenate([self._keys, keys]), axis=0, return_inverse=True)
+        total = np.bincount(inverse.reshape(-1), weights=np.concatenate([self._counts, counts]),
+                            minlength=len(merged))
+        self._keys, self._counts = merged, total.astype(np.int64)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def words(self) -> np.ndarray:
+        """書き出したショット全体を (shots, num_words) の読み取り専用 memmap で返す"""
+        self.flush()
+        if self.num_shots == 0:
+            return np.zeros((0, self.num_words), dtype=np.uint64)
+        return np.memmap(self.path, dtype=np.uint64, mode="r", shape=(self.num_shots, self.num_words))
+
+    def chunks(self, chunk_shots: int = 1 << 20):
+        words = self.words()
+        for start in range(0, self.num_shots, chunk_shots):
+            yield words[start:start + chunk_shots]
+
+    def marginal_probabilities(self) -> np.ndarray:
+        """各ビットが 1 になった割合 (長さ num_bits)"""
+        return self.ones / max(self.num_shots, 1)
+
+    def marginal_counts(self, bits, chunk_shots: int = 1 << 20) -> dict[int, int]:
+        """bits のビットだけの周辺分布 {整数の値 (bits[0] が最下位ビット): 回数}
+
+        track で指定した組ならその集計を、そうでなければファイルをチャンクごとに
+        読んで数える (文字列には変換しない)。
+        """
+        bits = tuple(bits)
+        if bits in self._tracked:
+            counts = self._tracked[bits]
+            nonzero = np.flatnonzero(counts)
+            return dict(zip(nonzero.tolist(), counts[nonzero].tolist()))
+        if len(bits) > 64:
+            raise ValueError("周辺分布を取るビットは 64 個以下にしてください")
+        keys, totals = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+        for words in self.chunks(chunk_shots):
+            values, counts = np.unique(gather_bits(words, bits), return_counts=True)
+            keys, inverse = np.unique(np.concatenate([keys, values]), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate([totals, counts]),
+                                 minlength=keys.size).astype(np.int64)
+        return dict(zip(keys.tolist(), totals.tolist()))
+
+    def _histogram(self) -> tuple[np.ndarray, np.ndarray]:
+        if not self.histogram:
+            raise ValueError("histogram=False の ShotRecord は測定値ごとの回数を持ちません")
+        return self._keys, self._counts
+
+    def get_int_counts(self) -> dict[int, int]:
+        keys, counts = self._histogram()
+        ints = [sum(int(w) << (WORD * i) for i, w in enumerate(row)) for row in keys]
+        return dict(zip(ints, counts.tolist()))
+
+    def get_counts(self) -> dict[str, int]:
+        """{'ビット列': 回数} (小さい結果を表示するとき用)"""
+        keys, counts = self._histogram()
+        return dict(zip(packed_to_strings(keys, self.num_bits), counts.tolist()))
+
+
+def record_shots(circuit, shots: int, path: str | None = None, seed=None,
+                 chunk_shots: int = 1 << 20, histogram: bool = True, track=(),
+                 stabilizer_qubits: int = 24) -> ShotRecord:
+    """回路を shots 回測定し、チャンクごとに ShotRecord へ流し込む
+
+    Clifford 回路で stabilizer_qubits を超えるものはタブローから直接パックしたワードを、
+    それ以外は確率ベクトルの累積和を1回だけ作り、チャンクごとに searchsorted で引く。
+    """
+    rng = np.random.default_rng(seed)
+    num_qubits, ops = to_operations(circuit)
+    gates, measured = split_measurements(ops)
+    num_bits = num_clbits(circuit, measured) if measured else num_qubits
+    record = ShotRecord(num_bits, path, histogram, track)
+    if is_clifford_circuit(gates) and num_qubits > stabilizer_qubits:
+        state = StabilizerState(num_qubits)
+        for op in gates:
+            state.apply(op.name, op.qubits)
+        for start in range(0, shots, chunk_shots):
+            words = state.sample_packed(min(chunk_shots, shots - start), rng)
+            record.append(remap_packed(words, measured, num_bits) if measured else words)
+        return record
+    cumulative = np.cumsum(probabilities(evolve(zero_state(num_qubits), gates)))
+    cumulative /= cumulative[-1]
+    for start in range(0, shots, chunk_shots):
+        draws = rng.random(min(chunk_shots, shots - start))
+        indices = np.minimum(np.searchsorted(cumulative, draws, side="right"), cumulative.size - 1)
+        record.append_values(measured_values(indices, measured))
+    return record
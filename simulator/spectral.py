@@ -0,0 +1,158 @@
+# coding: utf-8
+"""小さい行列を大量にまとめて固有値分解し、行列関数を作る
+
+(B, 2, 2) のエルミート行列・ユニタリ行列 (対角化可能な正規行列) は閉じた式で扱う。
+m = tr A / 2, s = √((a - d)^2 / 4 + bc) とすると固有値は m ± s で、
+
+    f(A) = (f(m+s) + f(m-s)) / 2 · I + (f(m+s) - f(m-s)) / (2s) · (A - m I)
+
+(2つの固有値での補間なので、固有値が異なれば正規でなくても正しい)。
+s = 0 で A ≠ mI (対角化できない行列) のときは f(A) = f(m) I + f'(m) (A - mI) で、
+これは 2x2 では厳密。√NOT = X^{1/2} は powm(X, 0.5) で、
+X の固有値 ±1 の主値 1, i から ((1+i) I + (1-i) X) / 2 になる。
+
+それより大きい行列は np.linalg.eigh (エルミート) か np.linalg.eig をバッチで呼ぶ。
+"""
+
+import numpy as np
+
+from .checks import is_unitary
+
+# s がこれより小さいときは固有値が縮退しているとみなす
+_DEGENERATE = 1e-12
+
+
+def _as_stack(A) -> np.ndarray:
+    A = np.asarray(A, dtype=complex)
+    if A.ndim < 2 or A.shape[-1] != A.shape[-2]:
+        raise ValueError(f"正方行列のスタック (..., d, d) を渡してください: {A.shape}")
+    return A
+
+
+def is_hermitian(A, atol: float = 1e-10) -> bool:
+    A = np.asarray(A)
+    return bool(np.allclose(A, np.conj(np.swapaxes(A, -1, -2)), atol=atol))
+
+
+def unitary_mask(U, atol: float = 1e-8) -> np.ndarray:
+    """(..., d, d) の各行列がユニタリかどうか (checks.is_unitary のバッチ版)"""
+    U = np.asarray(U)
+    product = np.conj(np.swapaxes(U, -1, -2)) @ U
+    return np.all(np.abs(product - np.eye(U.shape[-1])) <= atol, axis=(-2, -1))
+
+
+def _center_and_split(A: np.ndarray, hermitian: bool) -> tuple[np.ndarray, np.ndarray]:
+    """(B, 2, 2) の m = tr/2 と s (固有値 m ± s)"""
+    a, b, c, d = A[..., 0, 0], A[..., 0, 1], A[..., 1, 0], A[..., 1, 1]
+    m = (a + d) / 2
+    half = (a - d) / 2
+    if hermitian:
+        # エルミートなら s = |r| (ブロッホベクトルの長さ) で、丸め誤差でも負にならない
+        return m.real, np.sqrt(half.real**2 + np.abs(c) ** 2)
+    return m, np.sqrt(half**2 + b * c)
+
+
+def eig2(A, hermitian: bool | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """(B, 2, 2) の正規行列の固有値 (B, 2) と正規直交な固有ベクトル (B, 2, 2) (列が固有ベクトル)
+
+    固有値は m - s, m + s の順 (エルミートなら np.linalg.eigh と同じ昇順)。
+    m + s の固有ベクトルは射影演算子 (I + (A - mI)/s) / 2 の大きいほうの列を正規化して作り、
+    もう1つはそれに直交するベクトル (正規行列なので固有ベクトルになる)。
+    """
+    A = _as_stack(A)
+    hermitian = is_hermitian(A) if hermitian is None else hermitian
+    m, s = _center_and_split(A, hermitian)
+    degenerate = np.abs(s) < _DEGENERATE * np.maximum(np.abs(m), 1.0)
+    safe = np.where(degenerate, 1.0, s)
+    projector = (np.eye(2) + (A - m[..., None, None] * np.eye(2)) / safe[..., None, None]) / 2
+    norms = np.linalg.norm(projector, axis=-2)
+    column = np.argmax(norms, axis=-1)
+    upper = np.take_along_axis(projector, column[..., None, None], axis=-1)[..., 0]
+    upper /= np.take_along_axis(norms, column[..., None], axis=-1)
+    upper = np.where(degenerate[..., None], np.array([0.0, 1.0]), upper)
+    lower = np.stack([-np.conj(upper[..., 1]), np.conj(upper[..., 0])], axis=-1)
+    values = np.stack([m - s, m + s], axis=-1)
+    return values, np.stack([lower, upper], axis=-1)
+
+
+def eigh(A) -> tuple[np.ndarray, np.ndarray]:
+    """エルミート行列のスタックの固有値分解 (2x2 は閉じた式、それ以外は np.linalg.eigh)"""
+    A = _as_stack(A)
+    if A.shape[-1] == 2:
+        values, vectors = eig2(A, hermitian=True)
+        return values.real, vectors
+    return np.linalg.eigh(A)
+
+
+def matrix_function(A, f, hermitian: bool | None = None, derivative=None) -> np.ndarray:
+    """行列のスタックに f を作用させた f(A)
+
+    f は複素数の配列を受け取る ufunc のような関数。2x2 は閉じた式で、
+    固有値が縮退した対角化できない行列には導関数 derivative が必要
+    (渡されていなければ ValueError)。それより大きい行列は対角化可能なものに限り、
+    エルミートなら eigh、そうでなければ eig で分解する。
+    """
+    A = _as_stack(A)
+    hermitian = is_hermitian(A) if hermitian is None else hermitian
+    if A.shape[-1] == 2:
+        m, s = _center_and_split(A, hermitian)
+        m, s = m.astype(complex), s.astype(complex)
+        upper, lower = f(m + s), f(m - s)
+        scale = np.maximum(np.abs(m), 1.0)
+        degenerate = np.abs(s) < _DEGENERATE * scale
+        shifted = A - m[..., None, None] * np.eye(2)
+        slope = np.where(degenerate, 0.0, (upper - lower) / np.where(degenerate, 1.0, 2 * s))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # f(m) は縮退したものだけで使う (log(0) などは捨てられる)
+            mean = np.where(degenerate, f(m), (upper + lower) / 2)
+        if not hermitian:
+            # 縮退していて A ≠ mI なら対角化できないので f'(m) (A - mI) を足す
+            defective = degenerate & (np.abs(shifted).max(axis=(-2, -1)) > _DEGENERATE * scale)
+            if np.any(defective):
+                if derivative is None:
+                    raise ValueError("対角化できない行列には f の導関数 derivative を渡してください")
+                slope = np.where(defective, derivative(m), slope)
+        return mean[..., None, None] * np.eye(2) + slope[..., None, None] * shifted
+    if hermitian:
+        values, vectors = np.linalg.eigh(A)
+        return (vectors * f(values.astype(complex))[..., None, :]) @ np.conj(np.swapaxes(vectors, -1, -2))
+    values, vectors = np.linalg.eig(A)
+    return (vectors * f(values)[..., None, :]) @ np.linalg.inv(vectors)
+
+
+def sqrtm(A, hermitian: bool | None = None) -> np.ndarray:
+    """主値の平方根 (正定値エルミートなら正定値の平方根)"""
+    return matrix_function(A, np.sqrt, hermitian, lambda z: 0.5 / np.sqrt(z))
+
+
+def expm(A, hermitian: bool | None = None) -> np.ndarray:
+    """e^A (e^{-iHt} は expm(-1j * t * H))"""
+    return matrix_function(A, np.exp, hermitian, np.exp)
+
+
+def logm(A, hermitian: bool | None = None) -> np.ndarray:
+    """主値の対数 (ユニタリ U なら iH = logm(U) のエルミート H が得られる)"""
+    return matrix_function(A, np.log, hermitian, lambda z: 1 / z)
+
+
+def powm(A, power: float, hermitian: bool | None = None, check_unitary: bool = False) -> np.ndarray:
+    """A^power (主値)。√NOT = powm(X, 0.5)
+
+    check_unitary=True なら、入力がすべてユニタリのとき結果もユニタリかを確かめ、
+    そうでなければ ValueError を出す (固有値の枝の選び方の誤りなどを検出する)。
+    """
+    A = _as_stack(A)
+    out = matrix_function(A, lambda z: np.power(z, power), hermitian,
+                          lambda z: power * np.power(z, power - 1))
+    if check_unitary and np.all(unitary_mask(A)) and not np.all(unitary_mask(out)):
+        raise ValueError("ユニタリ行列の累乗がユニタリになりませんでした")
+    return out
+
+
+if __name__ == "__main__":
+    # lab_single_systems.py の √NOT を X の 1/2 乗として作る
+    X = np.array([[0, 1], [1, 0]], dtype=complex)
+    sqrt_not = powm(X, 0.5, check_unitary=True)
+    print(sqrt_not)
+    print("Is √NOT Unitary?:", is_unitary(sqrt_not))
+    print("√NOT @ √NOT == X:", np.allclose(sqrt_not @ sqrt_not, X))
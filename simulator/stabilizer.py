@@ -0,0 +1,281 @@
+# coding: utf-8
+"""スタビライザー形式 (Aaronson-Gottesman タブロー) によるシミュレーション
+
+Clifford ゲートだけの回路なら、状態を 2^n 個の振幅ではなく
+2n 本のパウリ演算子で表せる。各行の X/Z 部分は uint64 にビットパックする。
+
+行 0..n-1 がデスタビライザー、行 n..2n-1 がスタビライザー。
+"""
+
+import numpy as np
+
+from .circuit import split_measurements, to_operations
+from .gates import CLIFFORD_GATES
+
+WORD = 64
+
+
+def _popcount(a: np.ndarray) -> np.ndarray:
+    return np.bitwise_count(a).sum(axis=-1, dtype=np.int64)
+
+
+def _product_phase(x1, z1, x2, z2) -> np.ndarray:
+    """パウリ積 P1·P2 で現れる i の指数 (mod 4) を行ごとに計算する
+
+    1量子ビットごとの指数 g ∈ {-1, 0, 1} を +1 と -1 のマスクに分けて
+    popcount で合計する。
+    """
+    y1 = x1 & z1
+    only_x = x1 & ~z1
+    only_z = z1 & ~x1
+    pos = (y1 & z2 & ~x2) | (only_x & z2 & x2) | (only_z & x2 & ~z2)
+    neg = (y1 & x2 & ~z2) | (only_x & z2 & ~x2) | (only_z & x2 & z2)
+    return _popcount(pos) - _popcount(neg)
+
+
+def is_clifford_circuit(ops) -> bool:
+    return all(op.name in CLIFFORD_GATES or op.name == "measure" for op in ops)
+
+
+class StabilizerState:
+    """ビットパックされたスタビライザータブロー"""
+
+    def __init__(self, num_qubits: int):
+        self.num_qubits = n = num_qubits
+        self.num_words = (n + WORD - 1) // WORD
+        self.x = np.zeros((2 * n, self.num_words), dtype=np.uint64)
+        self.z = np.zeros((2 * n, self.num_words), dtype=np.uint64)
+        self.r = np.zeros(2 * n, dtype=np.uint8)
+        rows = np.arange(n)
+        bits = np.left_shift(np.uint64(1), (rows % WORD).astype(np.uint64))
+        self.x[rows, rows // WORD] = bits  # デスタビライザー X_i
+        self.z[n + rows, rows // WORD] = bits  # スタビライザー Z_i
+
+    # --- 列 (量子ビット) 単位のビット操作 ---
+
+    def _col(self, table: np.ndarray, q: int) -> np.ndarray:
+        return ((table[:, q // WORD] >> np.uint64(q % WORD)) & np.uint64(1)).astype(np.uint8)
+
+    def _flip(self, table: np.ndarray, q: int, mask: np.ndarray) -> None:
+        table[:, q // WORD] ^= mask.astype(np.uint64) << np.uint64(q % WORD)
+
+    # --- ゲート ---
+
+    def h(self, q: int) -> None:
+        xq, zq = self._col(self.x, q), self._col(self.z, q)
+        self.r ^= xq & zq
+        diff = xq ^ zq
+        self._flip(self.x, q, diff)
+        self._flip(self.z, q, diff)
+
+    def s(self, q: int) -> None:
+        xq, zq = self._col(self.x, q), self._col(self.z, q)
+        self.r ^= xq & zq
+        self._flip(self.z, q, xq)
+
+    def sdg(self, q: int) -> None:
+        xq, zq = self._col(self.x, q), self._col(self.z, q)
+        self.r ^= xq & (zq ^ 1)
+        self._flip(self.z, q, xq)
+
+    def x_gate(self, q: int) -> None:
+        self.r ^= self._col(self.z, q)
+
+    def z_gate(self, q: int) -> None:
+        self.r ^= self._col(self.x, q)
+
+    def y_gate(self, q: int) -> None:
+        self.r ^= self._col(self.x, q) ^ self._col(self.z, q)
+
+    def cx(self, a: int, b: int) -> None:
+        xa, za = self._col(self.x, a), self._col(self.z, a)
+        xb, zb = self._col(self.x, b), self._col(self.z, b)
+        self.r ^= xa & zb & (xb ^ za ^ 1)
+        self._flip(self.x, b, xa)
+        self._flip(self.z, a, zb)
+
+    def apply(self, name: str, qubits) -> None:
+        # タブローは状態の全体の位相を持たない
+        if name in ("id", "global_phase"):
+            return
+        if name == "h":
+            self.h(*qubits)
+        elif name == "s":
+            self.s(*qubits)
+        elif name == "sdg":
+            self.sdg(*qubits)
+        elif name == "x":
+            self.x_gate(*qubits)
+        elif name == "y":
+            self.y_gate(*qubits)
+        elif name == "z":
+            self.z_gate(*qubits)
+        elif name == "sx":
+            q, = qubits
+            self.h(q), self.s(q), self.h(q)
+        elif name == "sxdg":
+            q, = qubits
+            self.h(q), self.sdg(q), self.h(q)
+        elif name == "cx":
+            self.cx(*qubits)
+        elif name == "cz":
+            a, b = qubits
+            self.h(b), self.cx(a, b), self.h(b)
+        elif name == "cy":
+            a, b = qubits
+            self.sdg(b), self.cx(a, b), self.s(b)
+        elif name == "swap":
+            a, b = qubits
+            self.cx(a, b), self.cx(b, a), self.cx(a, b)
+        else:
+            raise ValueError(f"Clifford ゲートではありません: {name}")
+
+    # --- 測定分布 ---
+
+    def _rowsum(self, targets: np.ndarray, pivot: int) -> None:
+        """targets の各行に pivot 行を掛ける (符号も更新)"""
+        if targets.size == 0:
+            return
+        x1, z1 = self.x[pivot], self.z[pivot]
+        x2, z2 = self.x[targets], self.z[targets]
+        exponent = 2 * self.r[pivot] + 2 * self.r[targets].astype(np.int64) + _product_phase(x1, z1, x2, z2)
+        self.r[targets] = (exponent % 4 == 2).astype(np.uint8)
+        self.x[targets] = x2 ^ x1
+        self.z[targets] = z2 ^ z1
+
+    def _swap_rows(self, i: int, j: int) -> None:
+        if i != j:
+            for table in (self.x, self.z, self.r):
+                table[[i, j]] = table[[j, i]]
+
+    def measurement_distribution(self) -> tuple[np.ndarray, np.ndarray]:
+        """計算基底測定の分布を (特殊解, 零空間の基底) で返す
+
+        Clifford 状態の測定結果は、アフィン部分空間上の一様分布になる。
+        結果 s は「特殊解 XOR 基底ベクトルのランダムな組み合わせ」で表せる。
+        どちらもビットパックした uint64 配列。
+        """
+        n = self.num_qubits
+        work = StabilizerState.__new__(StabilizerState)
+        work.num_qubits, work.num_words = n, self.num_words
+        work.x, work.z, work.r = self.x[n:].copy(), self.z[n:].copy(), self.r[n:].copy()
+
+        # 1. X 部分を掃き出す。残った行は Z 型のスタビライザー
+        rank = 0
+        for q in range(n):
+            col = work._col(work.x, q)
+            candidates = np.flatnonzero(col[rank:]) + rank
+            if candidates.size == 0:
+                continue
+            work._swap_rows(rank, candidates[0])
+            col = work._col(work.x, q)
+            col[rank] = 0
+            work._rowsum(np.flatnonzero(col), rank)
+            rank += 1
+
+        # 2. Z 型の行は「s と z のパリティ = r」という線形制約。GF(2) で解く
+        z, rhs = work.z[rank:], work.r[rank:]
+        pivots = []
+        row = 0
+        for q in range(n):
+            col = ((z[:, q // WORD] >> np.uint64(q % WORD)) & np.uint64(1)).astype(bool)
+            candidates = np.flatnonzero(col[row:]) + row
+            if candidates.size == 0:
+                continue
+            p = candidates[0]
+            z[[row, p]], rhs[[row, p]] = z[[p, row]], rhs[[p, row]]
+            col[[row, p]] = col[[p, row]]
+            col[row] = False
+            z[col] ^= z[row]
+            rhs[col] ^= rhs[row]
+            pivots.append(q)
+            row += 1
+
+        particular = np.zeros(self.num_words, dtype=np.uint64)
+        for i, q in enumerate(pivots):
+            if rhs[i]:
+                particular[q // WORD] |= np.uint64(1) << np.uint64(q % WORD)
+
+        free = sorted(set(range(n)) - set(pivots))
+        basis = np.zeros((len(free), self.num_words), dtype=np.uint64)
+        for j, f in enumerate(free):
+            basis[j, f // WORD] |= np.uint64(1) << np.uint64(f % WORD)
+            for i, q in enumerate(pivots):
+                if (z[i, f // WORD] >> np.uint64(f % WORD)) & np.uint64(1):
+                    basis[j, q // WORD] |= np.uint64(1) << np.uint64(q % WORD)
+        return particular, basis
+
+    def sample_packed(self, shots: int, seed=None, chunk: int = 1 << 12) -> np.ndarray:
+        """(shots, num_words) の uint64 配列で測定結果を返す
+
+        結果は 特殊解 XOR (コイン c) · (零空間の基底 B) で、これを GF(2) の行列積として計算する。
+        B の行を 8 本ずつまとめ、その 256 通りの XOR の表を先に作っておく (Four Russians)。
+        コインは 1 バイトに 8 枚ずつ引き、1 バイトごとに表を1回引いて XOR する。
+        """
+        rng = np.random.default_rng(seed)
+        particular, basis = self.measurement_distribution()
+        tables = _xor_tables(basis)
+        out = np.empty((shots, self.num_words), dtype=np.uint64)
+        for start in range(0, shots, chunk):
+            block = out[start:start + chunk]
+            block[:] = particular
+            coins = rng.integers(0, 256, size=(block.shape[0], len(tables)), dtype=np.uint8)
+            for g, table in enumerate(tables):
+                block ^= table[coins[:, g]]
+        return out
+
+
+def _xor_tables(basis: np.ndarray) -> np.ndarray:
+    """(k, W) の基底から、8 行ずつの組ごとの XOR の表 (ceil(k/8), 256, W) を作る
+
+    表 [g, c] は組 g の行のうち、c のビットが立っているものの XOR。
+    """
+    groups = (len(basis) + 7) // 8
+    padded = np.zeros((groups * 8, basis.shape[1]), dtype=np.uint64)
+    padded[:len(basis)] = basis
+    padded = padded.reshape(groups, 8, -1)
+    tables = np.zeros((groups, 256, basis.shape[1]), dtype=np.uint64)
+    for b in range(8):
+        # c = 2^b .. 2^{b+1}-1 は c - 2^b の表にビット b の行を足したもの
+        tables[:, 1 << b:2 << b] = tables[:, :1 << b] ^ padded[:, b, None]
+    return tables
+
+
+def packed_to_strings(packed: np.ndarray, num_bits: int) -> list[str]:
+    """ビットパックされた行をビット列 (最上位ビットが左) に変換する"""
+    return [
+        "".join(format(int(w), "064b") for w in row[::-1])[-num_bits:]
+        for row in packed
+    ]
+
+
+def remap_packed(packed: np.ndarray, measured: dict[int, int], num_clbits: int) -> np.ndarray:
+    """量子ビットのビット配置を古典ビットの並びに組み替える"""
+    out = np.zeros((packed.shape[0], (num_clbits + WORD - 1) // WORD), dtype=np.uint64)
+    for clbit, qubit in measured.items():
+        bit = (packed[:, qubit // WORD] >> np.uint64(qubit % WORD)) & np.uint64(1)
+        out[:, clbit // WORD] |= bit << np.uint64(clbit % WORD)
+    return out
+
+
+def packed_counts(packed: np.ndarray, num_bits: int) -> dict[str, int]:
+    rows, counts = np.unique(packed, axis=0, return_counts=True)
+    return dict(zip(packed_to_strings(rows, num_bits), counts.tolist()))
+
+
+def run_stabilizer(circuit) -> StabilizerState:
+    """Clifford 回路を |0...0> から実行したタブローを返す"""
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    state = StabilizerState(num_qubits)
+    for op in gates:
+        state.apply(op.name, op.qubits)
+    return state
+
+
+if __name__ == "__main__":
+    # ベル状態: H(0), CX(0, 1) -> '00' と '11' が半々
+    tableau = StabilizerState(2)
+    tableau.h(0)
+    tableau.cx(0, 1)
+    print(packed_counts(tableau.sample_packed(1000, seed=0), 2))
@@ -0,0 +1,159 @@
+# coding: utf-8
+"""密な状態ベクトルによるシミュレーション
+
+状態は長さ 2^n の complex128 配列。インデックスのビット q が量子ビット q
+(リトルエンディアン, Qiskit と同じ) に対応する。
+"""
+
+import numpy as np
+
+from .circuit import Operation, split_measurements, to_operations
+from .gates import SQRT2_INV, gate_matrix
+
+
+def zero_state(num_qubits: int) -> np.ndarray:
+    """|0...0> を作る"""
+    state = np.zeros(2**num_qubits, dtype=complex)
+    state[0] = 1.0
+    return state
+
+
+def apply_matrix(state: np.ndarray, matrix: np.ndarray, qubits) -> np.ndarray:
+    """状態に k 量子ビットのゲート行列を作用させる (in-place)
+
+    3 量子ビットまでは要素ごとの積和で計算するので、状態をどう切り分けて
+    適用しても同じ丸め誤差の結果になる。対角の 1 量子ビットゲート (z, s, t, p, rz) は
+    位相を掛けるだけにする (p, s, t, z では |1> の半分だけ)。
+    """
+    k = len(qubits)
+    n = state.size.bit_length() - 1
+    if k == 1:
+        q = qubits[0]
+        psi = state.reshape(-1, 2, 2**q)
+        if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+            if matrix[0, 0] != 1:
+                psi[:, 0, :] *= matrix[0, 0]
+            if matrix[1, 1] != 1:
+                psi[:, 1, :] *= matrix[1, 1]
+            return state
+        a0, a1 = psi[:, 0, :].copy(), psi[:, 1, :].copy()
+        psi[:, 0, :] = matrix[0, 0] * a0 + matrix[0, 1] * a1
+        psi[:, 1, :] = matrix[1, 0] * a0 + matrix[1, 1] * a1
+        return state
+    if k <= 3:
+        psi = state.reshape((2,) * n)
+        axes = [n - 1 - q for q in qubits]
+        amps = []
+        for j in range(2**k):
+            index = [slice(None)] * n
+            for b, axis in enumerate(axes):
+                index[axis] = (j >> b) & 1
+            amps.append((tuple(index), psi[tuple(index)].copy()))
+        for i in range(2**k):
+            out = matrix[i, 0] * amps[0][1]
+            for j in range(1, 2**k):
+                if matrix[i, j] != 0:
+                    out = out + matrix[i, j] * amps[j][1]
+            psi[amps[i][0]] = out
+        return state
+
+    psi = state.reshape((2,) * n)
+    axes = [n - 1 - q for q in reversed(qubits)]
+    m = matrix.reshape((2,) * (2 * k))
+    out = np.tensordot(m, psi, axes=(list(range(k, 2 * k)), axes))
+    state[:] = np.moveaxis(out, list(range(k)), axes).reshape(-1)
+    return state
+
+
+def apply_operation(state: np.ndarray, op: Operation) -> np.ndarray:
+    """Operation を1つ適用する"""
+    return apply_matrix(state, gate_matrix(op.name, op.params), op.qubits)
+
+
+def hadamard_layer(state: np.ndarray, qubits) -> np.ndarray:
+    """連続する H ゲートを高速ウォルシュ・アダマール変換として適用する (in-place)
+
+    量子ビットごとにバタフライ (a, b) -> ((a+b)/√2, (a-b)/√2) を1段ずつ行う。
+    作業用のバッファは状態の半分の大きさで1つだけ確保する。
+    各段の演算は H をどう区切って適用しても同じなので、並列版とも結果が一致する。
+    """
+    buffer = np.empty(state.size // 2, dtype=state.dtype)
+    for q in qubits:
+        psi = state.reshape(-1, 2, 2**q)
+        a, b = psi[:, 0, :], psi[:, 1, :]
+        tmp = buffer.reshape(a.shape)
+        np.subtract(a, b, out=tmp)
+        a += b
+        a *= SQRT2_INV
+        np.multiply(tmp, SQRT2_INV, out=b)
+    return state
+
+
+def evolve(state: np.ndarray, ops: list[Operation]) -> np.ndarray:
+    """ゲート列を順に適用する (連続する H はまとめて変換する)"""
+    i = 0
+    while i < len(ops):
+        if ops[i].name == "h":
+            j = i
+            while j < len(ops) and ops[j].name == "h":
+                j += 1
+            hadamard_layer(state, [op.qubits[0] for op in ops[i:j]])
+            i = j
+            continue
+        apply_operation(state, ops[i])
+        i += 1
+    return state
+
+
+def run_statevector(circuit) -> np.ndarray:
+    """回路を |0...0> から実行した最終状態を返す (末尾の測定は無視)"""
+    num_qubits, ops = to_operations(circuit)
+    gates, _ = split_measurements(ops)
+    return evolve(zero_state(num_qubits), gates)
+
+
+def probabilities(state: np.ndarray) -> np.ndarray:
+    return np.abs(state) ** 2
+
+
+def sample_indices(probs: np.ndarray, shots: int, seed=None) -> np.ndarray:
+    """確率ベクトルから shots 回分の基底インデックスをサンプリングする"""
+    rng = np.random.default_rng(seed)
+    probs = probs / probs.sum()
+    counts = rng.multinomial(shots, probs)
+    indices = np.repeat(np.arange(probs.size), counts)
+    rng.shuffle(indices)
+    return indices
+
+
+def measured_values(indices: np.ndarray, measured: dict[int, int]) -> np.ndarray:
+    """量子ビットのインデックスを古典ビットの値に並べ替える"""
+    if not measured:
+        return indices
+    values = np.zeros_like(indices)
+    for clbit, qubit in measured.items():
+        values |= ((indices >> qubit) & 1) << clbit
+    return values
+
+
+def permute_index_bits(physical: np.ndarray, layout: list[int]) -> np.ndarray:
+    """物理ビット配置のインデックスを論理量子ビット順に直す
+
+    layout[q] は論理量子ビット q が置かれている物理ビット位置。
+    """
+    logical = np.zeros_like(physical)
+    for q, p in enumerate(layout):
+        logical |= ((physical >> p) & 1) << q
+    return logical
+
+
+def to_counts(values: np.ndarray, num_bits: int) -> dict[str, int]:
+    """整数の測定値を Qiskit 形式の {'ビット列': 回数} にする"""
+    keys, counts = np.unique(values, return_counts=True)
+    return {format(int(k), f"0{num_bits}b"): int(c) for k, c in zip(keys, counts)}
+
+
+def sample_counts(state: np.ndarray, shots: int, seed=None) -> dict[str, int]:
+    """Statevector.sample_counts と同じ形式で測定結果を返す"""
+    num_qubits = state.size.bit_length() - 1
+    return to_counts(sample_indices(probabilities(state), shots, seed), num_qubits)
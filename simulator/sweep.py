@@ -0,0 +1,235 @@
+# coding: utf-8
+"""同じ構造の回路を多数のパラメータ値でまとめて実行する
+
+回路は一度だけ Operation 列に変換 (コンパイル) しておき、(B, P) の
+パラメータ配列を受け取って (B, 2^n) の状態ベクトルのバッチを作る。
+
+- パラメータを持つゲートは、B 個の角度から (B, d, d) の行列を一度に作る
+- 固定ゲートの行列はコンパイル時に作っておき、バッチ全体に同じものを掛ける
+- 連続する H はバッチの添字を上位ビットとみなして1回のアダマール変換で済ませる
+
+T や S を角度付きの位相ゲート p(θ) に置き換えた回路の角度依存性を、
+数万点で調べるような用途を想定している。
+"""
+
+import numpy as np
+
+from .circuit import ParameterRef, split_measurements, to_operations
+from .gates import gate_matrix
+from .statevector import hadamard_layer
+
+
+def _rotation(name: str, theta: np.ndarray) -> np.ndarray:
+    """rx, ry, rz, p の (B, 2, 2) 行列"""
+    m = np.zeros(theta.shape + (2, 2), dtype=complex)
+    if name in ("rx", "ry"):
+        c, s = np.cos(theta / 2), np.sin(theta / 2)
+        m[:, 0, 0] = m[:, 1, 1] = c
+        if name == "rx":
+            m[:, 0, 1] = m[:, 1, 0] = -1j * s
+        else:
+            m[:, 0, 1], m[:, 1, 0] = -s, s
+    elif name == "rz":
+        m[:, 0, 0], m[:, 1, 1] = np.exp(-0.5j * theta), np.exp(0.5j * theta)
+    else:
+        m[:, 0, 0], m[:, 1, 1] = 1, np.exp(1j * theta)
+    return m
+
+
+def batched_gate_matrix(name: str, params: list[np.ndarray]) -> np.ndarray:
+    """長さ B の角度の配列から (B, d, d) のゲート行列を作る"""
+    if name in ("rx", "ry", "rz", "p", "u1"):
+        return _rotation("p" if name == "u1" else name, params[0])
+    if name in ("u", "u3"):
+        theta, phi, lam = params
+        c, s = np.cos(theta / 2), np.sin(theta / 2)
+        m = np.empty(theta.shape + (2, 2), dtype=complex)
+        m[:, 0, 0] = c
+        m[:, 0, 1] = -np.exp(1j * lam) * s
+        m[:, 1, 0] = np.exp(1j * phi) * s
+        m[:, 1, 1] = np.exp(1j * (phi + lam)) * c
+        return m
+    if name in ("cp", "cu1", "crx", "cry", "crz"):
+        target = _rotation("p" if name in ("cp", "cu1") else name[1:], params[0])
+        m = np.zeros(target.shape[:1] + (4, 4), dtype=complex)
+        m[:, [0, 2], [0, 2]] = 1
+        # 制御ビット (最下位ビット) が1のインデックス: 1, 3
+        m[:, 1::2, 1::2] = target
+        return m
+    if name == "rzz":
+        theta = params[0]
+        m = np.zeros(theta.shape + (4, 4), dtype=complex)
+        for i, sign in enumerate([1, -1, -1, 1]):
+            m[:, i, i] = np.exp(-0.5j * sign * theta)
+        return m
+    # 専用の式がないゲートは1点ずつ作って積み重ねる
+    return np.stack([gate_matrix(name, values) for values in zip(*params)])
+
+
+def _split_view(states: np.ndarray, qubits) -> tuple[np.ndarray, list[int]]:
+    """(B, 2^n) を、指定した量子ビットの位置だけ長さ 2 の軸に分けた形で見る
+
+    n 個の軸に分けるより軸の数が少ないので、要素ごとの演算が速い。
+    返り値は (ビュー, qubits の各量子ビットに対応する軸)。
+    """
+    batch = states.shape[0]
+    shape, axes, high = [batch], {}, states.shape[1].bit_length() - 1
+    for q in sorted(qubits, reverse=True):
+        shape.append(2 ** (high - q - 1))
+        axes[q] = len(shape)
+        shape.append(2)
+        high = q
+    shape.append(2**high)
+    return states.reshape(shape), [axes[q] for q in qubits]
+
+
+def apply_batched(states: np.ndarray, matrix: np.ndarray, qubits) -> np.ndarray:
+    """(B, 2^n) の状態に、共通の (d, d) か点ごとの (B, d, d) の行列を掛ける (in-place)
+
+    statevector.apply_matrix と同じ要素ごとの積和で、バッチ全体で
+    0 になっている行列要素は計算を省く。対角ゲートは位相を掛けるだけにする。
+    """
+    k = len(qubits)
+    psi, axes = _split_view(states, qubits)
+    batched = matrix.ndim == 3
+    if batched:
+        coeff = matrix.reshape(matrix.shape + (1,) * (psi.ndim - 1 - k))
+    nonzero = np.any(matrix != 0, axis=0) if batched else matrix != 0
+
+    index = []
+    for j in range(2**k):
+        where = [slice(None)] * psi.ndim
+        for b, axis in enumerate(axes):
+            where[axis] = (j >> b) & 1
+        index.append(tuple(where))
+    if not np.any(nonzero & ~np.eye(2**k, dtype=bool)):
+        # 対角ゲートは位相を掛けるだけ (1 の要素は飛ばす)
+        for i in range(2**k):
+            c = coeff[:, i, i] if batched else matrix[i, i]
+            if np.any(c != 1):
+                psi[index[i]] *= c
+        return states
+    # 入力はビューのまま読み、全出力を計算し終えてから書き戻す
+    outs = []
+    for i in range(2**k):
+        out = None
+        for j in range(2**k):
+            if nonzero[i, j]:
+                term = (coeff[:, i, j] if batched else matrix[i, j]) * psi[index[j]]
+                out = term if out is None else np.add(out, term, out=out)
+        outs.append(out)
+    for i in range(2**k):
+        psi[index[i]] = 0 if outs[i] is None else outs[i]
+    return states
+
+
+class ParameterSweep:
+    """パラメータ付き回路をコンパイルし、多数のパラメータ値で実行する"""
+
+    def __init__(self, circuit):
+        self.num_qubits, ops = to_operations(circuit)
+        gates, _ = split_measurements(ops)
+        if any(len(op.qubits) > 3 for op in gates):
+            raise ValueError("4 量子ビット以上のゲートには対応していません")
+        refs = [p.index for op in gates for p in op.params if isinstance(p, ParameterRef)]
+        self.num_parameters = len(getattr(circuit, "parameters", ())) or (max(refs) + 1 if refs else 0)
+
+        # ("h", qubits) / ("fixed", matrix, qubits) / ("param", name, params, qubits)
+        self.steps = []
+        for op in gates:
+            if op.name == "h":
+                if self.steps and self.steps[-1][0] == "h":
+                    self.steps[-1][1].append(op.qubits[0])
+                else:
+                    self.steps.append(("h", [op.qubits[0]]))
+            elif any(isinstance(p, ParameterRef) for p in op.params):
+                self.steps.append(("param", op.name, op.params, op.qubits))
+            else:
+                self.steps.append(("fixed", gate_matrix(op.name, op.params), op.qubits))
+
+    def _bind(self, params, values: np.ndarray) -> list[np.ndarray]:
+        batch = values.shape[0]
+        return [
+            p.scale * values[:, p.index] + p.offset if isinstance(p, ParameterRef)
+            else np.full(batch, p, dtype=float)
+            for p in params
+        ]
+
+    def _check(self, values) -> np.ndarray:
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        if values.shape[1] != self.num_parameters:
+            raise ValueError(
+                f"パラメータ数が合いません: {values.shape[1]} (回路は {self.num_parameters})"
+            )
+        return values
+
+    def statevectors(self, values, block_bytes: int = 1 << 21) -> np.ndarray:
+        """(B, P) のパラメータ値から (B, 2^n) の状態ベクトルを作る
+
+        バッチ全体に1ゲートずつ掛けるとメモリの帯域で律速されるので、
+        キャッシュに載る block_bytes 程度の点ずつに分けて回路全体を通す。
+        """
+        values = self._check(values)
+        states = np.zeros((values.shape[0], 2**self.num_qubits), dtype=complex)
+        states[:, 0] = 1.0
+        per_block = max(1, block_bytes // (16 * 2**self.num_qubits))
+        for start in range(0, values.shape[0], per_block):
+            self._evolve(states[start:start + per_block], values[start:start + per_block])
+        return states
+
+    def _evolve(self, states: np.ndarray, values: np.ndarray) -> None:
+        for step in self.steps:
+            if step[0] == "h":
+                # バッチの添字は上位ビットとみなせる
+                hadamard_layer(states.reshape(-1), step[1])
+            elif step[0] == "fixed":
+                apply_batched(states, step[1], step[2])
+            else:
+                _, name, params, qubits = step
+                apply_batched(states, batched_gate_matrix(name, self._bind(params, values)), qubits)
+
+    def _chunks(self, values, max_bytes: int):
+        values = self._check(values)
+        per_batch = max(1, max_bytes // (16 * 2**self.num_qubits))
+        for start in range(0, values.shape[0], per_batch):
+            yield start, self.statevectors(values[start:start + per_batch])
+
+    def probabilities(self, values, max_bytes: int = 1 << 30) -> np.ndarray:
+        """(B, 2^n) の測定確率。状態のバッチは max_bytes ごとに分けて作る"""
+        values = self._check(values)
+        out = np.empty((values.shape[0], 2**self.num_qubits))
+        for start, states in self._chunks(values, max_bytes):
+            out[start:start + states.shape[0]] = np.abs(states) ** 2
+        return out
+
+    def expectations(self, observable, values, max_bytes: int = 1 << 30) -> np.ndarray:
+        """各パラメータ値での <ψ|H|ψ> (H は PauliSum) を長さ B の配列で返す"""
+        values = self._check(values)
+        out = np.empty(values.shape[0])
+        for start, states in self._chunks(values, max_bytes):
+            out[start:start + states.shape[0]] = observable.expectation(states)
+        return out
+
+
+def run_sweep(circuit, values) -> np.ndarray:
+    """回路を (B, P) のパラメータ値で実行し、(B, 2^n) の状態ベクトルを返す"""
+    return ParameterSweep(circuit).statevectors(values)
+
+
+if __name__ == "__main__":
+    from .circuit import Operation
+    from .pauli import PauliSum
+
+    # H, T, H, S, Y の T と S を角度付きの位相ゲートにした1量子ビット回路
+    circuit = (1, [
+        Operation("h", (0,)),
+        Operation("p", (0,), (ParameterRef(0),)),
+        Operation("h", (0,)),
+        Operation("p", (0,), (ParameterRef(1),)),
+        Operation("y", (0,)),
+    ])
+    sweep = ParameterSweep(circuit)
+    grid = np.stack(np.meshgrid(np.linspace(0, 2 * np.pi, 5), [np.pi / 2]), axis=-1).reshape(-1, 2)
+    Z = PauliSum.from_list([("Z", 1.0)])
+    for (t, s), p, z in zip(grid, sweep.probabilities(grid), sweep.expectations(Z, grid)):
+        print(f"θ_T={t:.3f} θ_S={s:.3f}  P(0)={p[0]:.4f}  <Z>={z:+.4f}")
@@ -0,0 +1,177 @@
+# coding: utf-8
+"""X/Y/Z 基底の測定結果から密度行列を再構成する (量子状態トモグラフィー)
+
+n 量子ビットの 3^n 個の基底 (ラベルは Qiskit と同じく右端が量子ビット 0) で
+測ったカウントを、(実験数 E, 3^n, 2^n) の相対頻度にそろえ、多数の 1, 2 量子ビットの
+再構成をまとめて行う。
+
+- 線形逆変換 : パウリ基底の測定はテンソル積なので、1量子ビットの双対フレーム
+  D(b, s) = (I + 3 (-1)^s σ_b) / 2 を量子ビットごとに縮約するだけで
+  ρ = 3^{-n} Σ_{b,s} f(b, s) ⊗_q D(b_q, s_q) になる (各基底のショット数が同じときの最小二乗解)
+- project_density : 固有値を確率単体に射影して、最も近い (フロベニウスノルム) 密度行列にする
+- 最尤推定 (射影勾配法) : 対数尤度の勾配 R = Σ f(b, s) / p(b, s) Π(b, s) の方向に進み、
+  project_density で密度行列に戻す
+"""
+
+import warnings
+
+import numpy as np
+
+from .gates import H, SDG, I, X, Y, Z
+from .statevector import apply_matrix, sample_indices, to_counts
+
+BASES = "XYZ"
+_PAULI = {"X": X, "Y": Y, "Z": Z}
+
+# 1量子ビットの双対フレーム D[b, s] (基底, 測定値, 行, 列) と射影演算子 Π[b, s]
+_DUAL = np.array([[(I + 3 * (-1) ** s * _PAULI[b]) / 2 for s in (0, 1)] for b in BASES])
+_PROJECTOR = np.array([[(I + (-1) ** s * _PAULI[b]) / 2 for s in (0, 1)] for b in BASES])
+
+
+def measurement_bases(num_qubits: int) -> list[str]:
+    """3^n 個の基底のラベル。i 番目の基底で量子ビット q を測る基底は BASES[(i // 3^q) % 3]"""
+    return [
+        "".join(BASES[(i // 3**q) % 3] for q in reversed(range(num_qubits)))
+        for i in range(3**num_qubits)
+    ]
+
+
+def frequencies(experiments, num_qubits: int) -> np.ndarray:
+    """[{基底のラベル: カウント}, ...] を (E, 3^n, 2^n) の基底ごとの相対頻度にする
+
+    カウントは {'ビット列': 回数} か {整数: 回数}。測っていない基底は 0 のまま。
+    """
+    if isinstance(experiments, dict):
+        experiments = [experiments]
+    index = {label: i for i, label in enumerate(measurement_bases(num_qubits))}
+    out = np.zeros((len(experiments), 3**num_qubits, 2**num_qubits))
+    for e, experiment in enumerate(experiments):
+        for label, counts in experiment.items():
+            row = out[e, index[label.upper()]]
+            for key, count in counts.items():
+                row[int(key.replace(" ", ""), 2) if isinstance(key, str) else key] += count
+            row /= max(row.sum(), 1)
+    return out
+
+
+def _product(freqs: np.ndarray, single: np.ndarray, num_qubits: int) -> np.ndarray:
+    """Σ_{b,s} freqs[..., b, s] ⊗_q single[b_q, s_q] を量子ビットごとの縮約で計算する"""
+    n = num_qubits
+    letters = iter("abcdefghijklmnopqrstuvwxyz")
+    basis = [next(letters) for _ in range(n)]    # basis[i] は量子ビット n-1-i
+    outcome = [next(letters) for _ in range(n)]
+    row = [next(letters) for _ in range(n)]
+    col = [next(letters) for _ in range(n)]
+    operands = ["".join(basis) + "".join(outcome)]
+    operands += [basis[i] + outcome[i] + row[i] + col[i] for i in range(n)]
+    subscripts = ",".join(["..." + operands[0]] + operands[1:])
+    tensor = freqs.reshape(freqs.shape[:-2] + (3,) * n + (2,) * n)
+    out = np.einsum(f"{subscripts}->...{''.join(row)}{''.join(col)}", tensor, *([single] * n))
+    return out.reshape(freqs.shape[:-2] + (2**n, 2**n))
+
+
+def linear_inversion(freqs: np.ndarray, num_qubits: int) -> np.ndarray:
+    """(E, 3^n, 2^n) の相対頻度から (E, 2^n, 2^n) の ρ を線形逆変換で求める (半正定値とは限らない)"""
+    return _product(freqs, _DUAL, num_qubits) / 3**num_qubits
+
+
+def _project_simplex(values: np.ndarray) -> np.ndarray:
+    """(E, d) の各行を {w >= 0, Σ w = 1} へユークリッド射影する"""
+    d = values.shape[-1]
+    mu = np.sort(values, axis=-1)[:, ::-1]
+    cumulative = np.cumsum(mu, axis=-1) - 1
+    ranks = np.arange(1, d + 1)
+    count = np.sum(mu - cumulative / ranks > 0, axis=-1)
+    shift = cumulative[np.arange(len(values)), count - 1] / count
+    return np.clip(values - shift[:, None], 0, None)
+
+
+def project_density(rho: np.ndarray) -> np.ndarray:
+    """エルミートな (E, d, d) を、最も近い密度行列に射影する"""
+    rho = (rho + np.conj(np.swapaxes(rho, -1, -2))) / 2
+    w, v = np.linalg.eigh(rho)
+    w = _project_simplex(w.reshape(-1, w.shape[-1])).reshape(w.shape)
+    return (v * w[..., None, :]) @ np.conj(np.swapaxes(v, -1, -2))
+
+
+def _projectors(num_qubits: int) -> np.ndarray:
+    """(3^n, 2^n, d, d) の射影演算子 Π(b, s) を 3^n で割ったもの (Σ_{b,s} = I)"""
+    size = 3**num_qubits * 2**num_qubits
+    unit = np.eye(size).reshape(size, 3**num_qubits, 2**num_qubits)
+    d = 2**num_qubits
+    return _product(unit, _PROJECTOR, num_qubits).reshape(3**num_qubits, d, d, d) / 3**num_qubits
+
+
+def _log_likelihood(f: np.ndarray, projectors: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    """(E,) の対数尤度 Σ f log p と、(E, K) の確率 p"""
+    p = np.einsum("kij,eji->ek", projectors, rho).real
+    return np.sum(np.where(f > 0, f * np.log(np.maximum(p, 1e-300)), 0.0), axis=1), p
+
+
+def maximum_likelihood(freqs: np.ndarray, num_qubits: int, max_iterations: int = 1000,
+                       tol: float = 1e-7) -> np.ndarray:
+    """射影勾配法による最尤推定 (E, 2^n, 2^n)
+
+    対数尤度の勾配 R = Σ f(b, s) / p(b, s) Π(b, s) の方向に進み project_density で
+    密度行列に戻す。ステップ幅は実験ごとにバックトラック (Armijo 条件) で決める。
+    RρR 反復 (ρ ← RρR / Tr) は純粋状態に近いと収束が遅く、ランクも下げられないので使わない。
+    出発点は射影した線形逆変換に I/d を 1 割混ぜたもの。
+    ρ の成分の変化 (絶対値の最大) が tol 未満になった実験から止め、max_iterations 回で収束しない実験があれば
+    RuntimeWarning を出す (その時点の推定値を返す)。
+    """
+    d = 2**num_qubits
+    projectors = _projectors(num_qubits).reshape(-1, d, d)
+    f = freqs.reshape(len(freqs), -1) / 3**num_qubits
+    rho = 0.9 * project_density(linear_inversion(freqs, num_qubits)) + 0.1 * np.eye(d) / d
+    step = np.ones(len(freqs))
+    active = np.arange(len(freqs))
+    for _ in range(max_iterations):
+        if not active.size:
+            break
+        current, fa, t = rho[active], f[active], step[active]
+        value, p = _log_likelihood(fa, projectors, current)
+        R = np.einsum("ek,kij->eij", np.where(fa > 0, fa / np.maximum(p, 1e-300), 0.0), projectors)
+        while True:
+            new = project_density(current + t[:, None, None] * R)
+            diff = new - current
+            bound = (value + np.einsum("eij,eji->e", R, diff).real
+                     - np.sum(np.abs(diff) ** 2, axis=(1, 2)) / (2 * t))
+            ok = _log_likelihood(fa, projectors, new)[0] >= bound - 1e-14
+            if ok.all():
+                break
+            t = np.where(ok, t, t / 2)
+        rho[active] = new
+        step[active] = 1.5 * t
+        active = active[np.abs(diff).max(axis=(1, 2)) >= tol]
+    if active.size:
+        warnings.warn(f"最尤推定が {max_iterations} 回で収束しませんでした (実験 {active.tolist()})",
+                      RuntimeWarning, stacklevel=2)
+    return rho
+
+
+def reconstruct(experiments, num_qubits: int, method: str = "linear") -> np.ndarray:
+    """カウントから ρ を再構成する。method は "linear", "projected", "mle" のどれか"""
+    freqs = frequencies(experiments, num_qubits)
+    if method == "linear":
+        return linear_inversion(freqs, num_qubits)
+    if method == "projected":
+        return project_density(linear_inversion(freqs, num_qubits))
+    if method == "mle":
+        return maximum_likelihood(freqs, num_qubits)
+    raise ValueError(f"未対応の再構成方法です: {method}")
+
+
+def simulate_counts(state: np.ndarray, shots: int, seed=None) -> dict[str, dict[str, int]]:
+    """状態ベクトルを 3^n 個の基底で shots 回ずつ測った {基底のラベル: カウント}"""
+    rng = np.random.default_rng(seed)
+    num_qubits = state.size.bit_length() - 1
+    out = {}
+    for label in measurement_bases(num_qubits):
+        rotated = np.asarray(state, dtype=complex).copy()
+        for q, char in enumerate(reversed(label)):
+            if char == "Y":
+                apply_matrix(rotated, SDG, [q])
+            if char in "XY":
+                apply_matrix(rotated, H, [q])
+        out[label] = to_counts(sample_indices(np.abs(rotated) ** 2, shots, rng), num_qubits)
+    return out
@@ -0,0 +1,142 @@
+# coding: utf-8
+"""回路全体のユニタリ行列を作る (Operator.from_circuit の代わり)
+
+ゲートごとに 2^n x 2^n のクロネッカー積を作って掛けるのではなく、
+ユニタリを形 (2,)*2n のテンソルとして持ち、各ゲートを出力側の
+k 本の軸とのテンソル縮約で作用させる (1ゲート O(4^n 2^k))。
+
+- 部分回路のキャッシュ : 名前で扱えない命令 (to_gate() した層や QFT など) は
+  definition を再帰的にたどり、構造のハッシュをキーにそのユニタリを覚えておく。
+  同じ層を何度も append した回路では、層のユニタリは1回しか作らない。
+  回路と definition の global_phase も掛ける (位相だけが違う definition はキーも別)。
+- ストリーミング : 全体が大きすぎるときは、指定した列だけを作る columns と、
+  行列を作らずに U v を計算する関数を返す matvec を使う。
+"""
+
+import numpy as np
+
+from .cache import operations_key
+from .circuit import IGNORED, Operation
+from .gates import NAMED_GATES, gate_matrix
+
+
+def _contract(tensor: np.ndarray, matrix: np.ndarray, axes: list[int]) -> np.ndarray:
+    """テンソルの axes (qubits[0] の軸が先頭) に k 量子ビットの行列を縮約する"""
+    k = len(axes)
+    m = matrix.reshape((2,) * (2 * k))
+    # 行列の行・列のインデックスは qubits[0] が最下位ビットなので、軸は逆順に並ぶ
+    axes = axes[::-1]
+    out = np.tensordot(m, tensor, axes=(list(range(k, 2 * k)), axes))
+    return np.moveaxis(out, list(range(k)), axes)
+
+
+class UnitaryBuilder:
+    """部分回路のユニタリをキャッシュしながら回路のユニタリを作る"""
+
+    def __init__(self):
+        self._unitaries = {}
+        # id(definition) -> (definition, キー)。同じ Gate オブジェクトは構造をたどり直さない
+        self._keys = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _gates(self, circuit) -> tuple[list[tuple[np.ndarray, tuple]], str, complex]:
+        """回路を [(行列, 量子ビット), ...]、その構造のキー、global_phase の位相因子にする"""
+        phase = circuit.global_phase
+        if hasattr(phase, "parameters") and phase.parameters:
+            raise ValueError("未束縛のパラメータを含む global_phase には対応していません")
+        phase = float(phase)
+        gates, structure = [], [Operation("global_phase", (), (phase,))] if phase else []
+        for inst in circuit.data:
+            op = inst.operation
+            if op.name in IGNORED:
+                continue
+            if op.name == "measure":
+                raise ValueError("測定を含む回路のユニタリは作れません")
+            if any(hasattr(p, "parameters") and p.parameters for p in op.params):
+                raise ValueError(f"未束縛のパラメータがあります: {op.name}")
+            qubits = tuple(circuit.find_bit(q).index for q in inst.qubits)
+            if op.name == "global_phase" and not qubits:
+                # Qiskit の GlobalPhaseGate (0 量子ビット)
+                phase += float(op.params[0])
+                structure.append(Operation(op.name, (), (float(op.params[0]),)))
+                continue
+            if op.name in NAMED_GATES:
+                # UnitaryGate ("unitary") の params[0] は行列なので float にしない
+                params = tuple(p if isinstance(p, np.ndarray) else float(p) for p in op.params)
+                matrix, label = gate_matrix(op.name, params), params
+            elif getattr(op, "definition", None) is not None:
+                matrix, key = self._subcircuit(op.definition)
+                label = (key,)
+            else:
+                matrix = np.asarray(op.to_matrix(), dtype=complex)
+                label = (matrix,)
+            gates.append((matrix, qubits))
+            structure.append(Operation(op.name, qubits, label))
+        return gates, operations_key(circuit.num_qubits, structure), np.exp(1j * phase)
+
+    def _subcircuit(self, definition) -> tuple[np.ndarray, str]:
+        known = self._keys.get(id(definition))
+        if known is not None and known[0] is definition:
+            self.hits += 1
+            return self._unitaries[known[1]], known[1]
+        gates, key, phase = self._gates(definition)
+        self._keys[id(definition)] = (definition, key)
+        if key in self._unitaries:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._unitaries[key] = self._build(definition.num_qubits, gates, phase)
+        return self._unitaries[key], key
+
+    @staticmethod
+    def _build(num_qubits: int, gates, phase: complex = 1.0) -> np.ndarray:
+        n = num_qubits
+        # 軸 0..n-1 が出力 (行) のビット、n..2n-1 が入力 (列) のビット。
+        # 行のビット q は軸 n-1-q
+        U = np.eye(2**n, dtype=complex).reshape((2,) * (2 * n))
+        for matrix, qubits in gates:
+            U = _contract(U, matrix, [n - 1 - q for q in qubits])
+        return phase * np.ascontiguousarray(U).reshape(2**n, 2**n)
+
+    def unitary(self, circuit) -> np.ndarray:
+        """回路全体の 2^n x 2^n のユニタリ行列"""
+        gates, _, phase = self._gates(circuit)
+        return self._build(circuit.num_qubits, gates, phase)
+
+    def _evolve(self, gates, num_qubits: int, vectors: np.ndarray, phase: complex = 1.0) -> np.ndarray:
+        """(2^n, m) のベクトルの組にゲート列を順に掛ける"""
+        n = num_qubits
+        tensor = vectors.reshape((2,) * n + (-1,))
+        for matrix, qubits in gates:
+            tensor = _contract(tensor, matrix, [n - 1 - q for q in qubits])
+        return phase * np.ascontiguousarray(tensor).reshape(2**n, -1)
+
+    def columns(self, circuit, columns) -> np.ndarray:
+        """ユニタリの指定した列だけを (2^n, len(columns)) で返す
+
+        列 j は基底状態 |j> に回路を作用させた状態なので、4^n の行列は作らない。
+        """
+        gates, _, phase = self._gates(circuit)
+        size = 2**circuit.num_qubits
+        columns = np.atleast_1d(columns)
+        vectors = np.zeros((size, columns.size), dtype=complex)
+        vectors[columns, np.arange(columns.size)] = 1
+        return self._evolve(gates, circuit.num_qubits, vectors, phase)
+
+    def matvec(self, circuit):
+        """v (長さ 2^n、または (2^n, m)) を受け取って U v を返す関数"""
+        gates, _, phase = self._gates(circuit)
+        num_qubits = circuit.num_qubits
+
+        def apply(v):
+            v = np.asarray(v, dtype=complex)
+            out = self._evolve(gates, num_qubits, v.reshape(2**num_qubits, -1), phase)
+            return out.reshape(v.shape)
+
+        return apply
+
+
+def build_unitary(circuit) -> np.ndarray:
+    """回路のユニタリ行列 (qiskit の Operator(circuit).data と同じ並び)"""
+    return UnitaryBuilder().unitary(circuit)
@@ -0,0 +1,66 @@
+# coding: utf-8
+"""テストで共通に使う回路と、カウントと厳密な分布の比較"""
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+
+def mixed_circuit(three_qubit_gates: bool = True) -> QuantumCircuit:
+    """いろいろなゲートと、global_phase のある部分回路を含む 5 量子ビットの回路"""
+    layer = QuantumCircuit(2)
+    layer.ry(0.4, 0)
+    layer.cx(0, 1)
+    layer.global_phase = 0.7
+    qc = QuantumCircuit(5)
+    qc.h(range(5))
+    qc.rx(0.3, 1)
+    qc.u(0.1, 0.2, 0.3, 4)
+    qc.t(2)
+    qc.p(0.5, 3)
+    qc.cx(0, 4)
+    qc.cp(0.6, 4, 1)
+    qc.rzz(0.8, 2, 3)
+    if three_qubit_gates:
+        # MPS は 2 量子ビットまでのゲートだけに対応している
+        qc.ccx(3, 0, 2)
+    qc.swap(1, 4)
+    qc.append(layer.to_gate(), [4, 2])
+    qc.ecr(0, 3)
+    qc.rxx(0.2, 1, 2)
+    return qc
+
+
+def clifford_circuit() -> QuantumCircuit:
+    qc = QuantumCircuit(6)
+    qc.h([0, 3])
+    qc.cx(0, 1)
+    qc.s(1)
+    qc.cx(1, 2)
+    qc.cx(3, 4)
+    qc.sdg(4)
+    qc.h(4)
+    qc.cz(4, 5)
+    qc.y(2)
+    return qc
+
+
+def total_variation(counts: dict[str, int], probs: np.ndarray) -> float:
+    """カウントの相対頻度と確率ベクトルの全変動距離"""
+    shots = sum(counts.values())
+    observed = np.zeros(probs.size)
+    for bits, count in counts.items():
+        observed[int(bits, 2)] = count / shots
+    return 0.5 * float(np.abs(observed - probs).sum())
+
+
+def check_run_counts(qc: QuantumCircuit, method: str, shots: int = 4000, **options) -> None:
+    """run_counts(method) のカウントが Statevector の分布に近く、shots=0 なら空になるか確かめる"""
+    from simulator import run_counts
+
+    measured = qc.copy()
+    measured.measure_all()
+    counts = run_counts(measured, shots=shots, seed=3, method=method, **options)
+    assert sum(counts.values()) == shots
+    assert total_variation(counts, Statevector(qc).probabilities()) < 0.05
+    assert run_counts(measured, shots=0, method=method, **options) == {}
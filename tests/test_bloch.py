@@ -0,0 +1,46 @@
+# coding: utf-8
+"""ブロッホベクトルを qiskit の縮約密度行列のパウリ期待値と比べ、画面なしで描けるか確かめる"""
+
+import os
+
+import numpy as np
+from qiskit.quantum_info import DensityMatrix, Pauli, partial_trace, random_statevector
+
+from simulator import bloch_vectors, reduced_bloch_vectors
+from simulator.bloch import render_bloch, write_frames
+
+PAULIS = [Pauli("X"), Pauli("Y"), Pauli("Z")]
+
+
+def _expected(rho: DensityMatrix) -> list[float]:
+    return [rho.expectation_value(P).real for P in PAULIS]
+
+
+def test_single_qubit_states_and_density_matrices():
+    states = np.array([random_statevector(2, seed=s).data for s in range(6)])
+    expected = [_expected(DensityMatrix(psi)) for psi in states]
+    assert np.allclose(bloch_vectors(states), expected, atol=1e-12)
+    rhos = np.array([0.7 * np.outer(psi, psi.conj()) + 0.15 * np.eye(2) for psi in states])
+    assert np.allclose(bloch_vectors(rhos), 0.7 * np.array(expected), atol=1e-12)
+
+
+def test_reduced_bloch_vectors_match_partial_trace():
+    states = np.array([random_statevector(8, seed=10 + s).data for s in range(4)])
+    vectors = reduced_bloch_vectors(states)
+    assert vectors.shape == (4, 3, 3)
+    for psi, per_qubit in zip(states, vectors):
+        for q in range(3):
+            reduced = partial_trace(DensityMatrix(psi), [p for p in range(3) if p != q])
+            assert np.allclose(per_qubit[q], _expected(reduced), atol=1e-12)
+    assert np.allclose(reduced_bloch_vectors(states, [2, 0]), vectors[:, [2, 0]])
+
+
+def test_render_and_frames(tmp_path):
+    vectors = reduced_bloch_vectors(np.array([random_statevector(4, seed=s).data for s in range(5)]))
+    path = str(tmp_path / "bloch.png")
+    figure = render_bloch(vectors, path, titles=["q0", "q1"], line=True)
+    assert len(figure.axes) == 2
+    assert os.path.getsize(path) > 0
+    paths = write_frames(vectors, str(tmp_path / "frames"), trail=2, dpi=20)
+    assert [os.path.basename(p) for p in paths] == [f"frame_{t:05d}.png" for t in range(5)]
+    assert all(os.path.getsize(p) > 0 for p in paths)
@@ -0,0 +1,69 @@
+# coding: utf-8
+"""StateCache のヒット・ミスの記録、LRU の追い出し、ディスクの層を確かめる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from simulator import StateCache, run_counts
+from simulator.cache import circuit_key
+
+
+def _circuit(angle: float) -> QuantumCircuit:
+    qc = QuantumCircuit(3)
+    qc.h(0)
+    qc.ry(angle, 1)
+    qc.cx(0, 2)
+    return qc
+
+
+def test_hits_and_misses():
+    cache = StateCache()
+    qc = _circuit(0.3)
+    probs = cache.probabilities(qc)
+    assert np.allclose(probs, Statevector(qc).probabilities())
+    assert cache.stats()[:3] == (0, 0, 1)
+    # 同じ構造の別オブジェクトと、末尾に測定を足した回路は同じキーになる
+    measured = _circuit(0.3)
+    measured.measure_all()
+    assert circuit_key(measured) == circuit_key(qc)
+    assert cache.probabilities(measured) is probs
+    assert cache.probabilities(_circuit(0.4)) is not probs
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+    assert stats.hit_rate == pytest.approx(1 / 3)
+    # 登録した配列は読み取り専用
+    assert not probs.flags.writeable
+
+
+def test_lru_eviction():
+    cache = StateCache(max_bytes=2 * 8 * 8)
+    for angle in (0.1, 0.2, 0.3):
+        cache.probabilities(_circuit(angle))
+    stats = cache.stats()
+    assert (stats.entries, stats.evictions, stats.nbytes) == (2, 1, 2 * 8 * 8)
+    assert circuit_key(_circuit(0.1)) not in cache
+    assert circuit_key(_circuit(0.3)) in cache
+
+
+def test_disk_layer(tmp_path):
+    qc = _circuit(0.5)
+    first = StateCache(directory=str(tmp_path))
+    probs = first.probabilities(qc)
+    second = StateCache(directory=str(tmp_path))
+    assert np.array_equal(second.probabilities(qc), probs)
+    assert second.stats().disk_hits == 1
+    second.clear()
+    assert len(second) == 0 and circuit_key(qc) in second
+
+
+def test_run_counts_uses_cache():
+    cache = StateCache()
+    qc = _circuit(0.7)
+    qc.measure_all()
+    a = run_counts(qc, shots=500, seed=1, method="statevector", cache=cache)
+    b = run_counts(qc, shots=500, seed=1, method="statevector", cache=cache)
+    assert a == b
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
@@ -0,0 +1,80 @@
+# coding: utf-8
+"""1量子ビットの ZYZ 分解と Clifford+T の認識を、行列に戻して確かめる"""
+
+import numpy as np
+from qiskit.circuit.library import RYGate, RZGate, UGate
+from qiskit.quantum_info import random_unitary
+
+from simulator import compile_single_qubit, zyz_angles
+from simulator.decompose import gate_sequence, recognize_clifford_t, u_parameters
+from simulator.gates import FIXED_1Q, gate_matrix
+
+SPECIAL = [
+    np.eye(2),
+    np.diag([1, 1j]),                      # θ = 0
+    np.array([[0, 1], [1, 0]]),            # θ = π
+    np.array([[0, -1j], [1j, 0]]),
+    np.exp(0.3j) * np.eye(2),
+]
+
+
+def _unitaries() -> np.ndarray:
+    randoms = [random_unitary(2, seed=s).data for s in range(20)]
+    return np.array(SPECIAL + randoms, dtype=complex)
+
+
+def test_zyz_round_trip():
+    U = _unitaries()
+    theta, phi, lam, phase = zyz_angles(U)
+    for i in range(len(U)):
+        rebuilt = np.exp(1j * phase[i]) * (
+            RZGate(phi[i]).to_matrix() @ RYGate(theta[i]).to_matrix() @ RZGate(lam[i]).to_matrix()
+        )
+        assert np.allclose(rebuilt, U[i], atol=1e-10)
+
+
+def test_u_parameters_round_trip():
+    U = _unitaries()
+    theta, phi, lam, phase = u_parameters(zyz_angles(U))
+    for i in range(len(U)):
+        rebuilt = np.exp(1j * phase[i]) * UGate(theta[i], phi[i], lam[i]).to_matrix()
+        assert np.allclose(rebuilt, U[i], atol=1e-10)
+
+
+def _sequence_matrix(sequence) -> np.ndarray:
+    matrix = np.eye(2, dtype=complex)
+    for name, params in sequence:
+        matrix = gate_matrix(name, params) @ matrix
+    return matrix
+
+
+def test_compile_clifford_t_and_generic():
+    rng = np.random.default_rng(0)
+    names = ["h", "s", "sdg", "x", "sx", "z"]
+    exact = []
+    for _ in range(30):
+        word = list(rng.choice(names, 6))
+        word.insert(int(rng.integers(7)), "t")
+        matrix = np.eye(2, dtype=complex)
+        for name in word:
+            matrix = FIXED_1Q[name] @ matrix
+        exact.append(np.exp(1j * rng.uniform(0, 2 * np.pi)) * matrix)
+    generic = [random_unitary(2, seed=100 + s).data for s in range(5)]
+    U = np.array(exact + generic)
+    compiled = compile_single_qubit(U)
+    assert np.all(compiled.index[:30] >= 0)
+    assert np.all(compiled.index[30:] == -1)
+    for i in range(len(U)):
+        sequence = gate_sequence(compiled, i)
+        if i < 30:
+            assert all(name in FIXED_1Q for name, _ in sequence)
+            assert sum(name in ("t", "tdg") for name, _ in sequence) <= 1
+        else:
+            assert [name for name, _ in sequence] == ["u"]
+        assert np.allclose(np.exp(1j * compiled.phase[i]) * _sequence_matrix(sequence), U[i], atol=1e-9)
+
+
+def test_two_t_gates_are_not_in_table():
+    T, H = FIXED_1Q["t"], FIXED_1Q["h"]
+    index, _ = recognize_clifford_t(np.array([T @ H @ T]))
+    assert index[0] == -1
@@ -0,0 +1,63 @@
+# coding: utf-8
+"""密度行列とチャネルの判定を qiskit の DensityMatrix / Kraus / Choi と比べる"""
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Choi, Kraus, partial_trace, state_fidelity
+from qiskit.quantum_info import DensityMatrix as QiskitDensityMatrix
+
+from circuits import check_run_counts, mixed_circuit
+from simulator import is_cptp, is_cptp_choi
+from simulator.checks import choi_matrix
+from simulator.density import amplitude_damping_kraus, depolarizing_kraus, run_density_matrix
+
+
+def _circuit() -> QuantumCircuit:
+    qc = QuantumCircuit(3)
+    qc.h(0)
+    qc.cx(0, 2)
+    qc.ry(0.7, 1)
+    qc.cp(0.3, 1, 2)
+    return qc
+
+
+def test_kraus_channels_match_qiskit():
+    qc = _circuit()
+    ours = run_density_matrix(qc)
+    theirs = QiskitDensityMatrix(qc)
+    assert np.allclose(ours.to_matrix(), theirs.data, atol=1e-12)
+    for kraus, qubits in [(amplitude_damping_kraus(0.3), [2]), (depolarizing_kraus(0.2, 2), [0, 1]),
+                          (depolarizing_kraus(0.1), [1])]:
+        ours.apply_kraus(kraus, qubits)
+        theirs = theirs.evolve(Kraus(kraus), qubits)
+        assert np.allclose(ours.to_matrix(), theirs.data, atol=1e-12)
+    assert ours.is_valid()
+    assert np.isclose(ours.purity(), theirs.purity().real)
+
+
+def test_run_counts():
+    check_run_counts(mixed_circuit(), "density_matrix")
+
+
+def test_partial_trace_and_fidelity():
+    qc = _circuit()
+    rho = run_density_matrix(qc).apply_kraus(amplitude_damping_kraus(0.4), [0])
+    theirs = QiskitDensityMatrix(rho.to_matrix())
+    reduced = rho.partial_trace([0, 2])
+    assert np.allclose(reduced.to_matrix(), partial_trace(theirs, [1]).data, atol=1e-12)
+    sigma = run_density_matrix(qc)
+    assert np.isclose(rho.fidelity(sigma), state_fidelity(theirs, QiskitDensityMatrix(sigma.to_matrix())))
+
+
+def test_choi_and_cptp():
+    kraus = amplitude_damping_kraus(0.3)
+    assert np.allclose(choi_matrix(kraus), Choi(Kraus(kraus)).data)
+    assert is_cptp(kraus)
+    assert not is_cptp([0.9 * K for K in kraus])
+    assert is_cptp_choi(choi_matrix(depolarizing_kraus(0.2, 2)))
+    # 転置はトレースを保つが完全正値ではない
+    transpose = np.zeros((4, 4))
+    for i in range(2):
+        for j in range(2):
+            transpose[2 * i + j, 2 * j + i] = 1
+    assert not is_cptp_choi(transpose)
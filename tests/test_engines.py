@@ -0,0 +1,51 @@
+# coding: utf-8
+"""状態ベクトルを作るエンジンを qiskit の Statevector と比べる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector, random_statevector
+
+from circuits import check_run_counts, clifford_circuit, mixed_circuit
+from simulator import run_counts
+from simulator.stabilizer import run_stabilizer
+from simulator.statevector import hadamard_layer, run_statevector
+
+
+def test_statevector_matches_qiskit():
+    qc = mixed_circuit()
+    assert np.allclose(run_statevector(qc), Statevector(qc).data, atol=1e-12)
+
+
+def test_stabilizer_support_matches_statevector():
+    qc = clifford_circuit()
+    probs = Statevector(qc).probabilities()
+    packed = run_stabilizer(qc).sample_packed(2000, seed=1)
+    assert set(packed[:, 0].tolist()) == set(np.flatnonzero(probs > 1e-12).tolist())
+
+
+@pytest.mark.parametrize("method", ["statevector", "stabilizer"])
+def test_run_counts_methods(method):
+    qc = clifford_circuit() if method == "stabilizer" else mixed_circuit()
+    check_run_counts(qc, method)
+
+
+def test_automatic_uses_stabilizer_for_large_clifford():
+    qc = QuantumCircuit(80)
+    qc.h(0)
+    for q in range(79):
+        qc.cx(q, q + 1)
+    qc.measure_all()
+    counts = run_counts(qc, shots=1000, seed=2)
+    assert set(counts) == {"0" * 80, "1" * 80}
+    assert 400 < counts["0" * 80] < 600
+
+
+@pytest.mark.parametrize("qubits", [[0, 1, 2, 3, 4], [3, 1], [4]])
+def test_hadamard_layer_matches_kron(qubits):
+    psi = random_statevector(32, seed=4).data
+    H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
+    full = np.eye(1)
+    for q in reversed(range(5)):
+        full = np.kron(full, H if q in qubits else np.eye(2))
+    assert np.allclose(hadamard_layer(psi.copy(), qubits), full @ psi, atol=1e-12)
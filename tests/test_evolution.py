@@ -0,0 +1,51 @@
+# coding: utf-8
+"""クリロフ法・トロッター分解の時間発展を scipy の expm と比べる"""
+
+import numpy as np
+import scipy.linalg
+
+from simulator import IsingHamiltonian, krylov_evolve
+from simulator.evolution import trotter_evolve
+
+
+def _hamiltonian():
+    return IsingHamiltonian.maxcut(6, [0, 1, 2, 3, 4, 0], [1, 2, 3, 4, 5, 3], [1, 2, 1, 1, 3, 2], field=0.7)
+
+
+def _dense(H):
+    return np.diag(H.diagonal) + sum(
+        H.field * np.kron(np.kron(np.eye(2**(5 - q)), [[0, 1], [1, 0]]), np.eye(2**q)) for q in range(6)
+    )
+
+
+def test_krylov_matches_expm():
+    H = _hamiltonian()
+    dense = _dense(H)
+    psi = np.full(64, 1 / 8, dtype=complex)
+    times = [0.5, 1.0, 2.0]
+    result = krylov_evolve(H, psi, times, tol=1e-10)
+    for t, state in zip(times, result.states):
+        assert np.allclose(state, scipy.linalg.expm(-1j * t * dense) @ psi, atol=1e-8)
+
+
+def test_observables_without_states():
+    H = _hamiltonian()
+    psi = np.full(64, 1 / 8, dtype=complex)
+    times = [0.0, 1.0]
+    result = krylov_evolve(H, psi, times, observables=[H, H.diagonal], tol=1e-10, store_states=False)
+    assert result.states is None
+    # エネルギーは保存し、t=0 の対角部分の期待値は平均値
+    assert np.allclose(result.observables[:, 0], H.expectation(psi), atol=1e-8)
+    assert np.isclose(result.observables[0, 1], H.diagonal.mean())
+
+
+def test_trotter_converges_to_expm():
+    H = _hamiltonian()
+    dense = _dense(H)
+    psi = np.full(64, 1 / 8, dtype=complex)
+    exact = scipy.linalg.expm(-1j * dense) @ psi
+    errors = [np.linalg.norm(trotter_evolve(H, psi, [1.0], steps_per_unit=steps).states[-1] - exact)
+              for steps in (10, 20)]
+    # 対称分解 (order=2) の誤差は Δt^2 に比例する
+    assert errors[1] < 1e-2
+    assert 3 < errors[0] / errors[1] < 5
@@ -0,0 +1,47 @@
+# coding: utf-8
+"""Grover の状態を、オラクルと拡散を密な行列で掛けた結果と比べる"""
+
+import numpy as np
+import pytest
+
+from algorithms.grover import grover_state, marked_indices, optimal_iterations, run_grover
+
+
+def _dense(num_qubits: int, marked, iterations: int) -> np.ndarray:
+    size = 2**num_qubits
+    s = np.full(size, 1 / np.sqrt(size))
+    oracle = np.ones(size)
+    oracle[marked] = -1
+    psi = s.copy()
+    for _ in range(iterations):
+        psi = oracle * psi
+        psi = 2 * s * (s @ psi) - psi
+    return psi
+
+
+@pytest.mark.parametrize("iterations", [0, 1, 3, 7])
+def test_state_matches_dense(iterations):
+    marked = np.array([3, 17, 40])
+    assert np.allclose(grover_state(6, marked, iterations), _dense(6, marked, iterations), atol=1e-12)
+
+
+def test_callable_oracle_and_success():
+    # 10 量子ビットのうち 7 の倍数を探す
+    def oracle(z):
+        return z % 7 == 0
+
+    mask = np.arange(2**10) % 7 == 0
+    assert np.array_equal(marked_indices(10, oracle, chunk=100), np.flatnonzero(mask))
+    psi, result = run_grover(10, oracle)
+    assert result.num_marked == mask.sum()
+    assert result.iterations == optimal_iterations(10, int(mask.sum()))
+    assert np.isclose(result.success_probability, result.theoretical_probability)
+    assert np.isclose(np.sum(psi**2), 1)
+
+
+def test_float32():
+    marked = np.array([5])
+    psi, result = run_grover(12, np.arange(2**12) == 5, dtype=np.float32)
+    assert psi.dtype == np.float32
+    assert result.success_probability > 0.99
+    assert np.allclose(psi, _dense(12, marked, result.iterations), atol=1e-5)
@@ -0,0 +1,16 @@
+# coding: utf-8
+"""import の時間と、import 時に重いライブラリや表の計算をしないことの確認 (tools/check_imports.py)"""
+
+import pytest
+
+from tools.check_imports import modules, measure
+
+BUDGET = 0.1
+
+
+@pytest.mark.parametrize("module", modules())
+def test_import_is_light(module):
+    result = measure(module)
+    assert not result["heavy"]
+    assert result["lazy"]
+    assert result["seconds"] <= BUDGET
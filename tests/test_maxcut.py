@@ -0,0 +1,33 @@
+# coding: utf-8
+"""algorithms/maxcut.py のグラフが再現でき、QAOA とイジングハミルトニアンのカット値が一致するかの確認"""
+
+import numpy as np
+import pytest
+
+from algorithms import create_random_graph, graph_to_edges, maxcut_diagonal
+from simulator import IsingHamiltonian
+
+
+def test_random_graph_is_reproducible():
+    state = np.random.get_state()[1].copy()
+    G = create_random_graph(8, seed=3)
+    H = create_random_graph(8, seed=3)
+    assert list(G.edges(data="weight")) == list(H.edges(data="weight"))
+    assert all(1 <= w <= 9 for _, _, w in G.edges(data="weight"))
+    # グローバルな乱数の状態は変えない
+    assert np.array_equal(np.random.get_state()[1], state)
+
+
+def test_cut_values_agree():
+    n, u, v, w = graph_to_edges(create_random_graph(6, seed=1))
+    H = IsingHamiltonian.maxcut(n, u, v, w)
+    assert np.allclose(H.diagonal, -maxcut_diagonal(n, u, v, w))
+
+
+def test_amplify_hamiltonian():
+    pytest.importorskip("amplify")
+    from algorithms import build_maxcut_hamiltonian
+
+    G = create_random_graph(5, seed=0)
+    energy, spins = build_maxcut_hamiltonian(G)
+    assert len(spins) == 5
@@ -0,0 +1,47 @@
+# coding: utf-8
+"""ディスク上の状態ベクトルを qiskit の Statevector と比べる"""
+
+import os
+
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from circuits import check_run_counts, mixed_circuit
+from simulator.memmap import MemmapStatevector
+
+
+def test_statevector_matches_qiskit():
+    qc = mixed_circuit()
+    # チャンクを 3 量子ビットにして、上位ビットの入れ替えも通す
+    with MemmapStatevector(qc.num_qubits, chunk_qubits=3) as sim:
+        assert np.allclose(sim.evolve(qc).to_array(), Statevector(qc).data, atol=1e-12)
+
+
+def test_run_counts_with_swapped_layout(tmp_path):
+    check_run_counts(mixed_circuit(), "memmap", chunk_qubits=3, directory=tmp_path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_gate_wider_than_chunk():
+    with MemmapStatevector(4, chunk_qubits=2) as sim:
+        with pytest.raises(ValueError):
+            sim.apply(np.eye(8), [0, 1, 3])
+
+
+def test_file_and_close(tmp_path):
+    with MemmapStatevector(3, directory=tmp_path) as sim:
+        assert os.path.dirname(sim.path) == str(tmp_path)
+        assert os.path.exists(sim.path)
+        sim.close()
+        assert not os.path.exists(sim.path)
+    # with を抜けたときの2回目の close はなにもしない
+    sim.close()
+
+
+def test_explicit_path_is_kept(tmp_path):
+    path = str(tmp_path / "state.amp")
+    with MemmapStatevector(2, path=path) as sim:
+        sim.apply(np.array([[0, 1], [1, 0]]), [1])
+    assert os.path.exists(path)
+    assert np.allclose(np.fromfile(path, dtype=np.complex128), [0, 0, 1, 0])
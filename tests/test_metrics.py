@@ -0,0 +1,47 @@
+# coding: utf-8
+"""分布の比較を qiskit の hellinger_fidelity と素直な計算に比べる"""
+
+import numpy as np
+from qiskit.quantum_info import hellinger_fidelity
+
+from simulator import bootstrap, compare
+from simulator.metrics import align
+
+
+def test_compare_matches_hellinger_fidelity():
+    counts = [{"00": 480, "11": 520}, {"00": 300, "01": 100, "11": 600}]
+    ideal = {"00": 0.5, "11": 0.5}
+    metrics = compare(counts, ideal)
+    for c, fidelity in zip(counts, metrics.classical_fidelity):
+        assert np.isclose(fidelity, hellinger_fidelity(c, {"00": 500, "11": 500}))
+
+
+def test_compare_matches_direct_formulas():
+    counts = {"000": 10, "011": 30, "101": 60}
+    ideal = np.array([0.2, 0, 0, 0.3, 0, 0.5, 0, 0])
+    p = np.array([0.1, 0, 0, 0.3, 0, 0.6, 0, 0])
+    metrics = compare([counts], ideal, num_bits=3)
+    assert np.isclose(metrics.total_variation[0], 0.5 * np.abs(p - ideal).sum())
+    assert np.isclose(metrics.hellinger_distance[0], np.sqrt(1 - np.sum(np.sqrt(p * ideal))))
+    support = p > 0
+    assert np.isclose(metrics.kl_divergence[0], np.sum(p[support] * np.log(p[support] / ideal[support])))
+    # 8 個の理想確率の中央値は 0 なので、重い出力は 000, 011, 101
+    assert np.isclose(metrics.heavy_output_probability[0], 1.0)
+
+
+def test_align_integer_and_string_keys():
+    keys, (a, b) = align({"0 1": 3, 2: 1}, [{1: 2}, {"11": 4}])
+    assert keys.tolist() == [1, 2, 3]
+    assert a.tolist() == [[3, 1, 0]]
+    assert b.tolist() == [[2, 0, 0], [0, 0, 4]]
+
+
+def test_bootstrap_interval_contains_estimate():
+    ideal = np.array([0.5, 0.5])
+    counts = np.array([[4600, 5400], [5000, 5000]])
+    low, high = bootstrap(counts, ideal, resamples=400, seed=0, max_bytes=8 * 4 * 50)
+    point = compare(list(counts), ideal).total_variation
+    assert low[0] <= point[0] <= high[0]
+    assert high[0] - low[0] < 0.03
+    # 理想分布どおりのカウントでも、引き直した全変動距離は正に偏る
+    assert point[1] == 0 and high[1] < 0.03
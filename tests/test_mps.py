@@ -0,0 +1,58 @@
+# coding: utf-8
+"""MPS シミュレータを qiskit の Statevector と比べ、切り捨ての記録を確かめる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from circuits import check_run_counts, mixed_circuit
+from simulator.mps import run_mps
+
+
+def _brickwork() -> QuantumCircuit:
+    qc = QuantumCircuit(8)
+    for layer in range(3):
+        for q in range(8):
+            qc.ry(0.3 + 0.1 * q + layer, q)
+        for q in range(layer % 2, 7, 2):
+            qc.cx(q, q + 1)
+    return qc
+
+
+def test_statevector_matches_qiskit():
+    # MPS は 2 量子ビットまでのゲートだけに対応している
+    qc = mixed_circuit(three_qubit_gates=False)
+    assert np.allclose(run_mps(qc).to_statevector(), Statevector(qc).data, atol=1e-12)
+
+
+def test_run_counts():
+    check_run_counts(mixed_circuit(three_qubit_gates=False), "matrix_product_state")
+
+
+@pytest.mark.parametrize("max_bond", [2, 4])
+def test_truncation_error_and_fidelity_estimate(max_bond):
+    qc = _brickwork()
+    mps = run_mps(qc, max_bond=max_bond)
+    assert max(mps.bond_dimensions) <= max_bond
+    fidelity = abs(np.vdot(Statevector(qc).data, mps.to_statevector())) ** 2
+    assert np.isclose(mps.fidelity_estimate, fidelity, atol=1e-10)
+    if max_bond == 2:
+        assert mps.truncation_error > 1e-3
+        assert mps.fidelity_estimate < 1
+    else:
+        # 結合次元 4 で厳密に表せるので、何も捨てない
+        assert mps.truncation_error < 1e-12
+        assert mps.fidelity_estimate == pytest.approx(1.0)
+
+
+def test_ghz_beyond_statevector_size():
+    qc = QuantumCircuit(60)
+    qc.h(0)
+    for q in range(59):
+        qc.cx(q, q + 1)
+    mps = run_mps(qc, max_bond=2)
+    assert mps.bond_dimensions == [2] * 59
+    assert mps.truncation_error < 1e-12
+    counts = mps.sample_counts(200, seed=1)
+    assert set(counts) <= {"0" * 60, "1" * 60}
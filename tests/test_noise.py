@@ -0,0 +1,67 @@
+# coding: utf-8
+"""量子軌跡の平均を、同じノイズを密度行列で計算した結果と比べる"""
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from circuits import total_variation
+from simulator import NoiseModel, run_trajectories
+from simulator.circuit import split_measurements, to_operations
+from simulator.density import run_density_matrix
+from simulator.noise import apply_readout_error, trajectory_states
+
+NOISE = NoiseModel(depolarizing=0.05, depolarizing_2q=0.1, amplitude_damping=0.08)
+
+
+def _circuit() -> QuantumCircuit:
+    qc = QuantumCircuit(3)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.ry(0.9, 2)
+    qc.cx(1, 2)
+    qc.t(0)
+    qc.h(2)
+    return qc
+
+
+def _gates(qc):
+    num_qubits, ops = to_operations(qc)
+    return num_qubits, split_measurements(ops)[0]
+
+
+def test_noiseless_trajectories_are_the_statevector():
+    qc = _circuit()
+    states = trajectory_states(*_gates(qc), NoiseModel(), 4, seed=0)
+    assert np.allclose(states, Statevector(qc).data[None, :], atol=1e-12)
+
+
+def test_trajectory_average_matches_density_matrix():
+    qc = _circuit()
+    states = trajectory_states(*_gates(qc), NOISE, 20000, seed=1)
+    rho = np.einsum("ti,tj->ij", states, states.conj()) / len(states)
+    exact = run_density_matrix(qc, NOISE)
+    assert np.abs(rho - exact.to_matrix()).max() < 0.02
+    assert 0.5 * np.abs(np.diag(rho).real - exact.probabilities()).sum() < 0.02
+
+
+def test_counts_match_density_matrix():
+    qc = _circuit()
+    qc.measure_all()
+    noise = NOISE._replace(readout_error=(0.02, 0.05))
+    # 各ビットの読み出し誤りは混同行列のテンソル積
+    confusion = np.array([[0.98, 0.05], [0.02, 0.95]])
+    readout = np.kron(np.kron(confusion, confusion), confusion)
+    probs = readout @ run_density_matrix(qc.remove_final_measurements(inplace=False), NOISE).probabilities()
+    # max_bytes を小さくして軌跡を複数のバッチに分ける
+    counts = run_trajectories(qc, noise, shots=8000, trajectories=2000, seed=3, max_bytes=16 * 8 * 300)
+    assert sum(counts.values()) == 8000
+    assert total_variation(counts, probs) < 0.04
+
+
+def test_readout_error_rates():
+    values = np.zeros(100000, dtype=np.int64)
+    values[50000:] = 1
+    flipped = apply_readout_error(values, 1, (0.1, 0.3), seed=4)
+    assert abs(np.mean(flipped[:50000]) - 0.1) < 0.01
+    assert abs(np.mean(flipped[50000:] == 0) - 0.3) < 0.01
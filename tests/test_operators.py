@@ -0,0 +1,77 @@
+# coding: utf-8
+"""構造付きの演算子を qiskit の Operator / Statevector と比べる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import CRYGate, CXGate, SwapGate, TGate, UGate, YGate
+from qiskit.quantum_info import Operator, Statevector, random_statevector
+
+from circuits import mixed_circuit
+from simulator.operators import (Controlled, Diagonal, Kronecker, Permutation, apply_operators,
+                                 circuit_operators, gate_operator)
+
+
+def _embedded(gate, qubits, num_qubits: int) -> np.ndarray:
+    qc = QuantumCircuit(num_qubits)
+    qc.append(gate, qubits)
+    return Operator(qc).data
+
+
+@pytest.mark.parametrize("gate, qubits, kind", [
+    (TGate(), [2], Diagonal),
+    (YGate(), [1], Permutation),
+    (CXGate(), [3, 0], Permutation),
+    (SwapGate(), [1, 3], Permutation),
+    (CRYGate(0.7), [0, 2], Controlled),
+    (UGate(0.1, 0.2, 0.3), [3], None),
+])
+def test_gate_operator_structure(gate, qubits, kind):
+    op = gate_operator(Operator(gate).data, qubits, 4)
+    U = _embedded(gate, qubits, 4)
+    assert np.allclose(op.to_matrix(), U, atol=1e-12)
+    assert np.allclose(op.adjoint().to_matrix(), U.conj().T, atol=1e-12)
+    if kind is Controlled:
+        assert isinstance(op, Controlled)
+    elif kind is not None:
+        # 置換と対角は k 量子ビットの因子のまま持つ
+        assert isinstance(op, Kronecker)
+        (factor, support), = op.factors
+        assert isinstance(factor, kind) and factor.num_qubits == len(qubits)
+
+
+def test_compose_keeps_structure():
+    t = gate_operator(Operator(TGate()).data, [0], 3)
+    s = gate_operator(Operator(TGate().power(2)).data, [2], 3)
+    cx = gate_operator(Operator(CXGate()).data, [0, 1], 3)
+    product = cx @ s @ t
+    assert isinstance(product, Kronecker)
+    expected = (_embedded(CXGate(), [0, 1], 3) @ _embedded(TGate().power(2), [2], 3)
+                @ _embedded(TGate(), [0], 3))
+    assert np.allclose(product.to_matrix(), expected, atol=1e-12)
+    assert isinstance(Diagonal([1, 1j]) @ Diagonal([1j, -1]), Diagonal)
+
+
+def test_circuit_operators_match_statevector():
+    qc = mixed_circuit()
+    operators = circuit_operators(qc, max_local=3)
+    assert len(operators) < len(qc.data)
+    psi = random_statevector(32, seed=2).data
+    assert np.allclose(apply_operators(operators, psi), Operator(qc).data @ psi, atol=1e-12)
+
+
+def test_large_circuit_stays_local():
+    # 2^n の配列を作らずに組み立てられる (作るのは apply のときだけ)
+    n = 16
+    qc = QuantumCircuit(n)
+    qc.h(range(n))
+    for q in range(n - 1):
+        qc.cx(q, q + 1)
+        qc.t(q)
+    qc.ccx(0, 5, 15)
+    operators = circuit_operators(qc, max_local=4)
+    for op in operators:
+        if isinstance(op, Kronecker):
+            assert all(len(support) <= 4 for _, support in op.factors)
+    state = apply_operators(operators, np.eye(1, 2**n, dtype=complex)[0])
+    assert np.allclose(state, Statevector(qc).data, atol=1e-10)
@@ -0,0 +1,23 @@
+# coding: utf-8
+"""共有メモリの並列状態ベクトルを qiskit の Statevector と逐次版の結果と比べる"""
+
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from circuits import check_run_counts, mixed_circuit
+from simulator.parallel import run_parallel
+from simulator.statevector import run_statevector
+
+
+@pytest.mark.parametrize("processes", [1, 2, 4])
+def test_statevector_matches_qiskit(processes):
+    qc = mixed_circuit()
+    state = run_parallel(qc, processes=processes)
+    assert np.allclose(state, Statevector(qc).data, atol=1e-12)
+    # ゲートの計算は逐次版と同じなので、結果はビット単位で一致する
+    assert np.array_equal(state, run_statevector(qc))
+
+
+def test_run_counts():
+    check_run_counts(mixed_circuit(), "parallel", processes=2)
@@ -0,0 +1,68 @@
+# coding: utf-8
+"""PauliSum を qiskit の SparsePauliOp と比べ、グループ分けとサンプリングによる推定を確かめる"""
+
+import numpy as np
+from qiskit.quantum_info import Pauli, SparsePauliOp, random_statevector
+
+from simulator import PauliSum
+
+
+def _random_terms(num_qubits: int, count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    labels = ["".join(rng.choice(list("IXYZ"), num_qubits)) for _ in range(count)]
+    return labels, rng.normal(size=count)
+
+
+def _expectation(psi: np.ndarray, label: str) -> complex:
+    return np.vdot(psi, Pauli(label).to_matrix() @ psi)
+
+
+def test_pauli_sum_matches_sparse_pauli_op():
+    labels, coeffs = _random_terms(6, 40, seed=0)
+    H = PauliSum.from_list(list(zip(labels, coeffs)))
+    matrix = SparsePauliOp(labels, coeffs).to_matrix()
+    psi = random_statevector(64, seed=1).data
+    assert np.allclose(H.apply(psi), matrix @ psi, atol=1e-12)
+    assert np.isclose(H.expectation(psi), np.vdot(psi, matrix @ psi).real)
+
+
+def test_batched_term_expectations():
+    # x マスクが同じ項が多いとウォルシュ・アダマール変換、少ないと項ごとの和になる
+    labels = ["ZZIZ", "IZZI", "ZIIZ", "IIZZ", "ZZZZ", "IIII", "XIYZ", "YXII", "IXZY"]
+    H = PauliSum.from_list([(label, 1.0) for label in labels])
+    states = np.stack([random_statevector(16, seed=s).data for s in range(3)])
+    expected = [[_expectation(psi, label) for label in labels] for psi in states]
+    assert np.allclose(H.term_expectations(states), expected, atol=1e-12)
+    assert np.allclose(H.expectation(states), np.sum(expected, axis=1).real, atol=1e-12)
+
+
+def test_grouping_is_qubitwise_commuting():
+    labels, coeffs = _random_terms(5, 30, seed=2)
+    H = PauliSum.from_list(list(zip(labels, coeffs)))
+    groups = H.group_qubitwise()
+    assert sorted(np.concatenate(groups).tolist()) == list(range(len(labels)))
+    for group in groups:
+        basis = H.measurement_basis(group)
+        for k in group:
+            assert all(c in ("I", b) for c, b in zip(labels[k], basis))
+    commute = H.commutation_matrix()
+    for i in range(len(labels)):
+        for j in range(len(labels)):
+            assert commute[i, j] == Pauli(labels[i]).commutes(Pauli(labels[j]))
+
+
+def test_estimate_from_counts():
+    labels, coeffs = _random_terms(4, 12, seed=3)
+    H = PauliSum.from_list(list(zip(labels, coeffs)))
+    psi = random_statevector(16, seed=4).data
+    groups, counts = H.sample_groups(psi, 20000, seed=5)
+    energy, error = H.estimate_from_counts(groups, counts)
+    assert 0 < error < 0.1
+    assert abs(energy - H.expectation(psi)) < 5 * error
+    # 計算基底の状態と Z だけの項なら推定は厳密で、誤差は 0
+    Z = PauliSum.from_list([("ZIZI", 0.5), ("IZZI", -1.0), ("IIIZ", 2.0)])
+    basis = np.zeros(16)
+    basis[0b0101] = 1
+    groups, counts = Z.sample_groups(basis, 100, seed=0)
+    assert len(groups) == 1
+    assert Z.estimate_from_counts(groups, counts) == (Z.expectation(basis), 0.0)
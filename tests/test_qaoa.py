@@ -0,0 +1,55 @@
+# coding: utf-8
+"""QAOA の状態とカット値を qiskit の回路 (RZZ と RX の層) と比べる"""
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from algorithms.qaoa import expected_cut, maxcut_diagonal, optimize_qaoa, qaoa_states
+
+# 5 頂点の重み付きグラフ
+NODES = 5
+U = np.array([0, 0, 1, 2, 3, 1])
+V = np.array([1, 2, 3, 4, 4, 4])
+W = np.array([1.0, 2.0, 1.5, 0.5, 3.0, 1.0])
+
+
+def _circuit(gammas, betas) -> QuantumCircuit:
+    """e^{-iγC} (C = Σ w (1 - Z_u Z_v) / 2) と e^{-iβ Σ X} を交互に掛ける回路"""
+    qc = QuantumCircuit(NODES)
+    qc.h(range(NODES))
+    for gamma, beta in zip(gammas, betas):
+        for u, v, w in zip(U, V, W):
+            # e^{-iγw/2} e^{iγw Z_u Z_v / 2} = e^{-iγw/2} RZZ(-γw)
+            qc.rzz(-gamma * w, int(u), int(v))
+            qc.global_phase -= gamma * w / 2
+        qc.rx(2 * beta, range(NODES))
+    return qc
+
+
+def test_cut_diagonal():
+    diagonal = maxcut_diagonal(NODES, U, V, W, chunk=8)
+    for z in range(2**NODES):
+        bits = [(z >> q) & 1 for q in range(NODES)]
+        assert diagonal[z] == sum(w for u, v, w in zip(U, V, W) if bits[u] != bits[v])
+
+
+def test_states_match_circuit():
+    diagonal = maxcut_diagonal(NODES, U, V, W)
+    gammas = np.array([[0.3, 0.7], [1.1, 0.2], [0.0, 0.0]])
+    betas = np.array([[0.5, 0.1], [0.4, 0.9], [0.0, 0.0]])
+    states = qaoa_states(diagonal, gammas, betas)
+    for g, b, psi in zip(gammas, betas, states):
+        assert np.allclose(psi, Statevector(_circuit(g, b)).data, atol=1e-12)
+    # max_bytes を小さくしてバッチを分けても同じ値になる
+    values = expected_cut(diagonal, gammas, betas, max_bytes=16 * 2**NODES)
+    assert np.allclose(values, (np.abs(states) ** 2) @ diagonal)
+    assert np.isclose(values[2], diagonal.mean())
+
+
+def test_optimize_on_cycle():
+    diagonal = maxcut_diagonal(4, [0, 1, 2, 3], [1, 2, 3, 0], np.ones(4))
+    result = optimize_qaoa(diagonal, layers=2, seed=0)
+    assert result.max_cut == 4
+    assert result.approximation_ratio > 0.9
+    assert np.isclose(expected_cut(diagonal, result.gammas, result.betas)[0], result.expected_cut)
@@ -0,0 +1,64 @@
+# coding: utf-8
+"""tools/run_cells.py が変更したセルとその下流だけを実行し直すか確かめる"""
+
+import os
+
+from tools.run_cells import cell_keys, run_script, split_cells
+
+SCRIPT = """\
+import numpy as np
+
+# In[1]:
+
+def double(x):
+    return 2 * x
+
+base = np.arange(3)
+
+# In[2]:
+
+scale = {scale}
+print("scale", scale)
+
+# In[3]:
+
+print("independent")
+
+# In[4]:
+
+print("result", double(base) * scale)
+"""
+
+
+def _run(path, cache, capsys, monkeypatch):
+    # run_script はスクリプトのディレクトリに移動するので、元に戻す
+    monkeypatch.chdir(os.getcwd())
+    status = dict(run_script(str(path), str(cache)))
+    return status, capsys.readouterr().out
+
+
+def test_only_changed_cells_and_downstream_rerun(tmp_path, capsys, monkeypatch):
+    path, cache = tmp_path / "notebook.py", tmp_path / "cache"
+    path.write_text(SCRIPT.format(scale=2), encoding="utf-8")
+    status, first = _run(path, cache, capsys, monkeypatch)
+    assert set(status.values()) == {"run"}
+    assert "result [0 4 8]" in first
+
+    # 変更がなければすべてキャッシュから出力と値を復元する
+    status, second = _run(path, cache, capsys, monkeypatch)
+    assert set(status.values()) == {"cached"}
+    assert second == first
+
+    path.write_text(SCRIPT.format(scale=5), encoding="utf-8")
+    status, third = _run(path, cache, capsys, monkeypatch)
+    assert status == {"preamble": "cached", "1": "cached", "2": "run", "3": "cached", "4": "run"}
+    assert "result [ 0 10 20]" in third
+
+
+def test_keys_follow_dependencies():
+    cells = split_cells(SCRIPT.format(scale=2))
+    assert [c.label for c in cells] == ["preamble", "1", "2", "3", "4"]
+    assert {"double", "base"} <= cells[1].defines
+    changed = cell_keys(split_cells(SCRIPT.format(scale=3)))
+    same = [a == b for a, b in zip(cell_keys(cells), changed)]
+    assert same == [True, True, False, True, False]
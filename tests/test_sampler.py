@@ -0,0 +1,69 @@
+# coding: utf-8
+"""FastSampler の結果の形を qiskit の StatevectorSampler と比べる"""
+
+import numpy as np
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+from qiskit.circuit import Parameter
+from qiskit.primitives import StatevectorSampler
+
+from simulator.sampler import FastSampler
+
+
+def _registers() -> QuantumCircuit:
+    # 決定的な結果になる回路で、レジスタごとのビットの並びを比べる
+    qc = QuantumCircuit(QuantumRegister(4), ClassicalRegister(3, "low"), ClassicalRegister(2, "high"))
+    qc.x([0, 2, 3])
+    qc.measure([0, 1, 2], [0, 2, 1])
+    qc.measure([3, 0], [4, 3])
+    return qc
+
+
+def test_register_layout_matches_statevector_sampler():
+    qc = _registers()
+    ours = FastSampler(seed=1).run([qc], shots=10).result()[0]
+    theirs = StatevectorSampler(seed=1).run([qc], shots=10).result()[0]
+    assert list(ours.data) == list(theirs.data)
+    for name in theirs.data:
+        assert ours.data[name].num_bits == theirs.data[name].num_bits
+        assert ours.data[name].get_counts() == theirs.data[name].get_counts()
+        assert np.array_equal(ours.data[name].array, theirs.data[name].array)
+
+
+def test_measure_all_and_parameter_shape():
+    theta = Parameter("θ")
+    qc = QuantumCircuit(2)
+    qc.ry(theta, 0)
+    qc.cx(0, 1)
+    qc.measure_all()
+    values = np.array([[0.0], [np.pi]])
+    ours = FastSampler(seed=1).run([(qc, values)], shots=20).result()[0]
+    theirs = StatevectorSampler(seed=1).run([(qc, values)], shots=20).result()[0]
+    assert list(ours.data) == list(theirs.data) == ["meas"]
+    assert ours.data.meas.shape == theirs.data.meas.shape == (2,)
+    assert ours.data.meas.num_shots == theirs.data.meas.num_shots == 20
+    for loc in range(2):
+        assert ours.data.meas.get_counts(loc) == theirs.data.meas.get_counts(loc)
+
+
+def test_pool_and_serial_agree():
+    circuits = []
+    for i in range(3):
+        qc = QuantumCircuit(3)
+        qc.ry(0.4 * (i + 1), 0)
+        qc.cx(0, 2)
+        qc.measure_all()
+        circuits.append(qc)
+    serial = FastSampler(seed=5, processes=1).run(circuits).result()
+    pooled = FastSampler(seed=5, processes=2, parallel_work=0).run(circuits).result()
+    for a, b in zip(serial, pooled):
+        assert a.data.meas.get_counts() == b.data.meas.get_counts()
+
+
+def test_zero_shots():
+    qc = QuantumCircuit(2)
+    qc.h(0)
+    qc.measure_all()
+    result = FastSampler(default_shots=100).run([qc, (qc, None, 0)], shots=0).result()
+    for pub in result:
+        assert pub.data.meas.num_shots == 0
+        assert pub.data.meas.get_counts() == {}
@@ -0,0 +1,78 @@
+# coding: utf-8
+"""ShotRecord の集計を、同じショットを素直に数えた結果と比べる"""
+
+import os
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from circuits import total_variation
+from simulator import ShotRecord, record_shots
+
+
+def _bits(values: np.ndarray, bits) -> np.ndarray:
+    return sum(((values >> b) & 1) << i for i, b in enumerate(bits))
+
+
+def test_incremental_counts_match_unique():
+    rng = np.random.default_rng(0)
+    chunks = [rng.integers(0, 2**10, size=size) for size in (1000, 1, 2500)]
+    values = np.concatenate(chunks)
+    with ShotRecord(10, track=[(1, 7)]) as record:
+        for chunk in chunks:
+            record.append_values(chunk)
+        assert record.num_shots == values.size
+        keys, counts = np.unique(values, return_counts=True)
+        assert record.get_int_counts() == dict(zip(keys.tolist(), counts.tolist()))
+        assert record.get_counts() == {format(k, "010b"): c for k, c in zip(keys.tolist(), counts.tolist())}
+        assert np.array_equal(record.ones, [np.sum((values >> b) & 1) for b in range(10)])
+        assert np.array_equal(record.words()[:, 0], values.astype(np.uint64))
+        for bits in [(1, 7), (9, 0, 4)]:
+            keys, counts = np.unique(_bits(values, bits), return_counts=True)
+            expected = dict(zip(keys.tolist(), counts.tolist()))
+            assert record.marginal_counts(bits, chunk_shots=700) == expected
+        path = record.path
+    assert not os.path.exists(path)
+
+
+def test_wide_records_and_no_histogram(tmp_path):
+    path = str(tmp_path / "wide.shots")
+    rng = np.random.default_rng(1)
+    words = rng.integers(0, 2**63, size=(500, 2), dtype=np.uint64)
+    words[:, 1] &= np.uint64(2**6 - 1)
+    with ShotRecord(70, path=path, histogram=False) as record:
+        record.append(words)
+        with pytest.raises(ValueError):
+            record.get_counts()
+        # ワードをまたぐビットの組
+        marginal = record.marginal_counts([63, 64, 69])
+        low, high = words[:, 0].astype(object), words[:, 1].astype(object)
+        keys, counts = np.unique(_bits(low | (high << 64), [63, 64, 69]).astype(np.int64), return_counts=True)
+        assert marginal == dict(zip(keys.tolist(), counts.tolist()))
+    # path を指定したファイルは残る
+    assert os.path.getsize(path) == words.nbytes
+
+
+def test_record_shots_stabilizer_path():
+    qc = QuantumCircuit(70, 2)
+    qc.h(0)
+    for q in range(69):
+        qc.cx(q, q + 1)
+    qc.x(69)
+    qc.measure([0, 69], [1, 0])
+    with record_shots(qc, 3000, seed=2, chunk_shots=1000) as record:
+        counts = record.get_counts()
+    assert set(counts) == {"01", "10"}
+    assert sum(counts.values()) == 3000
+
+
+def test_record_shots_statevector_path():
+    qc = QuantumCircuit(3)
+    qc.h(0)
+    qc.ry(0.8, 1)
+    qc.cx(0, 2)
+    probs = Statevector(qc).probabilities()
+    with record_shots(qc, 20000, seed=3, chunk_shots=4096) as record:
+        assert total_variation(record.get_counts(), probs) < 0.02
@@ -0,0 +1,54 @@
+# coding: utf-8
+"""行列関数・固有値分解を scipy / numpy と比べる"""
+
+import numpy as np
+import pytest
+import scipy.linalg
+
+from simulator.spectral import eig2, eigh, expm, logm, powm, sqrtm, unitary_mask
+
+MATRICES = [
+    np.array([[1, 1], [0, 1]]),      # 対角化できない
+    np.array([[0, 1], [0, 0]]),      # べき零
+    np.array([[1, 2], [0, 3]]),      # 正規でないが対角化できる
+    np.array([[2, 1j], [-1j, 3]]),   # エルミート
+    np.array([[0, 1], [1, 0]]),      # ユニタリ
+]
+
+
+@pytest.mark.parametrize("A", MATRICES)
+def test_matrix_functions_match_scipy(A):
+    A = A.astype(complex)
+    assert np.allclose(expm(A), scipy.linalg.expm(A), atol=1e-12)
+    if abs(np.linalg.det(A)) > 0:
+        assert np.allclose(sqrtm(A), scipy.linalg.sqrtm(A), atol=1e-12)
+        assert np.allclose(logm(A), scipy.linalg.logm(A), atol=1e-12)
+        assert np.allclose(powm(A, 0.3), scipy.linalg.fractional_matrix_power(A, 0.3), atol=1e-12)
+
+
+def test_batched_expm_and_sqrt_not():
+    stack = np.stack(MATRICES).astype(complex)
+    assert np.allclose(expm(stack), [scipy.linalg.expm(A) for A in stack], atol=1e-12)
+    X = MATRICES[-1].astype(complex)
+    sqrt_not = powm(X, 0.5, check_unitary=True)
+    assert np.allclose(sqrt_not @ sqrt_not, X)
+
+
+
+def test_eigh_matches_numpy():
+    rng = np.random.default_rng(3)
+    A = rng.normal(size=(50, 2, 2)) + 1j * rng.normal(size=(50, 2, 2))
+    A = A + np.conj(np.swapaxes(A, -1, -2))
+    A[0] = np.eye(2)   # 縮退
+    values, vectors = eigh(A)
+    assert np.allclose(values, np.linalg.eigvalsh(A), atol=1e-12)
+    assert np.allclose(A @ vectors, vectors * values[..., None, :], atol=1e-12)
+    assert unitary_mask(vectors, atol=1e-12).all()
+
+
+def test_eig2_normal_matrix():
+    # 正規だがエルミートでない行列 (ユニタリ)
+    U = scipy.linalg.expm(1j * np.array([[0.3, 1 - 2j], [1 + 2j, -0.8]]))
+    values, vectors = eig2(U)
+    assert np.allclose(U @ vectors, vectors * values[..., None, :], atol=1e-12)
+    assert unitary_mask(vectors, atol=1e-12).all()
@@ -0,0 +1,61 @@
+# coding: utf-8
+"""ParameterSweep のバッチ実行を、値を代入した回路の qiskit Statevector と比べる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.quantum_info import SparsePauliOp, Statevector
+
+from simulator import ParameterSweep, PauliSum, run_sweep
+
+
+def _circuit() -> QuantumCircuit:
+    a, b, c = Parameter("a"), Parameter("b"), Parameter("c")
+    qc = QuantumCircuit(4)
+    qc.h(range(4))
+    qc.rx(a, 0)
+    qc.ry(2 * b - 0.5, 1)
+    qc.rz(c, 2)
+    qc.p(a + 1.0, 3)
+    qc.u(a, b, c, 0)
+    qc.cx(0, 3)
+    qc.cp(b, 3, 1)
+    qc.crx(c, 1, 2)
+    qc.cry(a, 2, 0)
+    qc.crz(b, 0, 2)
+    qc.rzz(c, 1, 3)
+    qc.rxx(a, 0, 2)
+    qc.ccx(2, 0, 3)
+    qc.t(1)
+    qc.global_phase = a
+    return qc
+
+
+def test_statevectors_match_qiskit():
+    qc = _circuit()
+    values = np.random.default_rng(0).uniform(-np.pi, np.pi, (7, 3))
+    # block_bytes を小さくして、ブロックに分けても同じになるか確かめる
+    states = ParameterSweep(qc).statevectors(values, block_bytes=16 * 16 * 2)
+    for v, state in zip(values, states):
+        assert np.allclose(state, Statevector(qc.assign_parameters(v)).data, atol=1e-12)
+    assert np.allclose(run_sweep(qc, values), states, atol=1e-12)
+
+
+def test_probabilities_and_expectations():
+    qc = _circuit()
+    sweep = ParameterSweep(qc)
+    values = np.random.default_rng(1).uniform(-np.pi, np.pi, (5, 3))
+    states = sweep.statevectors(values)
+    probs = sweep.probabilities(values, max_bytes=16 * 16)
+    assert np.allclose(probs, np.abs(states) ** 2)
+    terms = [("ZZII", 1.0), ("IXYI", -0.5), ("XIIZ", 0.3)]
+    energies = sweep.expectations(PauliSum.from_list(terms), values, max_bytes=16 * 16 * 2)
+    H = SparsePauliOp.from_list(terms)
+    for v, energy in zip(values, energies):
+        assert np.isclose(energy, Statevector(qc.assign_parameters(v)).expectation_value(H).real)
+
+
+def test_wrong_number_of_parameters():
+    with pytest.raises(ValueError):
+        ParameterSweep(_circuit()).statevectors(np.zeros((2, 2)))
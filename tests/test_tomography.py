@@ -0,0 +1,59 @@
+# coding: utf-8
+"""トモグラフィーの再構成を、厳密な相対頻度から元の密度行列に戻るかで確かめる"""
+
+import warnings
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import DensityMatrix, Statevector
+
+from simulator import reconstruct
+from simulator.tomography import measurement_bases, simulate_counts
+
+
+def _state() -> np.ndarray:
+    qc = QuantumCircuit(2)
+    qc.ry(0.7, 0)
+    qc.cx(0, 1)
+    qc.rz(0.4, 1)
+    return Statevector(qc).data
+
+
+def _exact_experiment(rho: np.ndarray) -> dict:
+    experiment = {}
+    for label in measurement_bases(2):
+        rotation = QuantumCircuit(2)
+        for q, char in enumerate(reversed(label)):
+            if char == "X":
+                rotation.h(q)
+            elif char == "Y":
+                rotation.sdg(q)
+                rotation.h(q)
+        experiment[label] = dict(enumerate(DensityMatrix(rho).evolve(rotation).probabilities()))
+    return experiment
+
+
+@pytest.mark.parametrize("mixing", [0.0, 0.2])
+def test_exact_frequencies(mixing):
+    psi = _state()
+    rho = (1 - mixing) * np.outer(psi, psi.conj()) + mixing * np.eye(4) / 4
+    experiment = _exact_experiment(rho)
+    for method in ("linear", "projected"):
+        assert np.allclose(reconstruct([experiment], 2, method)[0], rho, atol=1e-10)
+    # 純粋状態 (mixing=0) でも最尤推定が収束する
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert np.allclose(reconstruct([experiment], 2, "mle")[0], rho, atol=1e-6)
+
+
+def test_mle_with_shots():
+    psi = _state()
+    experiments = [simulate_counts(psi, 2000, seed=seed) for seed in range(20)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        rho = reconstruct(experiments, 2, "mle")
+    assert np.allclose(np.trace(rho, axis1=1, axis2=2), 1)
+    assert np.all(np.linalg.eigvalsh(rho) > -1e-12)
+    fidelity = np.einsum("i,eij,j->e", psi.conj(), rho, psi).real
+    assert fidelity.mean() > 0.98
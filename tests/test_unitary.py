@@ -0,0 +1,54 @@
+# coding: utf-8
+"""UnitaryBuilder を qiskit の Operator と比べる"""
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Operator, random_unitary
+
+from simulator.unitary import UnitaryBuilder, build_unitary
+
+
+def _layer(phase: float) -> QuantumCircuit:
+    layer = QuantumCircuit(2)
+    layer.rx(0.3, 0)
+    layer.cx(1, 0)
+    layer.global_phase = phase
+    return layer
+
+
+def test_ecr_matches_operator():
+    qc = QuantumCircuit(2)
+    qc.ecr(0, 1)
+    assert np.allclose(build_unitary(qc), Operator(qc).data, atol=1e-12)
+
+
+def test_circuit_global_phase():
+    qc = QuantumCircuit(2)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.global_phase = 0.9
+    assert np.allclose(build_unitary(qc), Operator(qc).data, atol=1e-12)
+
+
+def test_phased_gate_definitions():
+    qc = QuantumCircuit(3)
+    qc.append(_layer(1.3).to_gate(), [0, 2])
+    qc.append(_layer(0.2).to_gate(), [0, 2])
+    qc.append(_layer(1.3).to_gate(), [1, 0])
+    qc.global_phase = 0.4
+    builder = UnitaryBuilder()
+    U = Operator(qc).data
+    assert np.allclose(builder.unitary(qc), U, atol=1e-12)
+    # 位相だけが違う2つの層は別のキーになる
+    assert builder.misses == 2
+    assert np.allclose(builder.columns(qc, [1, 5]), U[:, [1, 5]], atol=1e-12)
+    v = np.arange(8) + 1j
+    assert np.allclose(builder.matvec(qc)(v), U @ v, atol=1e-12)
+
+
+def test_unitary_gate_params():
+    qc = QuantumCircuit(3)
+    qc.h(0)
+    qc.unitary(random_unitary(4, seed=1), [2, 0])
+    qc.unitary(random_unitary(2, seed=2), [1])
+    assert np.allclose(build_unitary(qc), Operator(qc).data, atol=1e-12)
@@ -0,0 +1,67 @@
+# coding: utf-8
+"""VQE の adjoint 勾配を中心差分と、エネルギーを qiskit の期待値と比べる"""
+
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.quantum_info import SparsePauliOp, Statevector
+
+from algorithms.vqe import Ansatz, energy_and_gradient, hardware_efficient_ansatz, run_vqe
+from simulator.pauli import PauliSum
+
+TERMS = [("IZZ", -1.0), ("ZZI", -1.0), ("IIX", -0.5), ("IXI", -0.5), ("XII", -0.5), ("YIY", 0.3)]
+
+
+def _finite_difference(H, ansatz, values, eps=1e-6):
+    grad = np.zeros(values.size)
+    for i in range(values.size):
+        step = np.zeros(values.size)
+        step[i] = eps
+        plus, _ = energy_and_gradient(H, ansatz, values + step)
+        minus, _ = energy_and_gradient(H, ansatz, values - step)
+        grad[i] = (plus - minus) / (2 * eps)
+    return grad
+
+
+def _shared_parameter_circuit() -> QuantumCircuit:
+    # 同じパラメータを複数のゲートで使い、1次式の角度と global_phase も含める
+    a, b = Parameter("a"), Parameter("b")
+    qc = QuantumCircuit(3)
+    qc.h(range(3))
+    qc.rx(2 * a + 0.3, 0)
+    qc.rzz(b, 0, 1)
+    qc.ry(-a, 2)
+    qc.p(0.5 * b, 1)
+    qc.cx(1, 2)
+    qc.rz(a - 1.0, 1)
+    qc.global_phase = b
+    return qc
+
+
+@pytest.mark.parametrize("kind", ["hardware_efficient", "circuit"])
+def test_adjoint_gradient_matches_finite_difference(kind):
+    H = PauliSum.from_list(TERMS)
+    if kind == "hardware_efficient":
+        ansatz = hardware_efficient_ansatz(3, layers=2)
+    else:
+        ansatz = Ansatz.from_circuit(_shared_parameter_circuit())
+    values = np.random.default_rng(1).uniform(-np.pi, np.pi, ansatz.num_parameters)
+    _, grad = energy_and_gradient(H, ansatz, values)
+    assert np.allclose(grad, _finite_difference(H, ansatz, values), atol=1e-6)
+
+
+def test_energy_matches_qiskit():
+    qc = _shared_parameter_circuit()
+    values = [0.4, -1.2]
+    energy, _ = energy_and_gradient(PauliSum.from_list(TERMS), Ansatz.from_circuit(qc), values)
+    state = Statevector(qc.assign_parameters(values))
+    assert np.isclose(energy, state.expectation_value(SparsePauliOp.from_list(TERMS)).real)
+
+
+def test_run_vqe_finds_ground_energy():
+    H = PauliSum.from_list(TERMS[:5])
+    exact = np.linalg.eigvalsh(SparsePauliOp.from_list(TERMS[:5]).to_matrix())[0]
+    result = run_vqe(H, hardware_efficient_ansatz(3, layers=2), seed=0)
+    assert result.energy == pytest.approx(exact, abs=1e-4)
+    assert result.evaluations == len(result.history)
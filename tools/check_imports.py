@@ -0,0 +1,80 @@
+# coding: utf-8
+"""import の時間と、import で読み込まれる重いライブラリを確かめる
+
+    python tools/check_imports.py [--budget 秒] [モジュール ...]
+
+モジュールを省略すると simulator と algorithms のパッケージと、そのすべてのサブモジュールを調べる
+(同じ確認は python -m pytest tests でも tests/test_imports.py として実行される)。
+モジュールごとに新しいインタプリタを起動し、numpy を読み込んだ後の
+import にかかった時間を測る (numpy 自体の時間は含めない)。
+予算を超えたか、qiskit / matplotlib / networkx / amplify / scipy を
+import の時点で読み込んだか、import 時にしてはいけない処理 (LAZY) を
+行ったモジュールがあれば終了コード 1 を返す。
+"""
+
+import argparse
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PACKAGES = ("simulator", "algorithms")
+HEAVY = ("qiskit", "matplotlib", "networkx", "amplify", "scipy")
+
+# import した直後に真でなければならない式 (モジュールの属性で書く)
+LAZY = {
+    # Clifford+T の表は最初に使うときに作る
+    "simulator.decompose": "_build_table.cache_info().currsize == 0",
+}
+
+_PROBE = """
+import json, sys, time
+import numpy
+start = time.perf_counter()
+import {module} as module
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+lazy = bool(eval({lazy!r}, vars(module)))
+print(json.dumps({{"seconds": elapsed, "heavy": heavy, "lazy": lazy}}))
+"""
+
+
+def modules() -> list[str]:
+    """PACKAGES とそのサブモジュールの名前"""
+    names = []
+    for package in PACKAGES:
+        names.append(package)
+        path = [os.path.join(ROOT, package)]
+        names += [f"{package}.{info.name}" for info in pkgutil.iter_modules(path)]
+    return names
+
+
+def measure(module: str) -> dict:
+    """新しいプロセスで module を import し、{'seconds': 秒, 'heavy': [...], 'lazy': bool} を返す"""
+    code = _PROBE.format(module=module, heavy=HEAVY, lazy=LAZY.get(module, "True"))
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.1, help="モジュールごとの import 時間の上限 (秒)")
+    parser.add_argument("modules", nargs="*")
+    args = parser.parse_args()
+    failed = False
+    for module in args.modules or modules():
+        result = measure(module)
+        ok = result["seconds"] <= args.budget and not result["heavy"] and result["lazy"]
+        failed |= not ok
+        heavy = f"  重いライブラリ: {', '.join(result['heavy'])}" if result["heavy"] else ""
+        lazy = "" if result["lazy"] else f"  import 時に実行: {LAZY[module]} が偽"
+        print(f"{'ok  ' if ok else 'FAIL'} {module:<24} {1000 * result['seconds']:7.1f} ms{heavy}{lazy}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# coding: utf-8
+"""ノートブックから変換した .py を、変更したセルとその下流だけ実行し直す
+
+    python tools/run_cells.py basics_watrous/single_systems/*.py [--jobs N] [--force]
+
+`# In[n]:` の行でスクリプトをセルに分け、各セルについて
+
+- 定義する名前 (代入、def/class、import、および `qc.h(0)` や `a[0] = 1` のように
+  変更しうる名前) と、使う名前を AST から求める
+- 使う名前を最後に定義した上流のセルを依存先とし、
+  セルのキー = sha256(ソース + 依存先のキー) とする (上流の変更は下流のキーに伝わる)
+- キーごとに標準出力と、定義した名前の値 (pickle できたもの) をキャッシュに保存する
+
+再実行では、キーがキャッシュにあるセルは実行せずに出力を表示して値を復元し、
+キーが変わったセルだけを実行する。import したモジュールは名前だけ覚えて import し直す。
+pickle できない値を定義したセルはキャッシュせず、毎回実行する。
+複数のスクリプトは別々のプロセスで並列に実行する。
+"""
+
+import argparse
+import ast
+import builtins
+import contextlib
+import hashlib
+import importlib
+import io
+import os
+import pickle
+import re
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT, ".cell_cache")
+
+_MARKER = re.compile(r"^# In\[([^\]]*)\]:\s*$", re.MULTILINE)
+
+
+class Cell(NamedTuple):
+    label: str          # '# In[3]:' の番号 (最初のマーカーより前は 'preamble')
+    source: str
+    defines: frozenset
+    uses: frozenset
+
+
+def _names(source: str) -> tuple[frozenset, frozenset]:
+    """セルが定義する (または変更しうる) 名前と、使う名前"""
+    tree = ast.parse(source)
+    defines, uses = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            (defines if isinstance(node.ctx, (ast.Store, ast.Del)) else uses).add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            defines.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                defines.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, (ast.Attribute, ast.Subscript)) and isinstance(node.ctx, ast.Store):
+            base = node.value
+            while isinstance(base, (ast.Attribute, ast.Subscript)):
+                base = base.value
+            if isinstance(base, ast.Name):
+                defines.add(base.id)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            # qc.h(0) や v.append(x) はオブジェクトを書き換えうるので定義とみなす
+            if isinstance(node.func.value, ast.Name):
+                defines.add(node.func.value.id)
+    return frozenset(defines), frozenset(uses - set(dir(builtins)))
+
+
+def split_cells(source: str) -> list[Cell]:
+    """スクリプトを `# In[n]:` の行でセルに分ける"""
+    labels = ["preamble"] + [m.group(1).strip() or "?" for m in _MARKER.finditer(source)]
+    bodies = _MARKER.split(source)[::2]
+    cells = []
+    for label, body in zip(labels, bodies):
+        if not body.strip():
+            continue
+        defines, uses = _names(body)
+        cells.append(Cell(label, body, defines, uses))
+    return cells
+
+
+def cell_keys(cells: list[Cell]) -> list[str]:
+    """各セルのキー (ソースと、使う名前を最後に定義した上流のセルのキーのハッシュ)"""
+    keys, last = [], {}
+    for cell in cells:
+        upstream = sorted({last[name] for name in cell.uses if name in last})
+        digest = hashlib.sha256(cell.source.encode())
+        for key in upstream:
+            digest.update(key.encode())
+        key = digest.hexdigest()
+        keys.append(key)
+        for name in cell.defines:
+            last[name] = key
+    return keys
+
+
+def _definitions(source: str) -> dict[str, str]:
+    """セルの最上位の def / class のソース (デコレータを含む)"""
+    lines = source.splitlines(keepends=True)
+    out = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            out[node.name] = "".join(lines[start - 1:node.end_lineno])
+    return out
+
+
+def _snapshot(namespace: dict, names, definitions: dict[str, str]) -> dict | None:
+    """定義した名前の値を pickle できる形にする (できないものがあれば None)
+
+    セルで定義した関数やクラスは __main__ の名前では pickle できないので、ソースを覚える。
+    """
+    values = {}
+    for name in names:
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        if isinstance(value, type(sys)):
+            values[name] = ("module", value.__name__)
+            continue
+        if name in definitions and getattr(value, "__module__", None) == "__main__":
+            values[name] = ("source", definitions[name])
+            continue
+        try:
+            values[name] = ("value", pickle.dumps(value))
+        except Exception:
+            return None
+    return values
+
+
+def _restore(namespace: dict, values: dict) -> None:
+    for name, (kind, data) in values.items():
+        if kind == "module":
+            namespace[name] = importlib.import_module(data)
+        elif kind == "source":
+            exec(data, namespace)
+        else:
+            namespace[name] = pickle.loads(data)
+
+
+def _display(*objects, **kwargs) -> None:
+    """Jupyter の display の代わり (画面なしでは repr を表示する)"""
+    for obj in objects:
+        print(repr(obj))
+
+
+def run_script(path: str, cache_dir: str = CACHE_DIR, force: bool = False) -> list[tuple[str, str]]:
+    """スクリプトをセルごとに実行し [(セルの番号, 'cached' / 'run' / 'error'), ...] を返す"""
+    path = os.path.abspath(path)
+    with open(path, encoding="utf-8") as f:
+        cells = split_cells(f.read())
+    keys = cell_keys(cells)
+    directory = os.path.join(cache_dir, hashlib.sha256(path.encode()).hexdigest()[:16])
+    os.makedirs(directory, exist_ok=True)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    os.chdir(os.path.dirname(path))
+    namespace = {"__name__": "__main__", "__file__": path, "display": _display}
+    status = []
+    for cell, key in zip(cells, keys):
+        entry = os.path.join(directory, key + ".pkl")
+        if not force and os.path.exists(entry):
+            with open(entry, "rb") as f:
+                cached = pickle.load(f)
+            sys.stdout.write(cached["stdout"])
+            _restore(namespace, cached["values"])
+            status.append((cell.label, "cached"))
+            continue
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                exec(compile(cell.source, f"{path}:In[{cell.label}]", "exec"), namespace)
+        except Exception:
+            sys.stdout.write(buffer.getvalue())
+            traceback.print_exc()
+            status.append((cell.label, "error"))
+            break
+        sys.stdout.write(buffer.getvalue())
+        values = _snapshot(namespace, cell.defines, _definitions(cell.source))
+        if values is not None:
+            tmp = entry + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump({"stdout": buffer.getvalue(), "values": values}, f)
+            os.replace(tmp, entry)
+        status.append((cell.label, "run"))
+    return status
+
+
+def _run_captured(args) -> tuple[str, str, list]:
+    """別プロセスで run_script を実行し、出力をまとめて返す"""
+    path, cache_dir, force = args
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        status = run_script(path, cache_dir, force)
+    return path, buffer.getvalue(), status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="+")
+    parser.add_argument("--jobs", type=int, default=None, help="並列に実行するスクリプトの数")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="キャッシュを使わずにすべて実行する")
+    args = parser.parse_args()
+    tasks = [(os.path.abspath(p), os.path.abspath(args.cache_dir), args.force) for p in args.scripts]
+    failed = False
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for path, output, status in pool.map(_run_captured, tasks):
+            print(f"==> {os.path.relpath(path)}")
+            print(output, end="")
+            summary = ", ".join(f"In[{label}]:{state}" for label, state in status)
+            print(f"--- {summary}")
+            failed |= any(state == "error" for _, state in status)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())